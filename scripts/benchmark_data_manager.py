@@ -0,0 +1,76 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+"""Measure points ingested per second by data manager of VisualDL server
+with concurrent readers.
+
+Usage: python scripts/benchmark_data_manager.py [--tags N] [--steps N]
+    [--readers N]
+"""
+import argparse
+import random
+import threading
+import time
+
+from visualdl.proto.record_pb2 import Record
+from visualdl.server.data_manager import DataManager
+
+
+def benchmark(num_tags=1000, num_steps=200, num_readers=4):
+    data_manager = DataManager()
+    tags = ['tag%d' % index for index in range(num_tags)]
+    items = [[
+        Record.Value(id=step, tag=tag, timestamp=step, value=step * 0.5)
+        for tag in tags
+    ] for step in range(num_steps)]
+    done = threading.Event()
+    reads = [0] * num_readers
+
+    def read(index):
+        reservoir = data_manager.get_reservoir('scalar')
+        rand = random.Random(index)
+        while not done.is_set():
+            try:
+                reservoir.get_scalar_arrays('run', rand.choice(tags))
+            except KeyError:
+                pass
+            reads[index] += 1
+
+    readers = [
+        threading.Thread(target=read, args=(index, ))
+        for index in range(num_readers)
+    ]
+    for reader in readers:
+        reader.start()
+    start = time.time()
+    for step_items in items:
+        for item in step_items:
+            data_manager.add_item('scalar', 'run', item.tag, item)
+    duration = time.time() - start
+    done.set()
+    for reader in readers:
+        reader.join()
+    print('{} points in {:.2f}s, {:.0f} points/s ingested, {:.0f} reads/s '
+          'by {} readers.'.format(num_tags * num_steps, duration,
+                                  num_tags * num_steps / duration,
+                                  sum(reads) / duration, num_readers))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--tags', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+    benchmark(args.tags, args.steps, args.readers)
@@ -0,0 +1,188 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from visualdl import LogWriter
+from visualdl.server import lib
+from visualdl.server.api import Api
+from visualdl.server.data_manager import DataManager
+
+
+class ApiCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(
+            logdir=self.run,
+            file_name='vdlrecords.1.log')
+        self.add_scalars('loss', range(5))
+        self.add_scalars('acc', range(5))
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            self.api = Api(self.logdir, '', cache_timeout=20)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def add_scalars(self, tag, steps):
+        for step in steps:
+            self.writer.add_scalar(tag=tag, value=step * 0.5, step=step)
+        self.writer.flush()
+
+    def get_steps(self, tag):
+        data, _, _ = self.api.scalar_list(self.run, tag)
+        return [record[1] for record in json.loads(data)['data']]
+
+    def test_cache_invalidated_by_data_of_same_tag(self):
+        with mock.patch.object(
+                lib, 'get_scalar', wraps=lib.get_scalar) as get_scalar:
+            self.assertEqual(self.get_steps('loss'), list(range(5)))
+            self.assertEqual(self.get_steps('loss'), list(range(5)))
+            self.assertEqual(get_scalar.call_count, 1)
+
+            # New data of other tags does not invalidate cache.
+            self.add_scalars('acc', range(5, 10))
+            self.api._reader.load_new_data()
+            self.assertEqual(self.get_steps('loss'), list(range(5)))
+            self.assertEqual(get_scalar.call_count, 1)
+            self.assertEqual(self.get_steps('acc'), list(range(10)))
+            self.assertEqual(get_scalar.call_count, 2)
+
+            self.add_scalars('loss', range(5, 10))
+            self.api._reader.load_new_data()
+            self.assertEqual(self.get_steps('loss'), list(range(10)))
+            self.assertEqual(get_scalar.call_count, 3)
+
+
+class ApiMediaSinceTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(
+            logdir=self.run,
+            file_name='vdlrecords.1.log')
+        self.step = 0
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            self.api = Api(self.logdir, '', cache_timeout=20)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def add_images(self, count):
+        for _ in range(count):
+            img = np.full((4, 4, 3), self.step % 256, dtype=np.uint8)
+            self.writer.add_image(tag='img', img=img, step=self.step)
+            self.step += 1
+        self.writer.flush()
+        self.api._reader.load_new_data()
+
+    def image_list(self, since_version=None):
+        data, _, _ = self.api.image_list(self.run, 'img', None, since_version)
+        return json.loads(data)['data']
+
+    def image(self, **kwargs):
+        data, _, _ = self.api.image_image(self.run, 'img', **kwargs)
+        return data
+
+    def test_delta_same_as_full_fetch(self):
+        self.add_images(5)
+        records = self.image_list()
+        version = self.image_list(-1)['version']
+        # Images more than max size of bucket are sampled, so that images
+        # got before are removed.
+        for count in (3, 8, 20, 1):
+            self.add_images(count)
+            delta = self.image_list(version)
+            self.assertFalse(delta['reset'])
+            removed = set(delta['removed'])
+            records = [
+                record for record in records if record['id'] not in removed
+            ] + delta['records']
+            version = delta['version']
+            full = self.image_list()
+            self.assertEqual(records, full)
+            for index, record in enumerate(full):
+                self.assertEqual(
+                    self.image(id=record['id']), self.image(index=index))
+
+    def test_reset_if_version_is_newer(self):
+        self.add_images(3)
+        version = self.image_list(-1)['version']
+        delta = self.image_list(version + 1)
+        self.assertTrue(delta['reset'])
+        self.assertEqual(delta['records'], self.image_list())
+
+
+class ApiEmbeddingsTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(
+            logdir=self.run,
+            file_name='vdlrecords.1.log')
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            self.api = Api(self.logdir, '', cache_timeout=20)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def get_embedding(self, tag):
+        name = os.path.join(self.run, tag)
+        data, _, _ = self.api.embedding_list()
+        self.assertIn(name, [item['name'] for item in json.loads(data)['data']])
+        tensor, mimetype, _ = self.api.embedding_tensor(name)
+        self.assertEqual(mimetype, 'application/octet-stream')
+        metadata, _, _ = self.api.embedding_metadata(name)
+        return tensor, metadata
+
+    def test_packed_same_as_unpacked(self):
+        rng = np.random.RandomState(0)
+        metadata = ['label_{}'.format(i) for i in range(6)]
+        for dtype in ('float32', 'float16'):
+            with self.subTest(dtype=dtype):
+                # Values exactly representable by both types.
+                mat = rng.standard_normal((6, 5)).astype(dtype).astype(
+                    np.float32)
+                self.writer.add_embeddings(
+                    tag='unpacked_' + dtype, mat=mat, metadata=metadata)
+                self.writer.add_embeddings(
+                    tag='packed_' + dtype,
+                    mat=mat,
+                    metadata=metadata,
+                    packed=True,
+                    dtype=dtype)
+                self.writer.flush()
+                self.api._reader.load_new_data()
+                tensor, labels = self.get_embedding('packed_' + dtype)
+                self.assertEqual((tensor, labels),
+                                 self.get_embedding('unpacked_' + dtype))
+                self.assertEqual(tensor, mat.astype('<f4').tobytes())
+                self.assertEqual(labels.split(), metadata)
+
+
+if __name__ == '__main__':
+    unittest.main()
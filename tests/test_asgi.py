@@ -0,0 +1,105 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from visualdl import LogWriter
+from visualdl.server.api import create_api_call
+from visualdl.server.asgi import _call_json
+from visualdl.server.asgi import _LiveWatcher
+from visualdl.server.asgi import _Subscription
+from visualdl.server.data_manager import DataManager
+
+
+class LiveWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(
+            logdir=self.run,
+            file_name='vdlrecords.1.log')
+        self.step = 0
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            api_call = create_api_call(self.logdir, '', 20)
+        self.paths = []
+
+        def call(path, args):
+            self.paths.append(path)
+            return api_call(path, args)
+
+        self.api_call = call
+        self.watcher = _LiveWatcher(call)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def add_scalars(self, count):
+        for _ in range(count):
+            self.writer.add_scalar(tag='loss', value=self.step, step=self.step)
+            self.step += 1
+        self.writer.flush()
+
+    def subscribe(self):
+        subscription = _Subscription()
+        subscription.update({'subscribe': [[self.run, 'loss']]})
+        return subscription
+
+    def test_subscriptions_share_delta(self):
+        self.add_scalars(5)
+        first = self.subscribe()
+        second = self.subscribe()
+        events = self.watcher.poll([first, second])
+        self.assertEqual([subscription for subscription, _ in events],
+                         [first, second])
+        self.assertEqual(self.paths.count('scalar/list'), 1)
+        self.assertEqual(len(events[0][1][0]['records']), 5)
+
+        self.paths = []
+        self.add_scalars(3)
+        events = self.watcher.poll([first, second])
+        self.assertEqual(self.paths.count('data/version'), 1)
+        self.assertEqual(self.paths.count('scalar/list'), 1)
+        self.assertEqual(len(events[1][1][0]['records']), 3)
+
+        # Nothing is sent if data of series is not changed.
+        self.assertEqual(self.watcher.poll([first, second]), [])
+
+    def test_events_same_as_full_fetch(self):
+        subscription = self.subscribe()
+        records = {}
+        # Points more than max size of bucket are sampled.
+        for count in (10, 600, 900, 1):
+            self.add_scalars(count)
+            for _, events in self.watcher.poll([subscription]):
+                for event in events:
+                    if event['reset']:
+                        records = {}
+                    for id in event['removed']:
+                        del records[id]
+                    records.update(zip(event['ids'], event['records']))
+            full = _call_json(self.api_call, 'scalar/list', {
+                'run': self.run,
+                'tag': 'loss'
+            })
+            self.assertEqual([records[id] for id in sorted(records)], full)
+
+
+if __name__ == '__main__':
+    unittest.main()
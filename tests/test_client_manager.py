@@ -0,0 +1,90 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import json
+import unittest
+
+from tests.test_netron_graph import get_node_names
+from tests.test_netron_graph import make_graph_data
+from visualdl.component.graph.netron_graph import Model
+from visualdl.reader.graph_reader import GraphReader
+from visualdl.server.client_manager import ClientManager
+
+RUN = 'manual_input_model'
+
+
+class ClientManagerTest(unittest.TestCase):
+    def setUp(self):
+        reader = GraphReader(cache_dir=None)
+        reader.set_input_graph(
+            json.dumps(make_graph_data()).encode(), file_type='vdlgraph')
+        self.manager = ClientManager(reader, max_clients=2)
+
+    def get_graph(self, ip, **kwargs):
+        return self.manager.get_data(ip).get_graph(RUN, **kwargs)
+
+    def test_visibility_independent(self):
+        self.get_graph('a', nodeid='/encoder', expand=True)
+        self.get_graph('b', nodeid='/decoder', expand=True)
+        self.assertEqual(
+            get_node_names(self.get_graph('a')),
+            ['/decoder', '/encoder/conv2d_0', '/encoder/layer', '/relu_0'])
+        self.assertEqual(
+            get_node_names(self.get_graph('b')),
+            ['/decoder/scale_0', '/encoder', '/relu_0'])
+        # Nodes, vars and edges are shared, and only visibility is copied.
+        model_a = self.manager.get_data('a')._get_model(RUN)
+        model_b = self.manager.get_data('b')._get_model(RUN)
+        self.assertIsNot(model_a, model_b)
+        self.assertIsNot(model_a.visible_maps, model_b.visible_maps)
+        self.assertIs(model_a.all_nodes, model_b.all_nodes)
+        self.assertIs(model_a.all_vars, model_b.all_vars)
+        self.assertIs(model_a.all_edges, model_b.all_edges)
+        self.assertIs(model_a.search_index, model_b.search_index)
+
+    def test_evict_least_recently_used(self):
+        self.get_graph('a', nodeid='/encoder', expand=True)
+        self.get_graph('b', nodeid='/decoder', expand=True)
+        data_a = self.manager.get_data('a')
+        self.manager.get_data('c')
+        # `b` is evicted, and `a` is kept since it is used recently.
+        self.assertEqual(list(self.manager.ip_data_map), ['a', 'c'])
+        self.assertIs(self.manager.get_data('a'), data_a)
+        # Evicted client gets initial graph again.
+        self.assertEqual(get_node_names(self.get_graph('b')),
+                         ['/decoder', '/encoder', '/relu_0'])
+        self.assertEqual(list(self.manager.ip_data_map), ['a', 'b'])
+
+
+class ModelForkTest(unittest.TestCase):
+    def test_fork(self):
+        model = Model(make_graph_data())
+        model.adjust_visible('/encoder')
+        fork = model.fork()
+        # Fork starts from visibility of the model.
+        self.assertEqual(get_node_names(fork.make_graph()),
+                         get_node_names(model.make_graph()))
+        fork.adjust_visible('/encoder/layer')
+        model.adjust_visible('/encoder', expand=False)
+        self.assertEqual(get_node_names(model.make_graph()),
+                         ['/decoder', '/encoder', '/relu_0'])
+        self.assertEqual(get_node_names(fork.make_graph()), [
+            '/decoder', '/encoder/conv2d_0',
+            '/encoder/layer/conv2d_transpose_0', '/encoder/layer/matmul_0',
+            '/relu_0'
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from visualdl import LogWriter
+from visualdl.server.api import create_api_call
+from visualdl.server.data_manager import DataManager
+from visualdl.utils import columnar
+
+
+class ColumnarTest(unittest.TestCase):
+    def test_round_trip(self):
+        columns = [('f8', np.array([0.5, -1, np.nan, np.inf])),
+                   ('f4', np.array([1.5, 2], dtype=np.float32)),
+                   ('big', np.array([1, 2, 3], dtype='>i4')),
+                   ('u1', np.array([7], dtype=np.uint8)),
+                   ('empty', np.array([], dtype=np.int64)),
+                   ('i8', np.arange(5, dtype=np.int64))]
+        meta = {'version': 3, 'removed': [1, 2]}
+        decoded, decoded_meta = columnar.decode(
+            columnar.encode(columns, meta))
+        self.assertEqual(decoded_meta, meta)
+        self.assertEqual(list(decoded), [name for name, _ in columns])
+        for name, array in columns:
+            np.testing.assert_array_equal(decoded[name], array)
+            # Always little-endian, so that frontend can view it directly.
+            self.assertEqual(decoded[name].dtype,
+                             array.dtype.newbyteorder('<'))
+        self.assertEqual(columnar.decode(columnar.encode([]))[1], {})
+
+    def test_aligned(self):
+        for header_size in range(8):
+            meta = {'x': 'x' * header_size}
+            buffer = columnar.encode(
+                [('u1', np.arange(3, dtype=np.uint8)),
+                 ('f4', np.arange(5, dtype=np.float32)),
+                 ('f8', np.arange(2, dtype=np.float64))], meta)
+            decoded, _ = columnar.decode(buffer)
+            base = np.frombuffer(buffer, dtype=np.uint8).ctypes.data
+            for array in decoded.values():
+                self.assertEqual((array.ctypes.data - base) % 8, 0)
+
+    def test_invalid_magic(self):
+        with self.assertRaises(ValueError):
+            columnar.decode(b'XXXX' + columnar.encode([])[4:])
+
+
+class BinaryRouteTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(logdir=self.run, file_name='vdlrecords.1.log')
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            self.call = create_api_call(self.logdir, '', cache_timeout=20)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def get(self, path, **args):
+        data, _, _ = self.call(path, dict(args, run=self.run))
+        return data
+
+    def test_scalar_same_as_json(self):
+        values = [0.5, float('nan'), -2, float('inf'), 3.25]
+        for step, value in enumerate(values):
+            self.writer.add_scalar(tag='loss', value=value, step=step * 2)
+        self.writer.flush()
+        for since_version in (None, -1):
+            with self.subTest(since_version=since_version):
+                records = json.loads(
+                    self.get('scalar/list', tag='loss',
+                             since_version=since_version))['data']
+                columns, meta = columnar.decode(
+                    self.get('scalar/list', tag='loss', format='binary',
+                             since_version=since_version))
+                if since_version is not None:
+                    self.assertEqual(meta['version'], records['version'])
+                    self.assertEqual(columns['id'].tolist(), records['ids'])
+                    records = records['records']
+                self.assertEqual(len(records), len(values))
+                self.assertEqual(columns['wallTime'].tolist(),
+                                 [record[0] for record in records])
+                self.assertEqual(columns['step'].tolist(),
+                                 [record[1] for record in records])
+                # Json has non-finite values as strings.
+                np.testing.assert_array_equal(
+                    columns['value'],
+                    np.array([float(record[2]) for record in records],
+                             dtype=np.float32))
+
+    def test_ragged_histogram(self):
+        rng = np.random.RandomState(0)
+        buckets = [3, 1, 5]
+        for step, bins in enumerate(buckets):
+            self.writer.add_histogram(
+                tag='hist', values=rng.uniform(size=20), step=step,
+                buckets=bins)
+        self.writer.flush()
+        records = json.loads(self.get('histogram/list', tag='hist'))['data']
+        columns, _ = columnar.decode(
+            self.get('histogram/list', tag='hist', format='binary'))
+        offset = columns['offset']
+        self.assertEqual(offset.tolist(), [0, 3, 4, 9])
+        self.assertEqual(columns['step'].tolist(), [0, 1, 2])
+        for i, (wall_time, step, histogram) in enumerate(records):
+            self.assertEqual(columns['wallTime'][i], wall_time)
+            hist = columns['hist'][offset[i]:offset[i + 1]]
+            # Every histogram has one more bin edge than counts.
+            bin_edges = columns['binEdges'][offset[i] + i:offset[i + 1] + i + 1]
+            self.assertEqual(len(hist), buckets[i])
+            self.assertEqual(hist.tolist(), [item[2] for item in histogram])
+            self.assertEqual(bin_edges.tolist(),
+                             [item[0] for item in histogram] +
+                             [histogram[-1][1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from visualdl.utils import crc32
+
+
+class Crc32Test(unittest.TestCase):
+    def test_known_value(self):
+        # Check value of CRC-32C in RFC 3720.
+        self.assertEqual(crc32._crc32c_python(b'123456789'), 0xe3069283)
+        self.assertEqual(crc32._crc32c_python(bytes(32)), 0x8a9136aa)
+
+    def test_numpy_same_as_python(self):
+        rng = np.random.RandomState(0)
+        sizes = [64, 65, 4095, 4096, 4097, 10000, 65536, 65536 + 13]
+        for size in sizes:
+            data = rng.randint(0, 256, size, dtype=np.uint8).tobytes()
+            self.assertEqual(
+                crc32._crc32c_numpy(data), crc32._crc32c_python(data),
+                'size {}'.format(size))
+
+    def test_crc32c_without_extension(self):
+        data = bytes(range(256)) * 20
+        expected = crc32._crc32c_python(data)
+        with mock.patch.object(crc32, '_crc32c_extension', None):
+            self.assertEqual(crc32.crc32c(data), expected)
+            self.assertEqual(crc32.crc32c(bytearray(data)), expected)
+            self.assertEqual(crc32.crc32c(memoryview(data)), expected)
+            self.assertEqual(crc32.crc32c(data[:100]),
+                             crc32._crc32c_python(data[:100]))
+
+    @unittest.skipUnless(crc32.CRC32C_EXTENSION_ENABLED,
+                         'crc32c extension is not installed')
+    def test_extension_same_as_python(self):
+        data = bytes(range(256)) * 20
+        self.assertEqual(crc32.crc32c(data), crc32._crc32c_python(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
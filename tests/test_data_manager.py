@@ -0,0 +1,151 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import json
+import unittest
+
+import numpy as np
+
+from visualdl.proto.record_pb2 import Record
+from visualdl.server.data_manager import _ScalarSeries
+from visualdl.server.data_manager import bucket_from_state
+from visualdl.server.data_manager import DataManager
+
+
+class ScalarSeriesTest(unittest.TestCase):
+    def add_values(self, series, values):
+        for step, value in enumerate(values):
+            series.add(step, step * 10, value)
+
+    def test_full_resolution_until_full(self):
+        series = _ScalarSeries(16)
+        self.add_values(series, range(16))
+        steps, timestamps, values = series.get()
+        self.assertEqual(steps.tolist(), list(range(16)))
+        self.assertEqual(timestamps.tolist(), list(range(0, 160, 10)))
+        self.assertEqual(series.level, 0)
+
+    def test_bounded_and_uniform(self):
+        series = _ScalarSeries(64)
+        rng = np.random.RandomState(0)
+        values = rng.uniform(size=10000).astype(np.float32)
+        values[1234] = -5
+        values[8765] = 5
+        self.add_values(series, values)
+        steps, _, kept = series.get()
+        self.assertLessEqual(len(steps), 64 + 3 * series.level)
+        self.assertEqual(len(steps), len(series))
+        self.assertTrue(np.all(np.diff(steps) > 0))
+        # Peaks are never dropped.
+        self.assertIn(1234, steps.tolist())
+        self.assertIn(8765, steps.tolist())
+        np.testing.assert_array_equal(kept, values[steps])
+        # Every 2 compacted points come from a block of the same size, newer
+        # points of lower levels are pending.
+        block = 2**(series.level + 1)
+        compacted = steps[:series._size]
+        np.testing.assert_array_equal(compacted[0::2] // block,
+                                      compacted[1::2] // block)
+        np.testing.assert_array_equal(compacted[0::2] // block,
+                                      np.arange(len(compacted) // 2))
+
+    def test_get_step_range(self):
+        series = _ScalarSeries(16)
+        self.add_values(series, range(100))
+        steps, _, values = series.get(20, 60)
+        self.assertTrue(len(steps))
+        self.assertTrue(np.all((steps >= 20) & (steps <= 60)))
+        self.assertEqual(values.tolist(), steps.tolist())
+
+
+class DataManagerTest(unittest.TestCase):
+    def add_scalars(self, data_manager, tag, num_steps):
+        for step in range(num_steps):
+            data_manager.add_item(
+                'scalar', 'run', tag,
+                Record.Value(id=step, tag=tag, timestamp=step,
+                             value=step * 0.5))
+
+    def test_series_disabled_by_default(self):
+        data_manager = DataManager()
+        self.add_scalars(data_manager, 'loss', 2000)
+        reservoir = data_manager.get_reservoir('scalar')
+        steps, _, _ = reservoir.get_scalar_arrays('run', 'loss')
+        series_steps, _, values = reservoir.get_scalar_series(
+            'run', 'loss', 100, 1500)
+        self.assertEqual(series_steps.tolist(),
+                         [step for step in steps if 100 <= step <= 1500])
+        self.assertEqual(values.tolist(),
+                         [step * 0.5 for step in series_steps])
+
+    def test_set_scalar_series_size(self):
+        data_manager = DataManager()
+        data_manager.set_scalar_series_size(4000)
+        self.add_scalars(data_manager, 'loss', 2000)
+        steps, _, _ = data_manager.get_reservoir('scalar').get_scalar_series(
+            'run', 'loss', 100, 1500)
+        self.assertEqual(steps.tolist(), list(range(100, 1501)))
+
+    def test_state_round_trip(self):
+        data_manager = DataManager()
+        data_manager.set_scalar_series_size(64)
+        self.add_scalars(data_manager, 'loss', 2000)
+        for step in range(20):
+            data_manager.add_item(
+                'text', 'run', 'text',
+                Record.Value(
+                    id=step,
+                    tag='text',
+                    timestamp=step,
+                    text=Record.Text(encoded_text_string='t{}'.format(step))))
+        state, buckets = data_manager.get_state()
+        # State is plain data, and can be saved as json and numpy arrays.
+        json.dumps(state)
+        for _, (meta, arrays) in buckets.values():
+            json.dumps(meta)
+            self.assertTrue(
+                all(
+                    isinstance(value, np.ndarray)
+                    for value in arrays.values()))
+        restored = DataManager()
+        restored.set_state(
+            json.loads(json.dumps(state)), {
+                key: bucket_from_state(*bucket_state)
+                for key, (_, bucket_state) in buckets.items()
+            })
+
+        reservoir = data_manager.get_reservoir('scalar')
+        restored_reservoir = restored.get_reservoir('scalar')
+        for expected, actual in zip(
+                reservoir.get_scalar_arrays('run', 'loss'),
+                restored_reservoir.get_scalar_arrays('run', 'loss')):
+            np.testing.assert_array_equal(expected, actual)
+        for expected, actual in zip(
+                reservoir.get_scalar_series('run', 'loss'),
+                restored_reservoir.get_scalar_series('run', 'loss')):
+            np.testing.assert_array_equal(expected, actual)
+        self.assertEqual(
+            data_manager.get_reservoir('text').get_items('run', 'text'),
+            restored.get_reservoir('text').get_items('run', 'text'))
+
+        # Both sample the same items after restored.
+        self.add_scalars(data_manager, 'loss', 3000)
+        self.add_scalars(restored, 'loss', 3000)
+        np.testing.assert_array_equal(
+            reservoir.get_scalar_arrays('run', 'loss')[0],
+            restored_reservoir.get_scalar_arrays('run', 'loss')[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
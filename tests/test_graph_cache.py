@@ -0,0 +1,136 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import gc
+import os
+import shutil
+import tempfile
+import struct
+import threading
+import unittest
+from unittest import mock
+
+from visualdl.component.graph import analyse_model
+from visualdl.proto import framework_pb2
+from visualdl.reader import graph_cache
+from visualdl.reader.graph_cache import analyse_model_cached
+from visualdl.reader.graph_cache import evict_graph_cache
+from visualdl.reader.graph_cache import get_graph_cache_path
+from visualdl.reader.graph_reader import _defer_gc
+
+
+def make_model():
+    program = framework_pb2.ProgramDesc()
+    block = program.blocks.add(idx=0, parent_idx=-1)
+    for name in ('x', 'y'):
+        var = block.vars.add(name=name)
+        var.type.type = framework_pb2.VarType.LOD_TENSOR
+        var.type.lod_tensor.tensor.data_type = framework_pb2.VarType.FP32
+        var.type.lod_tensor.tensor.dims.extend([-1, 3])
+    op = block.ops.add(type='scale')
+    op.inputs.add(parameter='X', arguments=['x'])
+    op.outputs.add(parameter='Out', arguments=['y'])
+    op.attrs.add(name='scale', type=framework_pb2.FLOAT, f=0.5)
+    return program.SerializeToString()
+
+
+class GraphCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def add_file(self, name, mtime):
+        path = os.path.join(self.cache_dir, 'vdlgraph.{}.json'.format(name))
+        with open(path, 'wb') as fp:
+            fp.write(b'0' * 100)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_evict_least_recently_used(self):
+        self.add_file('a', 100)
+        newest = self.add_file('b', 300)
+        self.add_file('c', 200)
+        other = os.path.join(self.cache_dir, 'other')
+        with open(other, 'wb') as fp:
+            fp.write(b'0' * 1000)
+        # The just saved file is kept even if it is the oldest.
+        kept = self.add_file('d', 50)
+        evict_graph_cache(self.cache_dir, 250, keep=kept)
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir)),
+            ['other', 'vdlgraph.b.json', 'vdlgraph.d.json'])
+        self.assertTrue(os.path.exists(newest))
+
+    def test_analyse_model_cached(self):
+        content = make_model()
+        path = get_graph_cache_path(self.cache_dir, content)
+        with mock.patch.object(graph_cache, 'analyse_model',
+                               wraps=analyse_model) as analyse:
+            # Cache file is written on miss.
+            graph_data = analyse_model_cached(content, self.cache_dir)
+            self.assertEqual(analyse.call_count, 1)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(graph_data, analyse_model(content))
+            # Loaded from cache on hit.
+            self.assertEqual(
+                analyse_model_cached(content, self.cache_dir), graph_data)
+            self.assertEqual(analyse.call_count, 1)
+
+    def test_ignore_cache_of_other_version(self):
+        content = make_model()
+        path = get_graph_cache_path(self.cache_dir, content)
+        analyse_model_cached(content, self.cache_dir)
+        with open(path, 'rb') as fp:
+            data = fp.read()[struct.calcsize('<8sI'):]
+        for magic, version in (
+            (b'VDLOTHER', graph_cache.GRAPH_CACHE_VERSION),
+            (graph_cache.GRAPH_CACHE_MAGIC,
+             graph_cache.GRAPH_CACHE_VERSION - 1)):
+            with open(path, 'wb') as fp:
+                fp.write(struct.pack('<8sI', magic, version) + data)
+            with mock.patch.object(graph_cache, 'analyse_model',
+                                   wraps=analyse_model) as analyse:
+                self.assertEqual(
+                    analyse_model_cached(content, self.cache_dir),
+                    analyse_model(content))
+                self.assertEqual(analyse.call_count, 1)
+
+    def test_defer_gc_restores_threshold(self):
+        threshold = gc.get_threshold()
+        entered = threading.Event()
+        release = threading.Event()
+
+        def build():
+            with _defer_gc():
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=build)
+        thread.start()
+        entered.wait()
+        self.assertTrue(gc.isenabled())
+        with _defer_gc():
+            self.assertGreater(gc.get_threshold()[0], threshold[0])
+        # Still deferred until the other build ends.
+        self.assertGreater(gc.get_threshold()[0], threshold[0])
+        release.set()
+        thread.join()
+        self.assertEqual(gc.get_threshold(), threshold)
+        gc.unfreeze()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from visualdl import LogWriter
+from visualdl.reader.reader import LogReader
+from visualdl.server import lib
+from visualdl.server.data_manager import DataManager
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class LibTestCase(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(logdir=self.run, file_name='vdlrecords.1.log')
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            self.reader = LogReader(logdir=self.logdir)
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def add_scalars(self, tag, steps):
+        for step in steps:
+            self.writer.add_scalar(tag=tag, value=step * 0.5, step=step)
+        self.writer.flush()
+
+
+class ScalarBatchTest(LibTestCase):
+    def test_missing_series_skipped(self):
+        self.add_scalars('loss', range(5))
+        self.add_scalars('acc', range(3))
+        missing_run = os.path.join(self.logdir, 'missing')
+        batch = list(
+            lib.get_scalar_batch(self.reader, [self.run, missing_run],
+                                 ['loss', 'missing', 'acc']))
+        self.assertEqual([(item['run'], item['tag']) for item in batch],
+                         [(self.run, 'loss'), (self.run, 'acc')])
+        for item in batch:
+            self.assertEqual(
+                item['data'], lib.get_scalar(self.reader, self.run,
+                                             item['tag']))
+
+    def test_downsampled_same_as_scalar(self):
+        self.add_scalars('loss', range(100))
+        batch = list(
+            lib.get_scalar_batch(self.reader, [self.run], ['loss'],
+                                 mode='lttb', width='10'))
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(
+            batch[0]['data'],
+            lib.get_scalar(self.reader, self.run, 'loss', mode='lttb',
+                           width='10'))
+
+
+class ScalarExportTest(LibTestCase):
+    def setUp(self):
+        super(ScalarExportTest, self).setUp()
+        self.add_scalars('loss', range(25))
+        for step in range(7):
+            self.writer.add_scalars(
+                main_tag='group',
+                tag_scalar_dict={'a': step, 'b': step * 2},
+                step=step)
+        self.add_scalars('acc', range(4))
+        self.scalars_run = os.path.join(self.run, 'group_a')
+
+    def export(self, run, tag, type):
+        # Small chunks to test data across chunks.
+        with mock.patch.object(lib, 'EXPORT_CHUNK_ROWS', 4):
+            return list(lib.get_scalar_data(self.reader, run, tag, type))
+
+    def test_csv_same_as_before(self):
+        for run, tag, component, header in (
+            (self.run, 'loss', 'scalar', ['id', 'tag', 'timestamp', 'value']),
+            (self.scalars_run, 'group', 'scalars',
+             ['id', 'tag', 'sub_tag', 'timestamp', 'value'])):
+            for type, delimiter in (('csv', ','), ('tsv', '\t')):
+                with self.subTest(tag=tag, type=type):
+                    chunks = self.export(run, tag, type)
+                    self.assertGreater(len(chunks), 1)
+                    # Same as exported by `StringIO` at once before.
+                    log_run = os.path.dirname(
+                        run) if component == 'scalars' else run
+                    with io.StringIO() as fp:
+                        csv_writer = csv.writer(fp, delimiter=delimiter)
+                        csv_writer.writerow(header)
+                        csv_writer.writerows(
+                            self.reader.get_log_data(component, log_run, tag))
+                        self.assertEqual(''.join(chunks), fp.getvalue())
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        data = b''.join(self.export(self.run, 'loss', 'parquet'))
+        self.assertEqual(data[:4], b'PAR1')
+        parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(data))
+        # Every chunk of rows is a row group.
+        self.assertEqual(parquet_file.num_row_groups, 7)
+        table = parquet_file.read()
+        self.assertEqual(table.column_names,
+                         ['id', 'tag', 'timestamp', 'value'])
+        rows = self.reader.get_log_data('scalar', self.run, 'loss')
+        self.assertEqual(table.column('id').to_pylist(),
+                         [row[0] for row in rows])
+        self.assertEqual(table.column('tag').to_pylist(), ['loss'] * 25)
+        self.assertEqual(table.column('timestamp').to_pylist(),
+                         [row[2] for row in rows])
+        self.assertEqual(table.column('value').to_pylist(),
+                         [step * 0.5 for step in range(25)])
+
+
+if __name__ == '__main__':
+    unittest.main()
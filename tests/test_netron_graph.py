@@ -0,0 +1,179 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import unittest
+
+from visualdl.component.graph.netron_graph import Model
+
+
+def make_node(name, op_type, children=(), input_vars=None, output_vars=None):
+    return {
+        'name': name,
+        'show_name': name.rsplit('/', 1)[-1] or '/',
+        'type': op_type,
+        'attrs': {},
+        'attr_types': {},
+        'input_vars': input_vars or {},
+        'output_vars': output_vars or {},
+        'children_node': list(children),
+        'parent_node': '' if name == '/' else name.rsplit('/', 1)[0] or '/',
+        'is_leaf_node': not children
+    }
+
+
+def make_var(name, from_node, to_nodes):
+    return {
+        'name': name,
+        'shape': [-1, 8],
+        'type': 'VarType.LOD_TENSOR',
+        'dtype': 'VarType.FP32',
+        'persistable': False,
+        'attrs': {},
+        'value': [],
+        'from_node': from_node,
+        'to_nodes': to_nodes
+    }
+
+
+def make_graph_data():
+    '''
+    Graph of nodes:
+        /encoder
+            /encoder/conv2d_0
+            /encoder/layer
+                /encoder/layer/matmul_0
+                /encoder/layer/conv2d_transpose_0
+        /decoder
+            /decoder/scale_0
+        /relu_0
+    '''
+    nodes = [
+        make_node('/', '', ['/encoder', '/decoder', '/relu_0']),
+        make_node('/encoder', 'Encoder', ['/encoder/conv2d_0',
+                                          '/encoder/layer']),
+        make_node('/encoder/conv2d_0', 'conv2d', (), {'Input': ['x']},
+                  {'Output': ['conv_out']}),
+        make_node('/encoder/layer', 'Layer', [
+            '/encoder/layer/matmul_0', '/encoder/layer/conv2d_transpose_0'
+        ]),
+        make_node('/encoder/layer/matmul_0', 'matmul', (),
+                  {'X': ['conv_out']}, {'Out': ['h']}),
+        make_node('/encoder/layer/conv2d_transpose_0', 'conv2d_transpose',
+                  (), {'Input': ['conv_out']}, {'Output': ['t']}),
+        make_node('/decoder', 'Decoder', ['/decoder/scale_0']),
+        make_node('/decoder/scale_0', 'scale', (), {'X': ['h']},
+                  {'Out': ['out']}),
+        make_node('/relu_0', 'relu', (), {'X': ['out']}, {'Out': ['y']})
+    ]
+    all_vars = [
+        make_var('x', '', ['/encoder/conv2d_0']),
+        make_var('conv_out', '/encoder/conv2d_0', [
+            '/encoder/layer/matmul_0', '/encoder/layer/conv2d_transpose_0'
+        ]),
+        make_var('h', '/encoder/layer/matmul_0', ['/decoder/scale_0']),
+        make_var('t', '/encoder/layer/conv2d_transpose_0', []),
+        make_var('out', '/decoder/scale_0', ['/relu_0']),
+        make_var('y', '/relu_0', [])
+    ]
+    return {'version': '1', 'nodes': nodes, 'vars': all_vars, 'edges': []}
+
+
+def get_node_names(graph):
+    return sorted(node['name'] for node in graph['nodes'])
+
+
+class GraphDiffTest(unittest.TestCase):
+    def setUp(self):
+        self.model = Model(make_graph_data())
+        graph = self.model.make_graph()
+        self.version = graph['version']
+        self.nodes = {node['name']: node for node in graph['nodes']}
+
+    def apply_diff(self):
+        diff = self.model.make_graph_diff(self.version)
+        self.assertFalse(diff['reset'])
+        self.assertGreater(diff['version'], self.version)
+        for name in diff['removed']:
+            del self.nodes[name]
+        for node in diff['added']['nodes']:
+            self.assertNotIn(node['name'], self.nodes)
+            self.nodes[node['name']] = node
+        self.version = diff['version']
+        # Graph made by a fork keeps diffs of this model.
+        self.assertEqual(
+            sorted(self.nodes.items()),
+            sorted((node['name'], node)
+                   for node in self.model.fork().make_graph()['nodes']))
+
+    def test_diffs_equal_graph(self):
+        self.assertEqual(sorted(self.nodes),
+                         ['/decoder', '/encoder', '/relu_0'])
+        self.model.adjust_visible('/encoder')
+        self.apply_diff()
+        self.assertEqual(
+            sorted(self.nodes),
+            ['/decoder', '/encoder/conv2d_0', '/encoder/layer', '/relu_0'])
+
+        self.model.adjust_visible('/encoder/layer')
+        self.model.adjust_visible('/decoder')
+        self.apply_diff()
+        self.assertIn('/encoder/layer/matmul_0', self.nodes)
+        self.assertIn('/decoder/scale_0', self.nodes)
+
+        # Expanded and collapsed again before the diff.
+        self.model.adjust_visible('/decoder', expand=False)
+        self.model.adjust_visible('/decoder')
+        self.model.adjust_visible('/encoder', expand=False)
+        self.apply_diff()
+        self.assertEqual(sorted(self.nodes),
+                         ['/decoder/scale_0', '/encoder', '/relu_0'])
+
+        self.model.adjust_search_node_visible(
+            '/encoder/layer/conv2d_transpose_0')
+        self.apply_diff()
+        self.assertIn('/encoder/layer/conv2d_transpose_0', self.nodes)
+        self.assertNotIn('/encoder', self.nodes)
+
+        self.model.adjust_visible('/decoder/scale_0', expand=False)
+        self.model.adjust_visible('/decoder', expand=False)
+        self.model.adjust_search_node_visible('h', is_node=False)
+        self.apply_diff()
+
+        # Nothing changed.
+        diff = self.model.make_graph_diff(self.version)
+        self.assertEqual(diff['version'], self.version)
+        self.assertEqual(diff['added']['nodes'], [])
+        self.assertEqual(diff['removed'], [])
+
+    def test_reset_if_version_is_stale(self):
+        stale_version = self.version
+        self.model.adjust_visible('/encoder')
+        self.apply_diff()
+        self.model.adjust_visible('/encoder/layer')
+        for since_version in (stale_version, self.version + 100):
+            diff = self.model.make_graph_diff(since_version)
+            self.assertTrue(diff['reset'])
+            self.assertEqual(diff['removed'], [])
+            self.assertEqual(diff['added'], self.model.fork().make_graph())
+            self.assertIn('/encoder/layer/matmul_0',
+                          get_node_names(diff['added']))
+        # Graph of reset is the base of next diff.
+        self.version = diff['version']
+        self.nodes = {node['name']: node for node in diff['added']['nodes']}
+        self.model.adjust_visible('/encoder/layer', expand=False)
+        self.apply_diff()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import unittest
+
+from visualdl.component.graph import analyse_model
+from visualdl.component.graph.program_desc import get_op_attrs
+from visualdl.component.graph.program_desc import get_var_info
+from visualdl.component.graph.program_desc import iter_blocks
+from visualdl.component.graph.program_desc import iter_ops
+from visualdl.component.graph.program_desc import iter_vars
+from visualdl.proto import framework_pb2
+
+_VarType = framework_pb2.VarType
+
+
+def add_var(block, name, shape=(-1, 3), persistable=False):
+    var = block.vars.add(name=name, persistable=persistable)
+    var.type.type = _VarType.LOD_TENSOR
+    var.type.lod_tensor.tensor.data_type = _VarType.FP32
+    var.type.lod_tensor.tensor.dims.extend(shape)
+    return var
+
+
+def add_op(block, op_type, inputs, outputs):
+    op = block.ops.add(type=op_type)
+    for parameter, arguments in inputs.items():
+        op.inputs.add(parameter=parameter, arguments=arguments)
+    for parameter, arguments in outputs.items():
+        op.outputs.add(parameter=parameter, arguments=arguments)
+    return op
+
+
+def get_nodes(graph):
+    return {node['name']: node for node in graph['nodes']}
+
+
+def get_vars(graph):
+    return {var['name']: var for var in graph['vars']}
+
+
+def get_edges(graph):
+    return {
+        (edge['from_node'], edge['to_node']): edge
+        for edge in graph['edges']
+    }
+
+
+class ProgramDescTest(unittest.TestCase):
+    def test_block0_program(self):
+        program = framework_pb2.ProgramDesc()
+        block = program.blocks.add(idx=0, parent_idx=-1)
+        add_var(block, 'x')
+        add_var(block, 'w', shape=(3, 3), persistable=True)
+        add_var(block, 'y')
+        add_var(block, 'z')
+        add_op(block, 'matmul', {'X': ['x'], 'Y': ['w']}, {'Out': ['y']})
+        add_op(block, 'relu', {'X': ['y']}, {'Out': ['z']})
+
+        graph = analyse_model(program.SerializeToString())
+        nodes = get_nodes(graph)
+        self.assertEqual(set(nodes), {'/', '/matmul_0', '/relu_0'})
+        self.assertEqual(nodes['/matmul_0']['type'], 'matmul')
+        self.assertEqual(nodes['/matmul_0']['input_vars'], {
+            'X': ['x'],
+            'Y': ['w']
+        })
+        self.assertEqual(nodes['/matmul_0']['output_nodes'], ['/relu_0'])
+        self.assertEqual(nodes['/relu_0']['input_nodes'], ['/matmul_0'])
+        self.assertEqual(nodes['/relu_0']['parent_node'], '/')
+        self.assertEqual(sorted(nodes['/']['children_node']),
+                         ['/matmul_0', '/relu_0'])
+
+        all_vars = get_vars(graph)
+        self.assertEqual(
+            all_vars['w'], {
+                'name': 'w',
+                'shape': [3, 3],
+                'type': 'VarType.LOD_TENSOR',
+                'dtype': 'VarType.FP32',
+                'persistable': True,
+                'attrs': {},
+                'value': [],
+                'from_node': '',
+                'to_nodes': ['/matmul_0']
+            })
+        self.assertEqual(all_vars['y']['from_node'], '/matmul_0')
+        self.assertEqual(all_vars['y']['to_nodes'], ['/relu_0'])
+
+        edges = get_edges(graph)
+        self.assertEqual(list(edges), [('/matmul_0', '/relu_0')])
+        self.assertEqual(edges[('/matmul_0', '/relu_0')]['vars'], ['y'])
+        self.assertEqual(edges[('/matmul_0', '/relu_0')]['label'], '[-1, 3]')
+
+    def test_while_sub_block(self):
+        program = framework_pb2.ProgramDesc()
+        block = program.blocks.add(idx=0, parent_idx=-1)
+        add_var(block, 'i', shape=(1, ))
+        add_var(block, 'out', shape=(1, ))
+        add_op(block, 'fill_constant', {}, {'Out': ['i']})
+        while_op = add_op(block, 'while', {'X': ['i']}, {'Out': ['i']})
+        while_op.attrs.add(name='sub_block',
+                           type=framework_pb2.BLOCK,
+                           block_idx=1)
+        add_op(block, 'scale', {'X': ['i']}, {'Out': ['out']})
+        sub_block = program.blocks.add(idx=1, parent_idx=0)
+        add_op(sub_block, 'increment', {'X': ['i']}, {'Out': ['i']})
+
+        graph = analyse_model(program.SerializeToString())
+        nodes = get_nodes(graph)
+        self.assertEqual(
+            set(nodes), {
+                '/', '/fill_constant_0', '/while_0', '/while_0.block1',
+                '/while_0.block1/increment_0', '/scale_0'
+            })
+        self.assertEqual(nodes['/while_0.block1/increment_0']['parent_node'],
+                         '/while_0.block1')
+        self.assertEqual(nodes['/while_0.block1']['parent_node'], '/')
+        self.assertFalse(nodes['/while_0.block1']['is_leaf_node'])
+        self.assertEqual(nodes['/while_0']['attrs']['sub_block'], 1)
+        self.assertEqual(nodes['/while_0']['attr_types']['sub_block'], 'BLOCK')
+
+        # Var written by both the owner op and op in sub block keeps the
+        # owner op as its producer.
+        i = get_vars(graph)['i']
+        self.assertEqual(i['from_node'], '/while_0')
+        self.assertEqual(
+            sorted(i['to_nodes']),
+            ['/scale_0', '/while_0', '/while_0.block1/increment_0'])
+        edges = get_edges(graph)
+        self.assertIn(('/while_0', '/scale_0'), edges)
+        self.assertIn(('/while_0', '/while_0.block1'), edges)
+        self.assertIn(('/while_0.block1', '/while_0.block1/increment_0'),
+                      edges)
+        self.assertNotIn(('/fill_constant_0', '/while_0'), edges)
+
+    def test_negative_parent_idx(self):
+        program = framework_pb2.ProgramDesc()
+        program.blocks.add(idx=0, parent_idx=-1)
+        block = program.blocks.add(idx=2, parent_idx=0)
+        add_op(block, 'relu', {'X': ['x']}, {'Out': ['y']})
+        blocks = list(iter_blocks(program.SerializeToString()))
+        self.assertEqual([(idx, parent_idx) for idx, parent_idx, _ in blocks],
+                         [(0, -1), (2, 0)])
+        self.assertEqual([op.type for op in iter_ops(blocks[1][2])], ['relu'])
+
+        # Block not owned by any op is placed in its parent block.
+        nodes = get_nodes(analyse_model(program.SerializeToString()))
+        self.assertIn('/block2/relu_0', nodes)
+        self.assertEqual(nodes['/block2']['parent_node'], '/')
+
+    def test_unknown_or_missing_types(self):
+        op = framework_pb2.OpDesc(type='custom')
+        op.attrs.add(name='axis', type=framework_pb2.INT, i=1)
+        op.attrs.add(name='no_type', i=2)
+        # Attr of type unknown to framework.proto, as saved by newer paddle.
+        unknown_attr = framework_pb2.OpDesc.Attr(
+            name='unknown').SerializeToString() + b'\x10\x63'
+        op.attrs.add().MergeFromString(unknown_attr)
+        op = framework_pb2.OpDesc.FromString(op.SerializeToString())
+        attrs, attr_types = get_op_attrs(op)
+        self.assertEqual(attrs, {'axis': 1})
+        self.assertEqual(attr_types, {'axis': 'INT'})
+
+        block = framework_pb2.BlockDesc(idx=0, parent_idx=-1)
+        block.vars.add(name='no_type')
+        feed = block.vars.add(name='feed')
+        feed.type.type = _VarType.FEED_MINIBATCH
+        unknown = framework_pb2.VarDesc(name='unknown').SerializeToString()
+        # VarType with type 99.
+        block.vars.add().MergeFromString(unknown + b'\x12\x02\x08\x63')
+        infos = {
+            var.name: get_var_info(var)
+            for var in iter_vars(block.SerializeToString())
+        }
+        self.assertEqual([(info['type'], info['shape'], info['dtype'])
+                          for info in infos.values()],
+                         [('', '', ''), ('VarType.FEED_MINIBATCH', '', ''),
+                          ('', '', '')])
+
+        # Var referred by op but not declared is added without type.
+        program = framework_pb2.ProgramDesc()
+        program.blocks.add().CopyFrom(block)
+        add_op(program.blocks[0], 'custom', {'X': ['missing']},
+               {'Out': ['feed']})
+        all_vars = get_vars(analyse_model(program.SerializeToString()))
+        self.assertEqual(all_vars['missing']['type'], '')
+        self.assertEqual(all_vars['missing']['to_nodes'], ['/custom_0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
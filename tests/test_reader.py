@@ -0,0 +1,134 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from visualdl import LogWriter
+from visualdl.reader import snapshot
+from visualdl.reader.reader import load_log_file
+from visualdl.reader.reader import LogReader
+from visualdl.server.data_manager import DataManager
+
+
+def load_log_file_or_fail(filepath, offset=0):
+    # Run in worker processes, fails if run is marked by a file.
+    if os.path.exists(os.path.dirname(filepath) + '.fail'):
+        raise IOError('unstable filesystem')
+    return load_log_file(filepath, offset)
+
+
+class LogReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.run = os.path.join(self.logdir, 'run')
+        self.writer = LogWriter(
+            logdir=self.run, file_name='vdlrecords.1.log')
+        self.add_scalars('loss', range(10))
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def add_scalars(self, tag, steps):
+        for step in steps:
+            self.writer.add_scalar(tag=tag, value=step * 0.5, step=step)
+        self.writer.flush()
+
+    def create_reader(self, **kwargs):
+        with mock.patch('visualdl.reader.reader.default_data_manager',
+                        DataManager()):
+            return LogReader(logdir=self.logdir, **kwargs)
+
+    def get_steps(self, reader, tag):
+        reservoir = reader.data_manager.get_reservoir('scalar')
+        if not reservoir.exist_in_keys(self.run, tag):
+            return []
+        return reservoir.get_scalar_arrays(self.run, tag)[0].tolist()
+
+    def test_read_again_after_failure(self):
+        reader = self.create_reader()
+        self.assertEqual(self.get_steps(reader, 'loss'), list(range(10)))
+        self.add_scalars('acc', range(5))
+        with mock.patch(
+                'visualdl.reader.record_reader.RecordReader.get_remain',
+                side_effect=IOError('unstable filesystem')):
+            with self.assertRaises(IOError):
+                reader.add_remain()
+        # File is not changed since it failed to be read, but read again.
+        reader.add_remain()
+        self.assertEqual(self.get_steps(reader, 'acc'), list(range(5)))
+        self.assertEqual(self.get_steps(reader, 'loss'), list(range(10)))
+        reader.close()
+
+    def test_read_again_after_worker_failure(self):
+        other_run = os.path.join(self.logdir, 'other')
+        with LogWriter(logdir=other_run) as writer:
+            writer.add_scalar(tag='loss', value=1.0, step=1)
+        with open(other_run + '.fail', 'w'):
+            pass
+        with mock.patch('visualdl.reader.reader.load_log_file',
+                        load_log_file_or_fail):
+            reader = self.create_reader(ingest_workers=2)
+            self.assertEqual(self.get_steps(reader, 'loss'), list(range(10)))
+            reservoir = reader.data_manager.get_reservoir('scalar')
+            self.assertFalse(reservoir.exist_in_keys(other_run, 'loss'))
+            os.remove(other_run + '.fail')
+            # Log files of both runs are read in workers again.
+            self.add_scalars('acc', range(5))
+            reader.add_remain()
+            self.assertEqual(
+                reservoir.get_scalar_arrays(other_run, 'loss')[0].tolist(),
+                [1])
+            self.assertEqual(self.get_steps(reader, 'acc'), list(range(5)))
+            reader.close()
+
+    def test_follow_snapshot_loads_changed_buckets(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+        self.add_scalars('acc', range(5))
+        reader = self.create_reader(
+            snapshot_dir=snapshot_dir, snapshot_interval=0)
+        follower = self.create_reader(
+            snapshot_dir=snapshot_dir, snapshot_only=True)
+        self.assertEqual(self.get_steps(follower, 'acc'), list(range(5)))
+        self.assertEqual(self.get_steps(follower, 'loss'), list(range(10)))
+
+        self.add_scalars('acc', range(5, 8))
+        reader.load_new_data()
+        with mock.patch.object(
+                snapshot, 'load_snapshot',
+                wraps=snapshot.load_snapshot) as load_snapshot, \
+                mock.patch.object(
+                    snapshot, 'load_bucket',
+                    wraps=snapshot.load_bucket) as load_bucket:
+            follower.load_new_data()
+            # Snapshot file and bucket of `acc` are loaded.
+            self.assertEqual(load_snapshot.call_count, 1)
+            self.assertEqual(load_bucket.call_count, 1)
+        self.assertEqual(self.get_steps(follower, 'acc'), list(range(8)))
+        self.assertEqual(self.get_steps(follower, 'loss'), list(range(10)))
+        reader.close()
+
+        restored = self.create_reader(snapshot_dir=snapshot_dir)
+        self.assertEqual(self.get_steps(restored, 'acc'), list(range(8)))
+        self.assertEqual(self.get_steps(restored, 'loss'), list(range(10)))
+        restored.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import os
+import shutil
+import tempfile
+import unittest
+
+from visualdl import LogWriter
+from visualdl.proto import record_pb2
+from visualdl.reader.record_reader import is_crc_record_file
+from visualdl.reader.record_reader import RecordReader
+from visualdl.reader.record_reader import scan_record_index
+from visualdl.utils.record_index import hash_tag
+
+
+def get_steps(binaries, tag):
+    steps = []
+    for binary in binaries:
+        record = record_pb2.Record()
+        record.ParseFromString(binary)
+        steps.extend(value.id for value in record.values if value.tag == tag)
+    return steps
+
+
+class RecordReaderTest(unittest.TestCase):
+    write_crc = False
+
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+        self.writer = LogWriter(
+            logdir=self.logdir,
+            file_name='vdlrecords.1.log',
+            write_crc=self.write_crc)
+        self.filepath = os.path.join(self.logdir, 'vdlrecords.1.log')
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.logdir)
+
+    def add_scalars(self, tag, steps):
+        for step in steps:
+            self.writer.add_scalar(tag=tag, value=step * 0.5, step=step)
+        self.writer.flush()
+
+    def get_steps(self, reader, tag, start_step=None, end_step=None):
+        return get_steps(reader.get_records(tag, start_step, end_step), tag)
+
+    def test_get_records_after_append(self):
+        self.add_scalars('loss', range(10))
+        reader = RecordReader(self.filepath)
+        self.assertEqual(self.get_steps(reader, 'loss'), list(range(10)))
+        self.add_scalars('loss', range(10, 20))
+        self.add_scalars('acc', range(5))
+        self.assertEqual(self.get_steps(reader, 'loss'), list(range(20)))
+        self.assertEqual(self.get_steps(reader, 'acc'), list(range(5)))
+        self.assertEqual(
+            self.get_steps(reader, 'loss', 8, 12), [8, 9, 10, 11, 12])
+
+    def test_detect_crc(self):
+        self.add_scalars('loss', range(3))
+        self.assertEqual(is_crc_record_file(self.filepath), self.write_crc)
+        reader = RecordReader(self.filepath)
+        self.assertEqual(get_steps(reader.get_all(), 'loss'), [0, 1, 2])
+
+
+class CrcRecordReaderTest(RecordReaderTest):
+    write_crc = True
+
+    def corrupt(self, offset):
+        with open(self.filepath, 'r+b') as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xff]))
+
+    def get_record_offset(self, tag, step):
+        entries = scan_record_index(self.filepath)
+        mask = entries['step'] == step
+        mask &= entries['tag'] == hash_tag(tag)
+        return int(entries[mask]['offset'][0])
+
+    def test_skip_record_with_corrupted_data(self):
+        self.add_scalars('loss', range(5))
+        offset = self.get_record_offset('loss', 2)
+        # Header of record is 8 bytes of length and 4 bytes of its crc.
+        self.corrupt(offset + 12)
+        reader = RecordReader(self.filepath)
+        # Only the corrupted record is skipped.
+        self.assertEqual(get_steps(reader.get_all(), 'loss'), [0, 1, 3, 4])
+
+    def test_stop_at_record_with_corrupted_header(self):
+        self.add_scalars('loss', range(5))
+        offset = self.get_record_offset('loss', 2)
+        self.corrupt(offset)
+        reader = RecordReader(self.filepath)
+        # Records after corrupted length can not be located.
+        self.assertEqual(get_steps(reader.get_all(), 'loss'), [0, 1])
+        self.assertEqual(reader.offset, offset)
+        # Reading again stays at the corrupted record.
+        self.assertEqual(reader.get_remain(), [])
+        self.assertEqual(reader.offset, offset)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import shutil
+import tempfile
+import threading
+import unittest
+
+from visualdl.proto import record_pb2
+from visualdl.reader.record_reader import RecordReader
+from visualdl.writer.record_writer import QUEUE_POLICIES
+from visualdl.writer.record_writer import RecordFileWriter
+
+
+class RecordFileWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.logdir)
+
+    def write_until_closed(self, writer, tag):
+        step = 0
+        while True:
+            record = record_pb2.Record()
+            value = record.values.add(tag=tag, id=step, timestamp=step)
+            value.value = step
+            try:
+                writer.add_record(record)
+            except IOError:
+                return
+            step += 1
+
+    def check_write_while_closing(self, policy, index):
+        writer = RecordFileWriter(
+            self.logdir,
+            max_queue_size=2,
+            filename='vdlrecords.{}.{}.log'.format(policy, index),
+            queue_policy=policy)
+        threads = [
+            threading.Thread(
+                target=self.write_until_closed,
+                args=(writer, 'tag{}'.format(i))) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        closer = threading.Thread(target=writer.close)
+        closer.start()
+        closer.join(10)
+        self.assertFalse(closer.is_alive(), 'close hangs')
+        for thread in threads:
+            thread.join(10)
+            self.assertFalse(thread.is_alive(), 'write hangs')
+
+        # Every record put into queue is either written or dropped.
+        stats = writer.get_stats()
+        self.assertEqual(stats['queue_records'], 0)
+        self.assertEqual(stats['enqueued_records'],
+                         stats['written_records'] + stats['dropped_records'])
+        self.assertEqual(stats['flushed_bytes'], stats['written_bytes'])
+        records = RecordReader(writer.get_filename()).get_all()
+        self.assertEqual(len(records), stats['written_records'])
+
+    def test_write_while_closing(self):
+        for policy in QUEUE_POLICIES:
+            with self.subTest(policy=policy):
+                for index in range(20):
+                    self.check_write_while_closing(policy, index)
+
+
+if __name__ == '__main__':
+    unittest.main()
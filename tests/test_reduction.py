@@ -0,0 +1,147 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import os
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from visualdl.server import lib
+from visualdl.server.reduction import pca
+from visualdl.server.reduction import reduce
+from visualdl.server.reduction import ReductionEngine
+
+
+class ReductionTest(unittest.TestCase):
+    def setUp(self):
+        self.x = np.random.RandomState(0).standard_normal((60, 10))
+
+    def test_output_shape_and_finite(self):
+        for reduction in ('pca', 'tsne', 'umap'):
+            for dimension in (2, 3):
+                with self.subTest(reduction=reduction, dimension=dimension):
+                    y = reduce(self.x, reduction, dimension)
+                    self.assertEqual(y.shape, (60, dimension))
+                    self.assertTrue(np.isfinite(y).all())
+
+    def test_few_points_or_features(self):
+        for reduction in ('pca', 'tsne', 'umap'):
+            with self.subTest(reduction=reduction):
+                y = reduce(self.x[:2], reduction, 2)
+                self.assertEqual(y.shape, (2, 2))
+                self.assertTrue(np.isfinite(y).all())
+                # Missing dimensions are filled by zeros.
+                y = reduce(self.x[:, :1], reduction, 3)
+                self.assertEqual(y.shape, (60, 3))
+                self.assertTrue(np.isfinite(y).all())
+
+    def test_pca_equals_svd(self):
+        for d in (10, 1100):
+            with self.subTest(d=d):
+                # Randomized SVD of large inputs is accurate if principal
+                # components are distinct from noise.
+                rng = np.random.RandomState(1)
+                x = (rng.standard_normal((50, 3)) * [10, 5, 2]) @ \
+                    rng.standard_normal((3, d))
+                x += rng.standard_normal((50, d)) * 0.01
+                centered = x - x.mean(axis=0)
+                u, s, _ = np.linalg.svd(centered, full_matrices=False)
+                # Signs of components are arbitrary.
+                np.testing.assert_allclose(
+                    np.abs(pca(x, 2)), np.abs(u[:, :2] * s[:2]), rtol=1e-4,
+                    atol=1e-6)
+
+    def test_invalid_arguments(self):
+        for reduction, dimension in (('lda', 2), ('pca', 0), ('pca', 4)):
+            with self.subTest(reduction=reduction, dimension=dimension):
+                with self.assertRaises(ValueError):
+                    reduce(self.x, reduction, dimension)
+                # Validated before loading data or starting a task.
+                log_reader = mock.Mock()
+                with self.assertRaises(ValueError):
+                    lib.get_embeddings(log_reader, 'run', 'tag', reduction,
+                                       dimension)
+                log_reader.load_new_data.assert_not_called()
+
+
+class ReductionEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ReductionEngine()
+        self.addCleanup(self.engine.close)
+        self.x = np.random.RandomState(0).standard_normal((1000, 10))
+
+    def test_partial_result_then_finished(self):
+        calls = []
+
+        def get_vectors():
+            calls.append(1)
+            return self.x
+
+        partial = False
+        deadline = time.time() + 120
+        while time.time() < deadline:
+            embedding, progress = self.engine.get(('run', 'tag'), 1,
+                                                  get_vectors, 'tsne', 2)
+            if progress >= 1:
+                break
+            if embedding is not None:
+                self.assertEqual(embedding.shape, (1000, 2))
+                self.assertGreater(progress, 0)
+                partial = True
+            time.sleep(0.05)
+        self.assertTrue(partial)
+        self.assertEqual(progress, 1.0)
+        self.assertEqual(embedding.shape, (1000, 2))
+        # Finished result is cached, and vectors are only got once.
+        cached, progress = self.engine.get(('run', 'tag'), 1, get_vectors,
+                                           'tsne', 2)
+        self.assertIs(cached, embedding)
+        self.assertEqual(progress, 1.0)
+        self.assertEqual(len(calls), 1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            self.engine.get(('run', 'tag'), 1, lambda: self.x, 'lda', 2)
+        with self.assertRaises(ValueError):
+            self.engine.get(('run', 'tag'), 1, lambda: self.x, 'pca', 0)
+        self.assertFalse(self.engine._tasks)
+
+    def test_newer_version_supersedes(self):
+        self.engine.get(('run', 'tag'), 1, lambda: self.x, 'tsne', 2)
+        self.engine.get(('run', 'tag'), 1, lambda: self.x, 'umap', 2)
+        _, input_path, partial_path = self.engine._tasks[(('run', 'tag'), 1,
+                                                          'tsne', 2)]
+        self.assertTrue(os.path.exists(input_path))
+        self.engine.get(('run', 'tag'), 2, lambda: self.x, 'tsne', 2)
+        self.engine.get(('run', 'other'), 1, lambda: self.x, 'tsne', 2)
+        self.assertEqual(
+            sorted(self.engine._tasks),
+            [(('run', 'other'), 1, 'tsne', 2), (('run', 'tag'), 2, 'tsne',
+                                                2)])
+        self.assertFalse(os.path.exists(input_path))
+        self.assertFalse(os.path.exists(partial_path))
+
+    def test_max_pending_tasks(self):
+        engine = ReductionEngine(max_pending=1)
+        self.addCleanup(engine.close)
+        engine.get(('run', 'a'), 1, lambda: self.x, 'tsne', 2)
+        with self.assertRaises(RuntimeError):
+            engine.get(('run', 'b'), 1, lambda: self.x, 'tsne', 2)
+        self.assertEqual(list(engine._tasks), [(('run', 'a'), 1, 'tsne', 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
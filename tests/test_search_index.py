@@ -0,0 +1,121 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import unittest
+
+from tests.test_netron_graph import make_graph_data
+from tests.test_netron_graph import make_node
+from tests.test_netron_graph import make_var
+from visualdl.component.graph.netron_graph import Model
+from visualdl.component.graph.search_index import SearchIndex
+
+
+def make_index(node_names_types, var_names):
+    all_nodes = {'/': make_node('/', '')}
+    for name, op_type in node_names_types:
+        all_nodes[name] = make_node(name, op_type)
+    all_vars = {name: make_var(name, '', []) for name in var_names}
+    return SearchIndex(all_nodes, all_vars)
+
+
+class SearchIndexTest(unittest.TestCase):
+    def test_rank_order(self):
+        index = make_index([('/block/my_conv_0', 'scale'),
+                            ('/block/relu_0', 'conv_relu'),
+                            ('/block/conv_12', 'conv'),
+                            ('/block/conv', 'conv2d'), ('/pool_0', 'pool2d')],
+                           ['conv_1', 'weights'])
+        self.assertEqual(
+            index.search('Conv '),
+            [
+                # Exact name.
+                ('node', '/block/conv'),
+                # Prefix, shorter first.
+                ('var', 'conv_1'),
+                ('node', '/block/conv_12'),
+                # In name.
+                ('node', '/block/my_conv_0'),
+                # In full name or op type.
+                ('node', '/block/relu_0')
+            ])
+        # Query shorter than n-gram is matched by scanning all texts.
+        self.assertEqual(sorted(index.search('co')),
+                         sorted(index.search('conv')))
+        self.assertEqual(index.search(''), [])
+        self.assertEqual(index.search('softmax'), [])
+
+    def test_fuzzy(self):
+        index = make_index([('/matmul_0', 'matmul'),
+                            ('/matmul_v2_0', 'matmul_v2'),
+                            ('/mul_0', 'mul')], [])
+        # Nothing contains the query, matches with less n-grams missing
+        # are better.
+        self.assertEqual(
+            index.search('matmull'),
+            [('node', '/matmul_0'), ('node', '/matmul_v2_0')])
+        # Fuzzy matches are only used if nothing contains the query.
+        self.assertEqual(index.search('matmul'), [('node', '/matmul_0'),
+                                                  ('node', '/matmul_v2_0')])
+        self.assertEqual(index.search('mul'), [('node', '/mul_0'),
+                                               ('node', '/matmul_0'),
+                                               ('node', '/matmul_v2_0')])
+
+
+class ModelFindTest(unittest.TestCase):
+    def setUp(self):
+        self.model = Model(make_graph_data())
+
+    def test_paging(self):
+        result = self.model.find('conv', limit=10)
+        self.assertEqual(result['total'], 3)
+        names = [match['name'] for match in result['matches']]
+        self.assertEqual(names, [
+            'conv_out', '/encoder/conv2d_0',
+            '/encoder/layer/conv2d_transpose_0'
+        ])
+        pages = []
+        for offset in range(0, 4, 2):
+            page = self.model.find('conv', offset=offset, limit=2)
+            self.assertEqual(page['total'], 3)
+            pages.extend(page['matches'])
+        self.assertEqual(pages, result['matches'])
+        self.assertEqual(self.model.find('conv', offset=3)['matches'], [])
+
+    def test_path(self):
+        match = self.model.find('conv2d_transpose')['matches'][0]
+        self.assertEqual(match['kind'], 'node')
+        self.assertEqual(match['type'], 'conv2d_transpose')
+        self.assertTrue(match['is_leaf'])
+        self.assertEqual(match['path'], ['/encoder', '/encoder/layer'])
+        self.assertEqual(
+            self.model.find('decoder')['matches'][0]['path'], [])
+
+        # Path of var leads to node producing it.
+        match = self.model.find('h')['matches'][0]
+        self.assertEqual(match['kind'], 'var')
+        self.assertEqual(match['from_node'], '/encoder/layer/matmul_0')
+        self.assertEqual(
+            match['path'],
+            ['/encoder', '/encoder/layer', '/encoder/layer/matmul_0'])
+        self.assertEqual(self.model.find('x')['matches'][0]['path'], [])
+
+        # Showing every node of path shows the match.
+        self.model.adjust_search_node_visible(match['from_node'])
+        self.assertIn('/encoder/layer/matmul_0',
+                      [node['name'] for node in self.model.make_graph()[
+                          'nodes']])
+
+
+if __name__ == '__main__':
+    unittest.main()
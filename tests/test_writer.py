@@ -0,0 +1,74 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from visualdl import LogWriter
+from visualdl.proto import record_pb2
+from visualdl.reader.record_reader import RecordReader
+
+
+class LogWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.logdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.logdir)
+
+    def get_steps(self, tag):
+        steps = []
+        filepath = os.path.join(self.logdir, 'vdlrecords.1.log')
+        for binary in RecordReader(filepath).get_all():
+            record = record_pb2.Record()
+            record.ParseFromString(binary)
+            steps.extend(
+                value.id for value in record.values if value.tag == tag)
+        return steps
+
+    def test_write_batch_after_batch_ms(self):
+        with LogWriter(
+                logdir=self.logdir,
+                file_name='vdlrecords.1.log',
+                batch_size=100,
+                batch_ms=50) as writer:
+            enqueued_records = writer.get_stats()['enqueued_records']
+            for step in range(3):
+                writer.add_scalar(tag='loss', value=step * 0.5, step=step)
+            # Pending values are written without adding more values.
+            deadline = time.time() + 10
+            while writer.get_stats()['enqueued_records'] == enqueued_records:
+                self.assertLess(time.time(), deadline)
+                time.sleep(0.01)
+            self.assertEqual(writer.get_stats()['enqueued_records'],
+                             enqueued_records + 1)
+            writer.flush()
+            self.assertEqual(self.get_steps('loss'), [0, 1, 2])
+
+    def test_write_batch_on_close(self):
+        with LogWriter(
+                logdir=self.logdir,
+                file_name='vdlrecords.1.log',
+                batch_size=100,
+                batch_ms=60000) as writer:
+            for step in range(3):
+                writer.add_scalar(tag='loss', value=step * 0.5, step=step)
+        self.assertEqual(self.get_steps('loss'), [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =======================================================================
+import csv
+import io
+
 import numpy as np
 from PIL import Image
 
@@ -235,6 +238,61 @@ def embedding(tag, labels, hot_vectors, step, labels_meta=None, walltime=None):
     ])
 
 
+def bytes_embedding(tag,
+                    labels,
+                    hot_vectors,
+                    step,
+                    labels_meta=None,
+                    walltime=None,
+                    dtype='float32'):
+    """Package data to one embedding with packed vectors and labels.
+
+    Vectors are stored as one raw buffer, so that reader can get the matrix
+    by `numpy.frombuffer` instead of parsing one message per row.
+
+    Args:
+        tag (string): Data identifier
+        labels (list): A list of labels, or a list of label columns.
+        hot_vectors (np.array or list): A matrix which each row is
+            feature of labels.
+        step (int): Step of embeddings.
+        labels_meta (list): Names of label columns.
+        walltime (int): Wall time of embeddings.
+        dtype (string): Type to store vectors, `float32` or `float16`.
+
+    Return:
+        Package with format of record_pb2.Record
+    """
+    if dtype not in ('float32', 'float16'):
+        raise ValueError(
+            'dtype of embeddings should be float32 or float16, got %s' % dtype)
+    vectors = np.ascontiguousarray(
+        hot_vectors, dtype=np.dtype(dtype).newbyteorder('<'))
+    if vectors.ndim != 2:
+        raise ValueError('Embeddings should be a 2D matrix.')
+
+    if isinstance(labels[0], (list, tuple, np.ndarray)):
+        rows = zip(*labels)
+    else:
+        rows = ([label] for label in labels)
+    with io.StringIO() as fp:
+        csv_writer = csv.writer(fp, delimiter='\t')
+        if labels_meta:
+            csv_writer.writerow(labels_meta)
+        csv_writer.writerows(rows)
+        encoded_labels = fp.getvalue().encode('utf-8')
+
+    embeddings = Record.bytes_embeddings(
+        encoded_labels=encoded_labels,
+        encoded_vectors=vectors.tobytes(),
+        dtype=dtype,
+        shape=vectors.shape)
+    return Record(values=[
+        Record.Value(
+            id=step, tag=tag, timestamp=walltime, bytes_embeddings=embeddings)
+    ])
+
+
 def audio(tag, audio_array, sample_rate, step, walltime):
     """Package data to one audio.
 
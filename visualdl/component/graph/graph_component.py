@@ -16,6 +16,13 @@ import collections
 import os.path
 import re
 
+from .program_desc import get_op_attrs
+from .program_desc import get_op_vars
+from .program_desc import get_var_info
+from .program_desc import iter_blocks
+from .program_desc import iter_ops
+from .program_desc import iter_vars
+
 _graph_version = '1.0.0'
 
 
@@ -33,8 +40,7 @@ def post_order_traverse(root, all_ops, post_order_results):
     return
 
 
-def create_non_leaf_nodes(parent_node_name, child_node_name, all_ops,
-                          general_children_dict):
+def create_non_leaf_nodes(parent_node_name, child_node_name, all_ops):
     '''
     Create a path from leaf to root, e.g. /a/b/c -> /a/b -> /a -> /. If node in path not exists, \
         create one and fill information.
@@ -42,39 +48,47 @@ def create_non_leaf_nodes(parent_node_name, child_node_name, all_ops,
         parent_node_name: name of parent node
         child_node_name: name of current node
         all_ops: used to store and index all nodes.
-        general_children_dict: used to store all descendants for each non-leaf node.
     '''
-    if parent_node_name == '/' or parent_node_name == '':  # root node
-        parent_node_name = '/'
-    if parent_node_name not in all_ops:
-        all_ops[parent_node_name] = {}
-        all_ops[parent_node_name]['children_node'] = set()
-        all_ops[parent_node_name]['name'] = parent_node_name
-        all_ops[parent_node_name]['show_name'] = os.path.dirname(
-            all_ops[child_node_name]['show_name'])
-        all_ops[parent_node_name]['attrs'] = {}
-        all_ops[parent_node_name]['input_nodes'] = set()
-        all_ops[parent_node_name]['output_nodes'] = set()
-        all_ops[parent_node_name]['type'] = os.path.basename(
-            all_ops[parent_node_name]['show_name'])
-        all_ops[parent_node_name]['input_vars'] = set()
-        all_ops[parent_node_name]['output_vars'] = set()
-        all_ops[parent_node_name]['parent_node'] = ''
-        all_ops[parent_node_name]['edge_input_nodes'] = []
-        all_ops[parent_node_name]['edge_output_nodes'] = []
-        all_ops[parent_node_name]['is_leaf_node'] = False
+    while True:
+        if parent_node_name == '/' or parent_node_name == '':  # root node
+            parent_node_name = '/'
+        parent_exists = parent_node_name in all_ops
+        if not parent_exists:
+            all_ops[parent_node_name] = {}
+            all_ops[parent_node_name]['children_node'] = set()
+            all_ops[parent_node_name]['name'] = parent_node_name
+            all_ops[parent_node_name]['show_name'] = os.path.dirname(
+                all_ops[child_node_name]['show_name'])
+            all_ops[parent_node_name]['attrs'] = {}
+            all_ops[parent_node_name]['input_nodes'] = set()
+            all_ops[parent_node_name]['output_nodes'] = set()
+            all_ops[parent_node_name]['type'] = os.path.basename(
+                all_ops[parent_node_name]['show_name'])
+            all_ops[parent_node_name]['input_vars'] = set()
+            all_ops[parent_node_name]['output_vars'] = set()
+            all_ops[parent_node_name]['parent_node'] = ''
+            all_ops[parent_node_name]['edge_input_nodes'] = []
+            all_ops[parent_node_name]['edge_output_nodes'] = []
+            all_ops[parent_node_name]['is_leaf_node'] = False
 
-    all_ops[child_node_name]['parent_node'] = parent_node_name
-    all_ops[parent_node_name]['children_node'].add(child_node_name)
-    general_children_dict[parent_node_name].add(child_node_name)
-    general_children_dict[parent_node_name].update(
-        general_children_dict[child_node_name])
-    if parent_node_name == '/':  # root node
-        return
-    else:
-        create_non_leaf_nodes(
-            os.path.dirname(parent_node_name), parent_node_name, all_ops,
-            general_children_dict)
+        all_ops[child_node_name]['parent_node'] = parent_node_name
+        all_ops[parent_node_name]['children_node'].add(child_node_name)
+        # Path to root is already created with parent.
+        if parent_exists or parent_node_name == '/':  # root node
+            return
+        child_node_name = parent_node_name
+        parent_node_name = os.path.dirname(parent_node_name)
+
+
+def is_descendant(node_name, ancestor_name):
+    '''
+    Judge if node is descendant of ancestor, since nodes are created by
+    `create_non_leaf_nodes` from their names as paths, it is judged by name
+    instead of storing descendants of every node.
+    '''
+    if not node_name or node_name == ancestor_name:
+        return False
+    return ancestor_name == '/' or node_name.startswith(ancestor_name + '/')
 
 
 def construct_edges(var_name, all_ops, all_vars, all_edges):
@@ -158,120 +172,103 @@ def construct_edges(var_name, all_ops, all_vars, all_edges):
             _construct_edge(from_node, to_node)
 
 
+def _get_var(all_vars, var_name):
+    '''
+    Get var by name, var referred by op but not declared in any block is
+    added as a var without type.
+    '''
+    if var_name not in all_vars:
+        all_vars[var_name] = {
+            'name': var_name,
+            'shape': '',
+            'type': '',
+            'dtype': '',
+            'value': [],
+            'persistable': False,
+            'attrs': {},
+            'from_node': '',
+            'to_nodes': []
+        }
+    return all_vars[var_name]
+
+
 def analyse_model(model_pb):  # noqa: C901
-    try:
-        from paddle.framework import core
-    except Exception:
-        print("Paddlepaddle is required to use add_graph interface.\n\
-              Please refer to \
-              https://www.paddlepaddle.org.cn/install/quick?docurl=/documentation/docs/zh/install/pip/linux-pip.html\
-              to install paddlepaddle.")
+    '''
+    Analyse content of `.pdmodel` file into graph data, parsed by protobuf
+    messages of framework.proto so that paddle is not required.
 
-    AttrType = core.AttrType
-    attr_type_name = {
-        AttrType.INT: "INT",
-        AttrType.INTS: "INTS",
-        AttrType.LONG: "LONG",
-        AttrType.LONGS: "LONGS",
-        AttrType.FLOAT: "FLOAT",
-        AttrType.FLOATS: "FLOATS",
-        AttrType.STRING: "STRING",
-        AttrType.STRINGS: "STRINGS",
-        AttrType.BOOL: "BOOL",
-        AttrType.BOOLS: "BOOLS",
-        AttrType.BLOCK: "BLOCK",
-        AttrType.BLOCKS: "BLOCKS"
-    }
-    ProgramDesc = core.ProgramDesc
-    from paddle.utils.unique_name import generate
-    program_desc = ProgramDesc(model_pb)
+    Ops of sub blocks, such as body of `while` and `conditional_block`, are
+    placed in node named by op owning the block and index of block, e.g.
+    `/while_0.block1`, beside the op.
+    '''
+    blocks = list(iter_blocks(model_pb))
     all_ops = {}
     all_vars = {}
     all_edges = {}
     op_inputvars_dict = collections.defaultdict(list)
     op_outputvars_dict = collections.defaultdict(list)
-    for i in range(program_desc.num_blocks()):
-        if i != 0:  # We do not show sub block for clarity now
-            continue
-        block_desc = program_desc.block(i)
-        # vars info
-        for var_desc in block_desc.all_vars():
-            try:
-                var_name = var_desc.name()
-                all_vars[var_name] = {}
-                all_vars[var_name]['name'] = var_name
-                all_vars[var_name]['shape'] = var_desc.shape()
-                all_vars[var_name]['type'] = str(var_desc.type())
-                all_vars[var_name]['dtype'] = str(var_desc.dtype())
-                all_vars[var_name]['value'] = []
-                all_vars[var_name]['persistable'] = var_desc.persistable()
-                attr_dict = {}
-                for attr_name in var_desc.attr_names():
-                    attr_dict[attr_name] = var_desc.attr(attr_name)
-                all_vars[var_name]['attrs'] = attr_dict
-                all_vars[var_name]['from_node'] = ''
-                all_vars[var_name]['to_nodes'] = []
-
-            except Exception:
-                # feed, fetch var
-                var_name = var_desc.name()
-                all_vars[var_name] = {}
-                all_vars[var_name]['name'] = var_name
-                all_vars[var_name]['shape'] = ''
-                all_vars[var_name]['type'] = str(var_desc.type())
-                all_vars[var_name]['dtype'] = ''
-                all_vars[var_name]['value'] = []
-                all_vars[var_name]['persistable'] = var_desc.persistable()
-                attr_dict = {}
-                for attr_name in var_desc.attr_names():
-                    attr_dict[attr_name] = var_desc.attr(attr_name)
-                all_vars[var_name]['attrs'] = attr_dict
-                all_vars[var_name]['from_node'] = ''
-                all_vars[var_name]['to_nodes'] = []
+    # vars info, vars of sub blocks which shadow vars of outer blocks are
+    # merged since ops refer vars by name.
+    for _, _, block in blocks:
+        for var_desc in iter_vars(block):
+            if var_desc.name in all_vars:
+                continue
+            var_info = get_var_info(var_desc)
+            var_info['value'] = []
+            var_info['from_node'] = ''
+            var_info['to_nodes'] = []
+            all_vars[var_desc.name] = var_info
 
-    for i in range(program_desc.num_blocks()):
-        if i != 0:  # We do not show sub block for clarity now
-            continue
-        block_desc = program_desc.block(i)
+    # Maps index of block to name scope of its ops.
+    block_scopes = {0: ''}
+    op_type_counts = collections.Counter()
+    # Maps name of var to index of block of op writes it.
+    var_blocks = {}
+    for idx, parent_idx, block in blocks:
+        if idx not in block_scopes:
+            # Block not owned by any op is placed in its parent block.
+            block_scopes[idx] = '{}/block{}'.format(
+                block_scopes.get(parent_idx, ''), idx)
         # ops info
-        for j in range(block_desc.op_size()):
-            op_desc = block_desc.op(j)
-            op_name = op_desc.attr('op_namescope') + generate(
-                str(op_desc.type()))
+        for op_desc in iter_ops(block):
+            attr_dict, attr_type_dict = get_op_attrs(op_desc)
+            op_namescope = attr_dict.get('op_namescope', '/')
+            op_name = '{}{}{}_{}'.format(block_scopes[idx], op_namescope,
+                                         op_desc.type,
+                                         op_type_counts[op_desc.type])
+            op_type_counts[op_desc.type] += 1
             all_ops[op_name] = {}
             all_ops[op_name]['name'] = op_name
             all_ops[op_name]['show_name'] = re.sub(r'\[(\w|\.)*\]', '',
                                                    op_name)
-            all_ops[op_name]['type'] = str(op_desc.type())
-            all_ops[op_name]['input_vars'] = {}
+            all_ops[op_name]['type'] = op_desc.type
+            all_ops[op_name]['input_vars'] = get_op_vars(op_desc.inputs)
             all_ops[op_name]['is_leaf_node'] = True
-            for input_name, variable_list in op_desc.inputs().items():
-                all_ops[op_name]['input_vars'][input_name] = variable_list
+            for variable_list in all_ops[op_name]['input_vars'].values():
                 op_inputvars_dict[op_name].extend(variable_list)
                 # fill var 'to_nodes'
                 for variable_name in variable_list:
-                    all_vars[variable_name]['to_nodes'].append(op_name)
-            all_ops[op_name]['output_vars'] = {}
-            for output_name, variable_list in op_desc.outputs().items():
-                all_ops[op_name]['output_vars'][output_name] = variable_list
+                    _get_var(all_vars,
+                             variable_name)['to_nodes'].append(op_name)
+            all_ops[op_name]['output_vars'] = get_op_vars(op_desc.outputs)
+            for variable_list in all_ops[op_name]['output_vars'].values():
                 op_outputvars_dict[op_name].extend(variable_list)
-                # fill var 'from_node'
+                # fill var 'from_node', var written by both op owning sub
+                # block and ops in it keeps the former as 'from_node'.
                 for variable_name in variable_list:
-                    all_vars[variable_name]['from_node'] = op_name
+                    if var_blocks.setdefault(variable_name, idx) == idx:
+                        _get_var(all_vars,
+                                 variable_name)['from_node'] = op_name
 
-            attr_dict = {}
-            attr_type_dict = {}
-            for attr_name in op_desc.attr_names():
-                try:
-                    if attr_name == 'sub_block':
-                        continue
-                    attr_dict[attr_name] = op_desc.attr(attr_name)
-                    attr_type = op_desc.attr_type(attr_name)
-                    attr_type_dict[attr_name] = attr_type_name[
-                        attr_type] if attr_type in attr_type_name else str(
-                            attr_type).split('.')[1]
-                except Exception:
-                    continue
+            for attr_name, attr_type in attr_type_dict.items():
+                if attr_type == 'BLOCK':
+                    block_scopes.setdefault(
+                        attr_dict[attr_name],
+                        '{}.block{}'.format(op_name, attr_dict[attr_name]))
+                elif attr_type == 'BLOCKS':
+                    for block_idx in attr_dict[attr_name]:
+                        block_scopes.setdefault(
+                            block_idx, '{}.block{}'.format(op_name, block_idx))
             all_ops[op_name]['attrs'] = attr_dict
             all_ops[op_name]['attr_types'] = attr_type_dict
             all_ops[op_name]['children_node'] = []
@@ -291,12 +288,9 @@ def analyse_model(model_pb):  # noqa: C901
                 all_ops[from_node_name]['output_nodes'].append(to_node_name)
                 all_ops[to_node_name]['input_nodes'].append(from_node_name)
 
-    general_children_dict = collections.defaultdict(set)
-
     all_op_names = list(all_ops.keys())
     for op_name in all_op_names:
-        create_non_leaf_nodes(
-            os.path.dirname(op_name), op_name, all_ops, general_children_dict)
+        create_non_leaf_nodes(os.path.dirname(op_name), op_name, all_ops)
 
     # fill all non-leaf node's  'output_nodes' 'input_nodes' 'output_vars' 'input_vars'
     # post-order traverse tree
@@ -311,22 +305,22 @@ def analyse_model(model_pb):  # noqa: C901
         if op['children_node']:
             for child_op in op['children_node']:
                 for input_node in all_ops[child_op]['input_nodes']:
-                    if input_node in general_children_dict[op_name]:
+                    if is_descendant(input_node, op_name):
                         continue
                     else:
                         op['input_nodes'].add(input_node)
                 for output_node in all_ops[child_op]['output_nodes']:
-                    if output_node in general_children_dict[op_name]:
+                    if is_descendant(output_node, op_name):
                         continue
                     else:
                         op['output_nodes'].add(output_node)
                 for input_var in op_inputvars_dict[child_op]:
-                    if all_vars[input_var][
-                            'from_node'] not in general_children_dict[op_name]:
+                    if not is_descendant(all_vars[input_var]['from_node'],
+                                         op_name):
                         op['input_vars'].add(input_var)
                 for output_var in op_outputvars_dict[child_op]:
                     for to_node_name in all_vars[output_var]['to_nodes']:
-                        if to_node_name not in general_children_dict[op_name]:
+                        if not is_descendant(to_node_name, op_name):
                             op['output_vars'].add(output_var)
             op['input_nodes'] = list(op['input_nodes'])
             op['output_nodes'] = list(op['output_nodes'])
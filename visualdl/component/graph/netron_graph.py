@@ -12,9 +12,42 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =======================================================================
+import contextlib
+import copy
 from collections import defaultdict
 from collections import deque
 
+from .search_index import SearchIndex
+
+
+class VisibleMap(object):
+    '''
+    Visibility of nodes stored as bitmap, where bit of a node is found by
+    `node_index` shared by all maps of a model, so that visibility state of
+    every client is compact and cheap to copy.
+    '''
+    __slots__ = ('_node_index', '_bits')
+
+    def __init__(self, node_index, bits=None):
+        self._node_index = node_index
+        if bits is None:
+            bits = bytes((len(node_index) + 7) // 8)
+        self._bits = bytearray(bits)
+
+    def __getitem__(self, node_name):
+        index = self._node_index[node_name]
+        return self._bits[index >> 3] & (1 << (index & 7)) != 0
+
+    def __setitem__(self, node_name, visible):
+        index = self._node_index[node_name]
+        if visible:
+            self._bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self._bits[index >> 3] &= ~(1 << (index & 7))
+
+    def copy(self):
+        return VisibleMap(self._node_index, self._bits)
+
 
 class Model:
     def __init__(self, graph_data):
@@ -24,45 +57,197 @@ class Model:
         self.all_vars = {var['name']: var for var in graph_data['vars']}
         self.all_edges = {(edge['from_node'], edge['to_node']): edge
                           for edge in graph_data['edges']}
-        self.visible_maps = {
-            node['name']: (True if not node['children_node'] else False)
-            for node in graph_data['nodes']
+        self.node_index = {
+            node_name: index
+            for index, node_name in enumerate(self.all_nodes)
         }
+        # Visibility when all nodes are expanded, only leaf nodes are visible.
+        self._expanded_maps = VisibleMap(self.node_index)
+        for node in graph_data['nodes']:
+            self._expanded_maps[node['name']] = not node['children_node']
+        # Visibility when graph is opened, children of root are visible too.
+        self._initial_maps = self._expanded_maps.copy()
         root_node = self.all_nodes['/']
         for child_name in root_node['children_node']:
-            self.visible_maps[child_name] = True
+            self._initial_maps[child_name] = True
+        self.visible_maps = self._initial_maps.copy()
+        self.search_index = SearchIndex(self.all_nodes, self.all_vars)
+        # Version of visibility state, and nodes shown (True) or hidden
+        # (False) since graph of `_diff_version` was made, for diff of graph.
+        self.visible_version = 0
+        self._diff_version = 0
+        self._visible_changes = {}
+
+    def fork(self):
+        '''
+        Get a model sharing nodes, vars and edges with this model, and with
+        its own copy of visibility state, used by each client.
+        '''
+        model = copy.copy(self)
+        model.visible_maps = self.visible_maps.copy()
+        model._visible_changes = dict(self._visible_changes)
+        return model
 
     def make_graph(self, refresh=False, expand_all=False):
         if refresh is True:
-            self.visible_maps = {
-                node['name']: (True if not node['children_node'] else False)
-                for node in self.all_nodes.values()
-            }
-            root_node = self.all_nodes['/']
-            for child_name in root_node['children_node']:
-                self.visible_maps[child_name] = True
+            self.visible_maps = self._initial_maps.copy()
+            self.visible_version += 1
         if expand_all is True:
-            self.visible_maps = {
-                node['name']: (True if not node['children_node'] else False)
-                for node in self.all_nodes.values()
-            }
+            self.visible_maps = self._expanded_maps.copy()
+            self.visible_version += 1
         self.current_nodes = {
             node_name: self.all_nodes[node_name]
             for node_name in self.get_current_visible_nodes()
         }
-        return Graph(self.current_nodes, self.all_vars)
+        self._diff_version = self.visible_version
+        self._visible_changes = {}
+        graph = Graph(self.current_nodes, self.all_vars)
+        graph['version'] = self.visible_version
+        return graph
+
+    def make_graph_diff(self, since_version):
+        '''
+        Get nodes shown and hidden since graph of `since_version` was made,
+        so that client only updates changed nodes instead of whole graph.
+
+        Returns:
+            A dict of `version`, `reset`, `added` as graph of shown nodes and
+            `removed` as names of hidden nodes. If visibility state is not of
+            `since_version`, e.g. it is evicted or changed by another page,
+            `reset` is True and `added` is the whole graph to replace with.
+        '''
+        if since_version != self._diff_version:
+            return {
+                'version': self.visible_version,
+                'reset': True,
+                'added': self.make_graph(),
+                'removed': []
+            }
+        added_nodes = {
+            node_name: self.all_nodes[node_name]
+            for node_name, shown in self._visible_changes.items() if shown
+        }
+        removed = [
+            node_name for node_name, shown in self._visible_changes.items()
+            if not shown
+        ]
+        self._diff_version = self.visible_version
+        self._visible_changes = {}
+        return {
+            'version': self.visible_version,
+            'reset': False,
+            'added': Graph(added_nodes, self.all_vars),
+            'removed': removed
+        }
+
+    def _is_reachable(self, node_name):
+        # node is traversed by `get_current_visible_nodes` only if all its
+        # ancestors are invisible
+        while node_name != '/':
+            node_name = self.all_nodes[node_name]['parent_node']
+            if self.visible_maps[node_name] is True:
+                return False
+        return True
+
+    @contextlib.contextmanager
+    def _track_visible(self, root_name):
+        '''
+        Record nodes shown or hidden by changing visibility of `root_name`
+        and its descendants in the block, only nodes traversed under
+        `root_name` are compared, so cost is proportional to changed subtree.
+        '''
+        reachable = self._is_reachable(root_name)
+        before = self.get_current_visible_nodes(
+            root_name) if reachable else []
+        yield
+        self.visible_version += 1
+        if not reachable:
+            return
+        after = self.get_current_visible_nodes(root_name)
+        before_set = set(before)
+        after_set = set(after)
+        for node_name in before:
+            if node_name not in after_set:
+                self._record_visible_change(node_name, False)
+        for node_name in after:
+            if node_name not in before_set:
+                self._record_visible_change(node_name, True)
+
+    def _record_visible_change(self, node_name, shown):
+        if self._visible_changes.get(node_name, shown) != shown:
+            # shown and hidden again since last graph, or the reverse
+            del self._visible_changes[node_name]
+        else:
+            self._visible_changes[node_name] = shown
 
     def get_all_leaf_nodes(self):
         return Graph(self.all_nodes, self.all_vars)
 
-    def get_current_visible_nodes(self):
+    def get_ancestors(self, node_name):
+        '''
+        Get names of ancestors of node from top to its parent, root excluded.
+        '''
+        ancestors = []
+        parent_node_name = self.all_nodes[node_name]['parent_node']
+        while parent_node_name not in ('/', ''):
+            ancestors.append(parent_node_name)
+            parent_node_name = self.all_nodes[parent_node_name]['parent_node']
+        ancestors.reverse()
+        return ancestors
+
+    def find(self, query, offset=0, limit=20):
+        '''
+        Find nodes by name or op type and vars by name, see
+        `SearchIndex.search`.
+
+        Returns:
+            A dict of `total` number of matches and `matches` from `offset`,
+            each has `kind` of 'node' or 'var', `name`, `type` and `path` of
+            names of nodes to expand to show it, which can be used by
+            `adjust_search_node_visible`.
+        '''
+        matches = self.search_index.search(query)
+        return {
+            'total': len(matches),
+            'matches': [
+                self._get_match(kind, name)
+                for kind, name in matches[offset:offset + limit]
+            ]
+        }
+
+    def _get_match(self, kind, name):
+        if kind == 'node':
+            node = self.all_nodes[name]
+            return {
+                'kind': kind,
+                'name': name,
+                'show_name': node['show_name'],
+                'type': node['type'],
+                'is_leaf': node['is_leaf_node'],
+                'path': self.get_ancestors(name)
+            }
+        var = self.all_vars[name]
+        from_node = var.get('from_node')
+        path = []
+        if from_node in self.all_nodes:
+            path = self.get_ancestors(from_node) + [from_node]
+        return {
+            'kind': kind,
+            'name': name,
+            'show_name': name,
+            'type': var.get('dtype', ''),
+            'from_node': from_node,
+            'path': path
+        }
+
+    def get_current_visible_nodes(self, root_name='/'):
         # bfs traversal to get current visible nodes
         # if one node is visible now, all its children nodes are invisible
         current_visible_nodes = []
         travesal_queue = deque()
         visited_map = defaultdict(bool)
-        travesal_queue.append('/')
-        visited_map['/'] = True
+        travesal_queue.append(root_name)
+        visited_map[root_name] = True
         while travesal_queue:
             current_name = travesal_queue.popleft()
             current_node = self.all_nodes[current_name]
@@ -76,18 +261,19 @@ class Model:
         return current_visible_nodes
 
     def adjust_visible(self, node_name, expand=True, keep_state=False):
-        if (expand):
-            if self.all_nodes[node_name]['is_leaf_node'] is True:
-                return
-            if keep_state:
-                self.visible_maps[node_name] = False
+        if expand and self.all_nodes[node_name]['is_leaf_node'] is True:
+            return
+        with self._track_visible(node_name):
+            if (expand):
+                if keep_state:
+                    self.visible_maps[node_name] = False
+                else:
+                    self.visible_maps[node_name] = False
+                    current_node = self.all_nodes[node_name]
+                    for child_name in current_node['children_node']:
+                        self.visible_maps[child_name] = True
             else:
-                self.visible_maps[node_name] = False
-                current_node = self.all_nodes[node_name]
-                for child_name in current_node['children_node']:
-                    self.visible_maps[child_name] = True
-        else:
-            self.visible_maps[node_name] = True
+                self.visible_maps[node_name] = True
 
     def adjust_search_node_visible(self,
                                    node_name,
@@ -111,30 +297,35 @@ class Model:
                 parent_node_name = self.all_nodes[parent_node_name][
                     'parent_node']
             if topmost_parent is not None:
-                self.visible_maps[topmost_parent] = False
-                parent_node_name = self.all_nodes[node_name]['parent_node']
-                if (keep_state):
-                    self.visible_maps[node_name] = True
-                    while (parent_node_name != topmost_parent):
-                        self.visible_maps[parent_node_name] = False
-                        parent_node_name = self.all_nodes[parent_node_name][
-                            'parent_node']
-                else:
-                    for child_name in self.all_nodes[parent_node_name][
-                            'children_node']:
+                with self._track_visible(topmost_parent):
+                    self._show_search_node(node_name, topmost_parent,
+                                           keep_state)
+
+    def _show_search_node(self, node_name, topmost_parent, keep_state):
+        self.visible_maps[topmost_parent] = False
+        parent_node_name = self.all_nodes[node_name]['parent_node']
+        if (keep_state):
+            self.visible_maps[node_name] = True
+            while (parent_node_name != topmost_parent):
+                self.visible_maps[parent_node_name] = False
+                parent_node_name = self.all_nodes[parent_node_name][
+                    'parent_node']
+        else:
+            for child_name in self.all_nodes[parent_node_name][
+                    'children_node']:
+                self.visible_maps[child_name] = True
+            self.visible_maps[parent_node_name] = False
+            key_path_node_name = parent_node_name
+            while (parent_node_name != topmost_parent):
+                parent_node_name = self.all_nodes[parent_node_name][
+                    'parent_node']
+                for child_name in self.all_nodes[parent_node_name][
+                        'children_node']:
+                    if child_name != key_path_node_name:
                         self.visible_maps[child_name] = True
-                    self.visible_maps[parent_node_name] = False
-                    key_path_node_name = parent_node_name
-                    while (parent_node_name != topmost_parent):
-                        parent_node_name = self.all_nodes[parent_node_name][
-                            'parent_node']
-                        for child_name in self.all_nodes[parent_node_name][
-                                'children_node']:
-                            if child_name != key_path_node_name:
-                                self.visible_maps[child_name] = True
-                            else:
-                                self.visible_maps[child_name] = False
-                        key_path_node_name = parent_node_name
+                    else:
+                        self.visible_maps[child_name] = False
+                key_path_node_name = parent_node_name
 
 
 class Graph(dict):
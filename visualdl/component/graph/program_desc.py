@@ -0,0 +1,229 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+from visualdl.proto import framework_pb2
+
+# Field numbers of `ProgramDesc` and `BlockDesc` in framework.proto.
+_PROGRAM_BLOCKS = 1
+_BLOCK_IDX = 1
+_BLOCK_PARENT_IDX = 2
+_BLOCK_VARS = 3
+_BLOCK_OPS = 4
+
+_VarType = framework_pb2.VarType
+_Scalar = framework_pb2.Scalar
+
+# Names of var types same as `str` of `paddle.framework.core.VarDesc.VarType`.
+_VAR_TYPE_NAMES = {
+    value: 'VarType.' + name
+    for name, value in _VarType.Type.items()
+}
+
+# Names of attribute types same as `paddle.framework.core.AttrType`, and
+# getters of attribute values.
+_ATTR_TYPES = {
+    framework_pb2.INT: ('INT', lambda attr: attr.i),
+    framework_pb2.FLOAT: ('FLOAT', lambda attr: attr.f),
+    framework_pb2.STRING: ('STRING', lambda attr: attr.s),
+    framework_pb2.INTS: ('INTS', lambda attr: list(attr.ints)),
+    framework_pb2.FLOATS: ('FLOATS', lambda attr: list(attr.floats)),
+    framework_pb2.STRINGS: ('STRINGS', lambda attr: list(attr.strings)),
+    framework_pb2.BOOLEAN: ('BOOL', lambda attr: attr.b),
+    framework_pb2.BOOLEANS: ('BOOLS', lambda attr: list(attr.bools)),
+    framework_pb2.BLOCK: ('BLOCK', lambda attr: attr.block_idx),
+    framework_pb2.LONG: ('LONG', lambda attr: attr.l),
+    framework_pb2.BLOCKS: ('BLOCKS', lambda attr: list(attr.blocks_idx)),
+    framework_pb2.LONGS: ('LONGS', lambda attr: list(attr.longs)),
+    framework_pb2.FLOAT64S: ('FLOAT64S', lambda attr: list(attr.float64s)),
+    framework_pb2.VAR: ('VAR', lambda attr: attr.var_name),
+    framework_pb2.VARS: ('VARS', lambda attr: list(attr.vars_name)),
+    framework_pb2.FLOAT64: ('FLOAT64', lambda attr: attr.float64),
+    framework_pb2.SCALAR: ('SCALAR', lambda attr: _get_scalar(attr.scalar)),
+    framework_pb2.SCALARS:
+    ('SCALARS', lambda attr: [_get_scalar(item) for item in attr.scalars])
+}
+
+# Fields of `VarType` holding tensor desc of var types, same as
+# `VarDesc::tensor_desc` of paddle.
+_TENSOR_DESCS = {
+    _VarType.SELECTED_ROWS: lambda var_type: var_type.selected_rows,
+    _VarType.LOD_TENSOR: lambda var_type: var_type.lod_tensor.tensor,
+    _VarType.LOD_TENSOR_ARRAY: lambda var_type: var_type.tensor_array.tensor,
+    _VarType.STRINGS: lambda var_type: var_type.strings,
+    _VarType.VOCAB: lambda var_type: var_type.vocab,
+    _VarType.SPARSE_COO: lambda var_type: var_type.sparse_coo,
+    _VarType.SPARSE_CSR: lambda var_type: var_type.sparse_csr
+}
+
+
+def _read_varint(buffer, pos):
+    # Most of varints like keys of fields are single bytes.
+    result = buffer[pos]
+    if result < 0x80:
+        return result, pos + 1
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _iter_fields(buffer):
+    '''
+    Iterate fields of serialized protobuf message without parsing it.
+
+    Returns:
+        An iterator of (field number, value), value is int of varint field
+        and memoryview of other fields.
+    '''
+    pos = 0
+    while pos < len(buffer):
+        key, pos = _read_varint(buffer, pos)
+        wire_type = key & 7
+        if wire_type == 0:
+            value, pos = _read_varint(buffer, pos)
+        else:
+            if wire_type == 2:
+                length, pos = _read_varint(buffer, pos)
+            elif wire_type == 1:
+                length = 8
+            elif wire_type == 5:
+                length = 4
+            else:
+                raise ValueError(
+                    'Unsupported wire type {} in model.'.format(wire_type))
+            value = buffer[pos:pos + length]
+            pos += length
+        yield key >> 3, value
+
+
+def iter_blocks(model_pb):
+    '''
+    Iterate blocks of `.pdmodel` content, blocks are not parsed but sliced,
+    so that ops and vars in them are parsed one by one by `iter_vars` and
+    `iter_ops` instead of holding parsed messages of whole program.
+
+    Returns:
+        An iterator of (idx, parent_idx, serialized block desc).
+    '''
+    for number, block in _iter_fields(memoryview(model_pb)):
+        if number != _PROGRAM_BLOCKS:
+            continue
+        idx = 0
+        parent_idx = -1
+        for field_number, value in _iter_fields(block):
+            if field_number == _BLOCK_IDX:
+                idx = value
+            elif field_number == _BLOCK_PARENT_IDX:
+                parent_idx = value
+            elif field_number in (_BLOCK_VARS, _BLOCK_OPS):
+                # Indices precede vars and ops in serialized block.
+                break
+        # Negative int32 is encoded as 64-bit two's complement.
+        if parent_idx >= 1 << 63:
+            parent_idx -= 1 << 64
+        yield idx, parent_idx, block
+
+
+def iter_vars(block):
+    '''Iterate `framework_pb2.VarDesc` of serialized block desc.'''
+    for number, value in _iter_fields(block):
+        if number == _BLOCK_VARS:
+            yield framework_pb2.VarDesc.FromString(value)
+
+
+def iter_ops(block):
+    '''Iterate `framework_pb2.OpDesc` of serialized block desc.'''
+    for number, value in _iter_fields(block):
+        if number == _BLOCK_OPS:
+            yield framework_pb2.OpDesc.FromString(value)
+
+
+def _get_scalar(scalar):
+    if scalar.type == _Scalar.BOOLEAN:
+        return scalar.b
+    if scalar.type == _Scalar.LONG:
+        return scalar.i
+    if scalar.type == _Scalar.COMPLEX128:
+        return [scalar.c.r, scalar.c.i]
+    return scalar.r
+
+
+def get_op_attrs(op_desc):
+    '''
+    Get attributes of op desc, attributes of unknown types are skipped.
+
+    Returns:
+        A tuple of dict maps attribute name to value and dict maps attribute
+        name to name of its type.
+    '''
+    attrs = {}
+    attr_types = {}
+    for attr in sorted(op_desc.attrs, key=lambda attr: attr.name):
+        if not attr.HasField('type') or attr.type not in _ATTR_TYPES:
+            continue
+        type_name, get_value = _ATTR_TYPES[attr.type]
+        attrs[attr.name] = get_value(attr)
+        attr_types[attr.name] = type_name
+    return attrs, attr_types
+
+
+def get_op_vars(op_vars):
+    '''Get dict maps parameter name to list of argument names.'''
+    return {
+        var.parameter: list(var.arguments)
+        for var in sorted(op_vars, key=lambda var: var.parameter)
+    }
+
+
+def get_var_info(var_desc):
+    '''
+    Get information of var desc.
+
+    Returns:
+        A dict of name, shape, type, dtype, persistable and attrs of var,
+        shape and dtype are empty strings if var is not tensor, such as feed
+        and fetch vars.
+    '''
+    var_type = var_desc.type
+    shape = ''
+    dtype = ''
+    type_name = ''
+    if var_type.HasField('type'):
+        type_name = _VAR_TYPE_NAMES[var_type.type]
+        if var_type.type in _TENSOR_DESCS:
+            tensor_desc = _TENSOR_DESCS[var_type.type](var_type)
+            shape = list(tensor_desc.dims)
+            if tensor_desc.HasField('data_type'):
+                dtype = _VAR_TYPE_NAMES[tensor_desc.data_type]
+    attrs = {}
+    for attr in var_desc.attrs:
+        if attr.type == framework_pb2.INTS:
+            attrs[attr.name] = list(attr.ints)
+        elif attr.type == framework_pb2.STRING:
+            attrs[attr.name] = attr.s
+        else:
+            attrs[attr.name] = attr.i
+    return {
+        'name': var_desc.name,
+        'shape': shape,
+        'type': type_name,
+        'dtype': dtype,
+        'persistable': var_desc.persistable,
+        'attrs': attrs
+    }
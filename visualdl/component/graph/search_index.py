@@ -0,0 +1,187 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import collections
+import math
+import threading
+
+import numpy as np
+
+# Length of n-grams in index.
+NGRAM_SIZE = 3
+# Least ratio of n-grams of query which text contains to match fuzzily.
+FUZZY_MIN_RATIO = 0.6
+# Number of recent queries whose ranked matches are kept for paging.
+_RESULT_CACHE_SIZE = 16
+
+# Ranks of matches, lower is better.
+_RANK_EXACT = 0
+_RANK_PREFIX = 1
+_RANK_SHOW_NAME = 2
+_RANK_SUBSTRING = 3
+_RANK_FUZZY = 4
+
+
+def _ngram_codes(data):
+    """Get codes of n-grams of bytes at every position of uint8 array."""
+    codes = np.zeros(max(len(data) - NGRAM_SIZE + 1, 0), dtype=np.int64)
+    for offset in range(NGRAM_SIZE):
+        codes <<= 8
+        codes |= data[offset:offset + len(codes)]
+    return codes
+
+
+def _run_starts(values):
+    """Get mask of first elements of runs of equal values in sorted array."""
+    mask = np.ones(len(values), dtype=bool)
+    mask[1:] = values[1:] != values[:-1]
+    return mask
+
+
+class SearchIndex(object):
+    '''
+    N-gram inverted index over names and op types of nodes and names of vars
+    of a graph, built on first search. It only refers to nodes and vars of
+    model, so it is shared by all forks of model.
+
+    N-grams are taken from utf-8 bytes of lowercase texts, posting lists of
+    all n-grams are stored in one array sorted by n-gram code, so that index
+    of large graph is built by numpy and takes little memory.
+    '''
+    def __init__(self, all_nodes, all_vars):
+        self._all_nodes = all_nodes
+        self._all_vars = all_vars
+        self._lock = threading.Lock()
+        self._keys = None
+        self._results = collections.OrderedDict()
+
+    def _build(self):
+        keys = []
+        texts = []
+        for node_name, node in self._all_nodes.items():
+            if node_name == '/':
+                continue
+            keys.append(('node', node_name))
+            texts.append('{}\n{}'.format(node_name, node['type']).lower())
+        for var_name in self._all_vars:
+            keys.append(('var', var_name))
+            texts.append(var_name.lower())
+        # Texts are joined by NUL, n-grams across texts are dropped.
+        encoded = [text.encode() for text in texts]
+        data = np.frombuffer(b'\0'.join(encoded), dtype=np.uint8)
+        owners = np.repeat(
+            np.arange(len(encoded), dtype=np.int64),
+            np.array([len(text) + 1 for text in encoded], dtype=np.int64))
+        codes = _ngram_codes(data)
+        valid = np.ones(len(codes), dtype=bool)
+        for offset in range(NGRAM_SIZE):
+            valid &= data[offset:offset + len(codes)] != 0
+        # Sort entries of (n-gram, owner) and drop duplicates, so that owners
+        # of every n-gram are contiguous and sorted.
+        entries = (codes[valid] << 32) | owners[:len(codes)][valid]
+        entries.sort()
+        entries = entries[_run_starts(entries)]
+        ngrams = entries >> 32
+        self._starts = np.flatnonzero(_run_starts(ngrams))
+        self._ends = np.append(self._starts[1:], len(entries))
+        self._ngrams = ngrams[self._starts]
+        self._owners = (entries & 0xffffffff).astype(np.int32)
+        self._texts = texts
+        self._keys = keys
+
+    def _get_postings(self, query):
+        codes = np.unique(
+            _ngram_codes(np.frombuffer(query.encode(), dtype=np.uint8)))
+        positions = np.searchsorted(self._ngrams, codes)
+        postings = []
+        for code, position in zip(codes, positions):
+            if position < len(self._ngrams) and self._ngrams[
+                    position] == code:
+                postings.append(self._owners[self._starts[position]:self.
+                                             _ends[position]])
+        return len(codes), postings
+
+    def _rank(self, query, text):
+        name = text.split('\n', 1)[0]
+        show_name = name.rsplit('/', 1)[-1]
+        if show_name == query:
+            return _RANK_EXACT
+        if show_name.startswith(query):
+            return _RANK_PREFIX
+        if query in show_name:
+            return _RANK_SHOW_NAME
+        if query in text:
+            return _RANK_SUBSTRING
+        return None
+
+    def _match(self, query):
+        count, postings = self._get_postings(query)
+        if count == 0:
+            # Query shorter than n-gram, scan all texts.
+            candidates = range(len(self._texts))
+        elif len(postings) < count:
+            candidates = []
+        else:
+            postings.sort(key=len)
+            candidates = postings[0]
+            for posting in postings[1:]:
+                candidates = np.intersect1d(
+                    candidates, posting, assume_unique=True)
+        ranked = []
+        for index in candidates:
+            rank = self._rank(query, self._texts[index])
+            if rank is not None:
+                ranked.append((rank, len(self._texts[index]), index))
+        if ranked or not postings:
+            return ranked
+        # Nothing contains query, match texts containing most of n-grams of
+        # query fuzzily, ranked by ratio of n-grams missing.
+        min_count = math.ceil(count * FUZZY_MIN_RATIO)
+        if len(postings) < min_count:
+            return ranked
+        counts = np.bincount(
+            np.concatenate(postings), minlength=len(self._texts))
+        for index in np.flatnonzero(counts >= min_count):
+            rank = _RANK_FUZZY + (count - counts[index]) / count
+            ranked.append((rank, len(self._texts[index]), index))
+        return ranked
+
+    def search(self, query):
+        '''
+        Search nodes by name or op type, and vars by name. Text containing
+        query is matched, ranked by whether it is the last part of name,
+        prefix of it, or in it. If nothing contains query, texts containing
+        most n-grams of query are matched fuzzily, so that typos are
+        tolerated.
+
+        Returns:
+            A list of ('node' or 'var', name) of matches, best first.
+        '''
+        query = query.strip().lower()
+        if not query:
+            return []
+        with self._lock:
+            if self._keys is None:
+                self._build()
+            if query in self._results:
+                self._results.move_to_end(query)
+                return self._results[query]
+        ranked = self._match(query)
+        ranked.sort()
+        matches = [self._keys[index] for _, _, index in ranked]
+        with self._lock:
+            self._results[query] = matches
+            while len(self._results) > _RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return matches
@@ -103,6 +103,11 @@ class LocalFileSystem(object):
     def isfile(self, filename):
         return os.path.isfile(filename)
 
+    @staticmethod
+    def stat(path):
+        result = os.stat(path)
+        return result.st_size, result.st_mtime
+
     def read_file(self, filename, binary_mode=True):
         mode = "rb" if binary_mode else "r"
         with open(filename, mode) as reader:
@@ -162,6 +167,10 @@ class HDFileSystem(object):
     def isfile(self, filename):
         return exists(filename)
 
+    def stat(self, path):
+        status = self.cli.status(hdfs_path=path[7:])
+        return status['length'], status['modificationTime']
+
     def read_file(self, filename, binary_mode=True):
         with self.cli.read(hdfs_path=filename[7:]) as reader:
             data = reader.read()
@@ -340,6 +349,11 @@ class BosFileSystem(object):
     def get_meta(self, bucket_name, object_key):
         return self.bos_client.get_object_meta_data(bucket_name, object_key)
 
+    def stat(self, path):
+        bucket_name, object_key = get_object_info(path)
+        metadata = self.get_meta(bucket_name, object_key).metadata
+        return int(metadata.content_length), metadata.last_modified
+
     def makedirs(self, path):
         if not path.endswith('/'):
             path += '/'
@@ -570,6 +584,29 @@ class BFile(object):
     def read_file(self, filename, binnary=True):
         return self.fs.read_file(filename, binnary)
 
+    def tell(self):
+        """Get the offset of next byte to read in file.
+
+        Returns:
+            offset: Offset of next byte to read.
+        """
+        offset = 0
+        if self.continuation_token is not None:
+            offset = self.continuation_token.get("last_offset", 0)
+        if self.buff:
+            offset -= len(self.buff) - self.buff_offset
+        return offset
+
+    def seek(self, offset):
+        """Move the read position to `offset`, local buffer will be dropped.
+
+        Args:
+            offset: Offset of next byte to read.
+        """
+        self.buff = None
+        self.buff_offset = 0
+        self.continuation_token = {"last_offset": offset}
+
     def read(self, n=None):
         """Read `n` or all contents of self.buff or file.
 
@@ -714,3 +751,16 @@ def join(path, *paths):
 
 def walk(dir):
     return default_file_factory.get_filesystem(dir).walk(dir)
+
+
+def stat(path):
+    """Get size and modification time of file.
+
+    Returns:
+        A tuple of (size, mtime), or None if filesystem of `path` does not
+        support it.
+    """
+    fs = default_file_factory.get_filesystem(path)
+    if not hasattr(fs, 'stat'):
+        return None
+    return fs.stat(path)
@@ -0,0 +1,69 @@
+# flake8: noqa
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: visualdl/proto/framework.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
+    b'\n\x1evisualdl/proto/framework.proto\x12\x12visualdl.framework\"\x1d\n\x07Version\x12\x12\n\x07version\x18\x01 \x01(\x03:\x01\x30\"\x1f\n\x07\x43omplex\x12\t\n\x01r\x18\x01 \x01(\x01\x12\t\n\x01i\x18\x02 \x01(\x01\"\xbc\x01\n\x06Scalar\x12-\n\x04type\x18\x01 \x01(\x0e\x32\x1f.visualdl.framework.Scalar.Type\x12\t\n\x01\x62\x18\x02 \x01(\x08\x12\t\n\x01i\x18\x03 \x01(\x03\x12\t\n\x01r\x18\x04 \x01(\x01\x12&\n\x01\x63\x18\x05 \x01(\x0b\x32\x1b.visualdl.framework.Complex\":\n\x04Type\x12\x0b\n\x07\x42OOLEAN\x10\x01\x12\x08\n\x04LONG\x10\x02\x12\x0b\n\x07\x46LOAT64\x10\x03\x12\x0e\n\nCOMPLEX128\x10\x04\"\xfd\x04\n\x06OpDesc\x12\x0c\n\x04type\x18\x03 \x01(\t\x12.\n\x06inputs\x18\x01 \x03(\x0b\x32\x1e.visualdl.framework.OpDesc.Var\x12/\n\x07outputs\x18\x02 \x03(\x0b\x32\x1e.visualdl.framework.OpDesc.Var\x12.\n\x05\x61ttrs\x18\x04 \x03(\x0b\x32\x1f.visualdl.framework.OpDesc.Attr\x12\x18\n\tis_target\x18\x05 \x01(\x08:\x05\x66\x61lse\x1a\x8c\x03\n\x04\x41ttr\x12\x0c\n\x04name\x18\x01 \x01(\t\x12*\n\x04type\x18\x02 \x01(\x0e\x32\x1c.visualdl.framework.AttrType\x12\t\n\x01i\x18\x03 \x01(\x05\x12\t\n\x01\x66\x18\x04 \x01(\x02\x12\t\n\x01s\x18\x05 \x01(\t\x12\x0c\n\x04ints\x18\x06 \x03(\x05\x12\x0e\n\x06\x66loats\x18\x07 \x03(\x02\x12\x0f\n\x07strings\x18\x08 \x03(\t\x12\t\n\x01\x62\x18\n \x01(\x08\x12\r\n\x05\x62ools\x18\x0b \x03(\x08\x12\x11\n\tblock_idx\x18\x0c \x01(\x05\x12\t\n\x01l\x18\r \x01(\x03\x12\x12\n\nblocks_idx\x18\x0e \x03(\x05\x12\r\n\x05longs\x18\x0f \x03(\x03\x12\x10\n\x08\x66loat64s\x18\x10 \x03(\x01\x12\x10\n\x08var_name\x18\x11 \x01(\t\x12\x11\n\tvars_name\x18\x12 \x03(\t\x12\x0f\n\x07\x66loat64\x18\x13 \x01(\x01\x12*\n\x06scalar\x18\x14 \x01(\x0b\x32\x1a.visualdl.framework.Scalar\x12+\n\x07scalars\x18\x15 \x03(\x0b\x32\x1a.visualdl.framework.Scalar\x1a+\n\x03Var\x12\x11\n\tparameter\x18\x01 \x01(\t\x12\x11\n\targuments\x18\x02 \x03(\t\"\xf5\x0b\n\x07VarType\x12.\n\x04type\x18\x01 \x01(\x0e\x32 .visualdl.framework.VarType.Type\x12=\n\rselected_rows\x18\x02 \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12=\n\nlod_tensor\x18\x03 \x01(\x0b\x32).visualdl.framework.VarType.LoDTensorDesc\x12\x44\n\x0ctensor_array\x18\x04 \x01(\x0b\x32..visualdl.framework.VarType.LoDTensorArrayDesc\x12\x36\n\x06reader\x18\x05 \x01(\x0b\x32&.visualdl.framework.VarType.ReaderDesc\x12\x30\n\x05tuple\x18\x07 \x01(\x0b\x32!.visualdl.framework.VarType.Tuple\x12\x36\n\x06string\x18\x08 \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12\x37\n\x07strings\x18\t \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12\x35\n\x05vocab\x18\n \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12:\n\nsparse_coo\x18\x0b \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12:\n\nsparse_csr\x18\x0c \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x1aO\n\nTensorDesc\x12\x33\n\tdata_type\x18\x01 \x01(\x0e\x32 .visualdl.framework.VarType.Type\x12\x0c\n\x04\x64ims\x18\x02 \x03(\x03\x1a]\n\rLoDTensorDesc\x12\x36\n\x06tensor\x18\x01 \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12\x14\n\tlod_level\x18\x02 \x01(\x05:\x01\x30\x1a\x62\n\x12LoDTensorArrayDesc\x12\x36\n\x06tensor\x18\x01 \x01(\x0b\x32&.visualdl.framework.VarType.TensorDesc\x12\x14\n\tlod_level\x18\x02 \x01(\x05:\x01\x30\x1aK\n\nReaderDesc\x12=\n\nlod_tensor\x18\x01 \x03(\x0b\x32).visualdl.framework.VarType.LoDTensorDesc\x1a?\n\x05Tuple\x12\x36\n\x0c\x65lement_type\x18\x01 \x03(\x0e\x32 .visualdl.framework.VarType.Type\"\xc9\x03\n\x04Type\x12\x08\n\x04\x42OOL\x10\x00\x12\t\n\x05INT16\x10\x01\x12\t\n\x05INT32\x10\x02\x12\t\n\x05INT64\x10\x03\x12\x08\n\x04\x46P16\x10\x04\x12\x08\n\x04\x46P32\x10\x05\x12\x08\n\x04\x46P64\x10\x06\x12\n\n\x06SIZE_T\x10\x13\x12\t\n\x05UINT8\x10\x14\x12\x08\n\x04INT8\x10\x15\x12\x08\n\x04\x42\x46\x31\x36\x10\x16\x12\r\n\tCOMPLEX64\x10\x17\x12\x0e\n\nCOMPLEX128\x10\x18\x12\x0e\n\nFP8_E4M3FN\x10 \x12\x0c\n\x08\x46P8_E5M2\x10!\x12\x0e\n\nLOD_TENSOR\x10\x07\x12\x11\n\rSELECTED_ROWS\x10\x08\x12\x12\n\x0e\x46\x45\x45\x44_MINIBATCH\x10\t\x12\x0e\n\nFETCH_LIST\x10\n\x12\x0f\n\x0bSTEP_SCOPES\x10\x0b\x12\x12\n\x0eLOD_RANK_TABLE\x10\x0c\x12\x14\n\x10LOD_TENSOR_ARRAY\x10\r\x12\x0e\n\nPLACE_LIST\x10\x0e\x12\n\n\x06READER\x10\x0f\x12\x07\n\x03RAW\x10\x11\x12\t\n\x05TUPLE\x10\x12\x12\n\n\x06STRING\x10\x19\x12\x0b\n\x07STRINGS\x10\x1a\x12\t\n\x05VOCAB\x10\x1b\x12\r\n\tFEED_LIST\x10\x1c\x12\x0b\n\x07PSTRING\x10\x1d\x12\x0e\n\nSPARSE_COO\x10\x1e\x12\x0e\n\nSPARSE_CSR\x10\x1f\"\xd0\x02\n\x07VarDesc\x12\x0c\n\x04name\x18\x01 \x01(\t\x12)\n\x04type\x18\x02 \x01(\x0b\x32\x1b.visualdl.framework.VarType\x12\x1a\n\x0bpersistable\x18\x03 \x01(\x08:\x05\x66\x61lse\x12\x1e\n\x0fneed_check_feed\x18\x04 \x01(\x08:\x05\x66\x61lse\x12\x1b\n\x0cis_parameter\x18\x05 \x01(\x08:\x05\x66\x61lse\x12\x1c\n\rstop_gradient\x18\x06 \x01(\x08:\x05\x66\x61lse\x12/\n\x05\x61ttrs\x18\x07 \x03(\x0b\x32 .visualdl.framework.VarDesc.Attr\x1a\x64\n\x04\x41ttr\x12\x0c\n\x04name\x18\x01 \x01(\t\x12*\n\x04type\x18\x02 \x01(\x0e\x32\x1c.visualdl.framework.AttrType\x12\t\n\x01i\x18\x03 \x01(\x05\x12\t\n\x01s\x18\x04 \x01(\t\x12\x0c\n\x04ints\x18\x05 \x03(\x05\"\x9f\x01\n\tBlockDesc\x12\x0b\n\x03idx\x18\x01 \x01(\x05\x12\x12\n\nparent_idx\x18\x02 \x01(\x05\x12)\n\x04vars\x18\x03 \x03(\x0b\x32\x1b.visualdl.framework.VarDesc\x12\'\n\x03ops\x18\x04 \x03(\x0b\x32\x1a.visualdl.framework.OpDesc\x12\x1d\n\x11\x66orward_block_idx\x18\x05 \x01(\x05:\x02-1\"\x1c\n\tOpVersion\x12\x0f\n\x07version\x18\x01 \x01(\x05\"\xa1\x01\n\x0cOpVersionMap\x12<\n\x04pair\x18\x01 \x03(\x0b\x32..visualdl.framework.OpVersionMap.OpVersionPair\x1aS\n\rOpVersionPair\x12\x0f\n\x07op_name\x18\x01 \x01(\t\x12\x31\n\nop_version\x18\x02 \x01(\x0b\x32\x1d.visualdl.framework.OpVersion\"\xb0\x01\n\x0bProgramDesc\x12-\n\x06\x62locks\x18\x01 \x03(\x0b\x32\x1d.visualdl.framework.BlockDesc\x12,\n\x07version\x18\x04 \x01(\x0b\x32\x1b.visualdl.framework.Version\x12\x38\n\x0eop_version_map\x18\x05 \x01(\x0b\x32 .visualdl.framework.OpVersionMapJ\x04\x08\x02\x10\x03J\x04\x08\x03\x10\x04*\xdb\x01\n\x08\x41ttrType\x12\x07\n\x03INT\x10\x00\x12\t\n\x05\x46LOAT\x10\x01\x12\n\n\x06STRING\x10\x02\x12\x08\n\x04INTS\x10\x03\x12\n\n\x06\x46LOATS\x10\x04\x12\x0b\n\x07STRINGS\x10\x05\x12\x0b\n\x07\x42OOLEAN\x10\x06\x12\x0c\n\x08\x42OOLEANS\x10\x07\x12\t\n\x05\x42LOCK\x10\x08\x12\x08\n\x04LONG\x10\t\x12\n\n\x06\x42LOCKS\x10\n\x12\t\n\x05LONGS\x10\x0b\x12\x0c\n\x08\x46LOAT64S\x10\x0c\x12\x07\n\x03VAR\x10\r\x12\x08\n\x04VARS\x10\x0e\x12\x0b\n\x07\x46LOAT64\x10\x0f\x12\n\n\x06SCALAR\x10\x10\x12\x0b\n\x07SCALARS\x10\x11'
+)
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR,
+                                        'visualdl.proto.framework_pb2',
+                                        globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+    DESCRIPTOR._options = None
+    _ATTRTYPE._serialized_start = 3352
+    _ATTRTYPE._serialized_end = 3571
+    _VERSION._serialized_start = 54
+    _VERSION._serialized_end = 83
+    _COMPLEX._serialized_start = 85
+    _COMPLEX._serialized_end = 116
+    _SCALAR._serialized_start = 119
+    _SCALAR._serialized_end = 307
+    _SCALAR_TYPE._serialized_start = 249
+    _SCALAR_TYPE._serialized_end = 307
+    _OPDESC._serialized_start = 310
+    _OPDESC._serialized_end = 947
+    _OPDESC_ATTR._serialized_start = 506
+    _OPDESC_ATTR._serialized_end = 902
+    _OPDESC_VAR._serialized_start = 904
+    _OPDESC_VAR._serialized_end = 947
+    _VARTYPE._serialized_start = 950
+    _VARTYPE._serialized_end = 2475
+    _VARTYPE_TENSORDESC._serialized_start = 1599
+    _VARTYPE_TENSORDESC._serialized_end = 1678
+    _VARTYPE_LODTENSORDESC._serialized_start = 1680
+    _VARTYPE_LODTENSORDESC._serialized_end = 1773
+    _VARTYPE_LODTENSORARRAYDESC._serialized_start = 1775
+    _VARTYPE_LODTENSORARRAYDESC._serialized_end = 1873
+    _VARTYPE_READERDESC._serialized_start = 1875
+    _VARTYPE_READERDESC._serialized_end = 1950
+    _VARTYPE_TUPLE._serialized_start = 1952
+    _VARTYPE_TUPLE._serialized_end = 2015
+    _VARTYPE_TYPE._serialized_start = 2018
+    _VARTYPE_TYPE._serialized_end = 2475
+    _VARDESC._serialized_start = 2478
+    _VARDESC._serialized_end = 2814
+    _VARDESC_ATTR._serialized_start = 2714
+    _VARDESC_ATTR._serialized_end = 2814
+    _BLOCKDESC._serialized_start = 2817
+    _BLOCKDESC._serialized_end = 2976
+    _OPVERSION._serialized_start = 2978
+    _OPVERSION._serialized_end = 3006
+    _OPVERSIONMAP._serialized_start = 3009
+    _OPVERSIONMAP._serialized_end = 3170
+    _OPVERSIONMAP_OPVERSIONPAIR._serialized_start = 3087
+    _OPVERSIONMAP_OPVERSIONPAIR._serialized_end = 3170
+    _PROGRAMDESC._serialized_start = 3173
+    _PROGRAMDESC._serialized_end = 3349
+# @@protoc_insertion_point(module_scope)
@@ -13,14 +13,37 @@
 # limitations under the License.
 # =======================================================================
 
+import collections
+import sys
+import threading
 import time
 
+# Default maximum bytes of cached values.
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def sizeof(value):
+    """Estimate memory size of a cached value in bytes.
+
+    Containers are measured recursively, numpy arrays by their buffers.
+    """
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(sizeof(item) for item in value)
+    return size
+
 
 class MemCache(object):
     class Record:
-        def __init__(self, value):
+        def __init__(self, value, size=0):
             self.time = time.time()
             self.value = value
+            self.size = size
 
         def clear(self):
             self.value = None
@@ -28,27 +51,116 @@ class MemCache(object):
         def expired(self, timeout):
             return timeout > 0 and time.time() - self.time >= timeout
 
+    class _Flight:
+        def __init__(self):
+            self.event = threading.Event()
+            self.value = None
+            self.error = None
+
     '''
-    A global dict to help cache some temporary data.
+    A thread-safe LRU cache bounded by total bytes of values.
+
+    Least recently used values are evicted when total size exceeds
+    `max_bytes`, and expired values are deleted when accessed.
     '''
 
-    def __init__(self, timeout=-1):
+    def __init__(self, timeout=-1, max_bytes=DEFAULT_MAX_BYTES):
         self._timeout = timeout
-        self._data = {}
+        self._max_bytes = max_bytes
+        self._data = collections.OrderedDict()
+        self._bytes = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
 
-    def set(self, key, value):
-        self._data[key] = MemCache.Record(value)
+    def _delete(self, key):
+        rcd = self._data.pop(key)
+        self._bytes -= rcd.size
 
-    def get(self, key):
+    def _get(self, key):
         rcd = self._data.get(key, None)
-        if not rcd:
+        if rcd is None:
+            self._misses += 1
             return None
-        # do not delete the key to accelerate speed
         if rcd.expired(self._timeout):
-            rcd.clear()
+            self._delete(key)
+            self._expirations += 1
+            self._misses += 1
             return None
+        self._data.move_to_end(key)
+        self._hits += 1
         return rcd.value
 
+    def _set(self, key, value):
+        if key in self._data:
+            self._delete(key)
+        size = sizeof(value)
+        if 0 < self._max_bytes < size:
+            # Value larger than the whole cache is not cached.
+            self._evictions += 1
+            return
+        self._data[key] = MemCache.Record(value, size)
+        self._bytes += size
+        while 0 < self._max_bytes < self._bytes:
+            self._delete(next(iter(self._data)))
+            self._evictions += 1
+
+    def set(self, key, value):
+        with self._lock:
+            self._set(key, value)
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def get_or_compute(self, key, func, *args, **kwargs):
+        """Get value of key, or compute it by `func` if missing.
+
+        Only one thread computes the value of a key at a time, other threads
+        requesting the same key wait for its result. Value of None is not
+        cached.
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is not None:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = MemCache._Flight()
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = func(*args, **kwargs)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.value is not None:
+                    self._set(key, flight.value)
+                del self._flights[key]
+            flight.event.set()
+        return flight.value
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'keys': len(self._data),
+                'bytes': self._bytes,
+                'max_bytes': self._max_bytes
+            }
+
 
 if __name__ == '__main__':
     import unittest
@@ -70,4 +182,34 @@ if __name__ == '__main__':
             self.assertFalse(self.cache.get('message'))
             self.assertTrue(self.cache.get("message") is None)
 
+        def test_evict(self):
+            cache = MemCache(max_bytes=sizeof(b'x' * 100) * 2)
+            cache.set('a', b'x' * 100)
+            cache.set('b', b'x' * 100)
+            self.assertTrue(cache.get('a'))
+            cache.set('c', b'x' * 100)
+            self.assertTrue(cache.get('b') is None)
+            self.assertTrue(cache.get('a'))
+            self.assertEqual(cache.get_stats()['evictions'], 1)
+
+        def test_single_flight(self):
+            calls = []
+
+            def compute():
+                calls.append(1)
+                time.sleep(0.2)
+                return 'value'
+
+            threads = [
+                threading.Thread(
+                    target=self.cache.get_or_compute, args=('key', compute))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(self.cache.get('key'), 'value')
+
     unittest.main()
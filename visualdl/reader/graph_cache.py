@@ -0,0 +1,148 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import hashlib
+import json
+import os
+import struct
+
+from visualdl.component.graph import analyse_model
+from visualdl.server.log import logger
+
+# Format of graph cache file: (little-endian)
+# byte      magic[8]
+# uint32    version
+# byte      graph data returned by `analyse_model` as json
+#
+# Bump version whenever output of `analyse_model` changes, so that stale
+# cache files are ignored and analysed again. Graph data is plain data, so
+# that loading a cache file never runs code.
+GRAPH_CACHE_MAGIC = b'VDLGRAPH'
+GRAPH_CACHE_VERSION = 3
+_HEADER = struct.Struct('<8sI')
+
+# Max total size in bytes of cache files, least recently used ones are
+# removed when exceeded.
+DEFAULT_GRAPH_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+
+def get_graph_cache_path(cache_dir, content):
+    """Get path of cache file for content of model file.
+
+    Args:
+        cache_dir: Directory to store cache files.
+        content: Bytes of model file, cache is keyed by its hash, so that
+            same model in different runs or with new name shares cache.
+    """
+    digest = hashlib.sha1(content).hexdigest()
+    return os.path.join(cache_dir, 'vdlgraph.{}.json'.format(digest))
+
+
+def save_graph_cache(path, graph_data):
+    """Save analysed graph data to cache file atomically."""
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname, exist_ok=True)
+    temp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temp_path, 'wb') as fp:
+        fp.write(_HEADER.pack(GRAPH_CACHE_MAGIC, GRAPH_CACHE_VERSION))
+        fp.write(json.dumps(graph_data).encode())
+    os.replace(temp_path, path)
+
+
+def load_graph_cache(path):
+    """Load analysed graph data from cache file.
+
+    Returns:
+        Graph data saved by `save_graph_cache`, or None if cache file not
+        exists or is invalid.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as fp:
+            magic, version = _HEADER.unpack(fp.read(_HEADER.size))
+            if magic != GRAPH_CACHE_MAGIC or version != GRAPH_CACHE_VERSION:
+                return None
+            return json.loads(fp.read().decode())
+    except Exception as e:
+        logger.error('Failed to load graph cache `{}`: {}'.format(path, e))
+        return None
+
+
+def evict_graph_cache(cache_dir, max_size, keep=None):
+    """Remove least recently used cache files until their total size is not
+    larger than `max_size`.
+
+    Args:
+        cache_dir: Directory of cache files.
+        max_size: Max total size in bytes of cache files.
+        keep: Path of cache file never removed, e.g. the one just saved.
+    """
+    files = []
+    total_size = 0
+    for filename in os.listdir(cache_dir):
+        # Files of older versions are named `.pkl`.
+        if not (filename.startswith('vdlgraph.')
+                and filename.endswith(('.json', '.pkl'))):
+            continue
+        path = os.path.join(cache_dir, filename)
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((file_stat.st_mtime, file_stat.st_size, path))
+        total_size += file_stat.st_size
+    for _, size, path in sorted(files):
+        if total_size <= max_size:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total_size -= size
+        except OSError:
+            pass
+
+
+def analyse_model_cached(content,
+                         cache_dir,
+                         max_size=DEFAULT_GRAPH_CACHE_MAX_SIZE):
+    """Analyse content of `.pdmodel` file by `analyse_model`, or load graph
+    data from cache in `cache_dir` if the same content is analysed before,
+    so that large model is not analysed again.
+
+    Args:
+        content: Bytes of model file.
+        cache_dir: Directory of cache files, cache is disabled if None.
+        max_size: Max total size in bytes of cache files.
+    """
+    if not cache_dir:
+        return analyse_model(content)
+    path = get_graph_cache_path(cache_dir, content)
+    graph_data = load_graph_cache(path)
+    if graph_data is not None:
+        try:
+            # Mtime is the last used time for eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        return graph_data
+    graph_data = analyse_model(content)
+    try:
+        save_graph_cache(path, graph_data)
+        evict_graph_cache(cache_dir, max_size, keep=path)
+    except Exception as e:
+        logger.error('Failed to save graph cache `{}`: {}'.format(path, e))
+    return graph_data
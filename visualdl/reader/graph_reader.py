@@ -12,12 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =======================================================================
+import contextlib
+import copy
+import gc
 import json
 import os
+import threading
 
-from visualdl.component.graph import analyse_model
 from visualdl.component.graph import Model
 from visualdl.io import bfile
+from visualdl.reader.graph_cache import analyse_model_cached
+from visualdl.reader.graph_cache import DEFAULT_GRAPH_CACHE_MAX_SIZE
+from visualdl.utils.dir import GRAPH_CACHE_PATH
 
 
 def is_VDLGraph_file(path):
@@ -35,15 +41,59 @@ def is_VDLGraph_file(path):
     return True
 
 
+# Threshold of generation 0 of garbage collection when building graph.
+_BUILDING_GC_THRESHOLD = 100000
+_gc_lock = threading.Lock()
+# Number of graphs being built, and thresholds of gc before the first one.
+_gc_builds = 0
+_gc_threshold = None
+
+
+@contextlib.contextmanager
+def _defer_gc():
+    """Defer garbage collection when building graph.
+
+    Graph of large model has millions of containers without reference
+    cycles, building it triggers garbage collection repeatedly, which
+    traverses all of them and takes most of the time. Collection is made
+    less frequent instead of disabled, so that other threads still collect
+    garbage, and thresholds are restored after the last of concurrent builds
+    ends. Built graph is frozen, so that later collections skip it.
+    """
+    global _gc_builds, _gc_threshold
+    with _gc_lock:
+        if _gc_builds == 0:
+            _gc_threshold = gc.get_threshold()
+            gc.set_threshold(
+                max(_gc_threshold[0], _BUILDING_GC_THRESHOLD),
+                *_gc_threshold[1:])
+        _gc_builds += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_builds -= 1
+            if _gc_builds == 0:
+                gc.set_threshold(*_gc_threshold)
+        gc.freeze()
+
+
 class GraphReader(object):
     """Graph reader to read vdl graph files, support for frontend api in lib.py.
     """
 
-    def __init__(self, logdir=''):
+    def __init__(self,
+                 logdir='',
+                 cache_dir=GRAPH_CACHE_PATH,
+                 cache_max_size=DEFAULT_GRAPH_CACHE_MAX_SIZE):
         """Instance of GraphReader
 
         Args:
             logdir: The dir include vdl graph files, multiple subfolders allowed.
+            cache_dir: The dir to cache analysed `.pdmodel` files in logdir,
+                None to disable cache. Uploaded files are never cached.
+            cache_max_size: Max total size in bytes of cache files, least
+                recently used ones are removed when exceeded.
         """
         if isinstance(logdir, str):
             self.dir = [logdir]
@@ -55,6 +105,11 @@ class GraphReader(object):
         self.runs2displayname = {}
         self.graph_buffer = {}
         self.walks_buffer = {}
+        self.cache_dir = cache_dir
+        self.cache_max_size = cache_max_size
+        # Parsed models shared by forked readers, keyed by (run, filename).
+        self._models = {}
+        self._models_lock = threading.Lock()
 
     @property
     def logdir(self):
@@ -111,84 +166,101 @@ class GraphReader(object):
             self.walks.keys()) + ['manual_input_model']
         return sorted(graph_runs)
 
+    def fork(self):
+        """Get a reader for another client.
+
+        Parsed models are shared with this reader, only visibility state of
+        graphs is copied, so that serving many clients does not copy graphs.
+        """
+        reader = copy.copy(self)
+        reader.walks = dict(self.walks)
+        reader.walks_buffer = dict(self.walks_buffer)
+        reader.graph_buffer = {
+            run: model.fork()
+            for run, model in self.graph_buffer.items()
+        }
+        return reader
+
+    def _get_model(self, run):
+        """Get model of run with visibility state of this reader.
+
+        Returns:
+            Model of graph file of run, or None if run has no graph file.
+        """
+        if run == 'manual_input_model':
+            return self.graph_buffer.get(run)
+        if run not in self.walks:
+            return None
+        if self.walks_buffer.get(run) != self.walks[run]:
+            key = (run, self.walks[run])
+            with self._models_lock:
+                model = self._models.get(key)
+                if model is None:
+                    model = self._load_model(run, self.walks[run])
+                    for stale_key in [k for k in self._models if k[0] == run]:
+                        del self._models[stale_key]
+                    self._models[key] = model
+            self.graph_buffer[run] = model.fork()
+            self.walks_buffer[run] = self.walks[run]
+        return self.graph_buffer[run]
+
+    def _load_model(self, run, filename):
+        data = bfile.BFile(bfile.join(run, filename), 'rb').read()
+        with _defer_gc():
+            if 'pdmodel' in filename:
+                return Model(
+                    analyse_model_cached(data, self.cache_dir,
+                                         self.cache_max_size))
+            return Model(json.loads(data.decode()))
+
     def get_graph(self,
                   run,
                   nodeid=None,
                   expand=False,
                   keep_state=False,
                   expand_all=False,
-                  refresh=False):
-        if run == 'manual_input_model' and run in self.graph_buffer:
-            graph_model = self.graph_buffer[run]
-            if nodeid is not None:
-                graph_model.adjust_visible(nodeid, expand, keep_state)
-            return graph_model.make_graph(
-                refresh=refresh, expand_all=expand_all)
-        if run in self.walks:
-            if run in self.walks_buffer:
-                if self.walks[run] == self.walks_buffer[run]:
-                    graph_model = self.graph_buffer[run]
-                    if nodeid is not None:
-                        graph_model.adjust_visible(nodeid, expand, keep_state)
-                    return graph_model.make_graph(
-                        refresh=refresh, expand_all=expand_all)
-
-            data = bfile.BFile(bfile.join(run, self.walks[run]), 'rb').read()
-            if 'pdmodel' in self.walks[run]:
-                graph_model = Model(analyse_model(data))
-            else:
-                graph_model = Model(json.loads(data.decode()))
-            self.graph_buffer[run] = graph_model
-            self.walks_buffer[run] = self.walks[run]
-            if nodeid is not None:
-                graph_model.adjust_visible(nodeid, expand, keep_state)
-            return graph_model.make_graph(
-                refresh=refresh, expand_all=expand_all)
-
-    def search_graph_node(self, run, nodeid, keep_state=False, is_node=True):
-        if run == 'manual_input_model' and run in self.graph_buffer:
-            graph_model = self.graph_buffer[run]
-            graph_model.adjust_search_node_visible(
-                nodeid, keep_state=keep_state, is_node=is_node)
-            return graph_model.make_graph(refresh=False, expand_all=False)
-        if run in self.walks:
-            if run in self.walks_buffer:
-                if self.walks[run] == self.walks_buffer[run]:
-                    graph_model = self.graph_buffer[run]
-                    graph_model.adjust_search_node_visible(
-                        nodeid, keep_state=keep_state, is_node=is_node)
-                    return graph_model.make_graph(
-                        refresh=False, expand_all=False)
-
-            data = bfile.BFile(bfile.join(run, self.walks[run]), 'rb').read()
-            if 'pdmodel' in self.walks[run]:
-                graph_model = Model(analyse_model(data))
-            else:
-                graph_model = Model(json.loads(data.decode()))
-            self.graph_buffer[run] = graph_model
-            self.walks_buffer[run] = self.walks[run]
-            graph_model.adjust_search_node_visible(
-                nodeid, keep_state=keep_state, is_node=is_node)
-            return graph_model.make_graph(refresh=False, expand_all=False)
+                  refresh=False,
+                  since_version=None):
+        """Get graph of run after adjusting visibility of node `nodeid`.
+
+        If `since_version` is given, only nodes shown and hidden since graph
+        of the version are returned, see `Model.make_graph_diff`.
+        """
+        graph_model = self._get_model(run)
+        if graph_model is None:
+            return None
+        if nodeid is not None:
+            graph_model.adjust_visible(nodeid, expand, keep_state)
+        if since_version is not None:
+            return graph_model.make_graph_diff(since_version)
+        return graph_model.make_graph(refresh=refresh, expand_all=expand_all)
+
+    def search_graph_node(self,
+                          run,
+                          nodeid,
+                          keep_state=False,
+                          is_node=True,
+                          since_version=None):
+        graph_model = self._get_model(run)
+        if graph_model is None:
+            return None
+        graph_model.adjust_search_node_visible(
+            nodeid, keep_state=keep_state, is_node=is_node)
+        if since_version is not None:
+            return graph_model.make_graph_diff(since_version)
+        return graph_model.make_graph(refresh=False, expand_all=False)
 
     def get_all_nodes(self, run):
-        if run == 'manual_input_model' and run in self.graph_buffer:
-            graph_model = self.graph_buffer[run]
-            return graph_model.get_all_leaf_nodes()
-        if run in self.walks:
-            if run in self.walks_buffer:
-                if self.walks[run] == self.walks_buffer[run]:
-                    graph_model = self.graph_buffer[run]
-                    return graph_model.get_all_leaf_nodes()
-
-            data = bfile.BFile(bfile.join(run, self.walks[run]), 'rb').read()
-            if 'pdmodel' in self.walks[run]:
-                graph_model = Model(analyse_model(data))
-            else:
-                graph_model = Model(json.loads(data.decode()))
-            self.graph_buffer[run] = graph_model
-            self.walks_buffer[run] = self.walks[run]
-            return graph_model.get_all_leaf_nodes()
+        graph_model = self._get_model(run)
+        if graph_model is None:
+            return None
+        return graph_model.get_all_leaf_nodes()
+
+    def find_graph_nodes(self, run, query, offset=0, limit=20):
+        graph_model = self._get_model(run)
+        if graph_model is None:
+            return None
+        return graph_model.find(query, offset, limit)
 
     def set_displayname(self, log_reader):
         self.displayname2runs = log_reader.name2tags
@@ -201,7 +273,9 @@ class GraphReader(object):
         pass
 
     def set_input_graph(self, content, file_type='pdmodel'):
+        cache_dir = None
         if isinstance(content, str):
+            cache_dir = self.cache_dir
             if not is_VDLGraph_file(content):
                 return
             if 'pdmodel' in content:
@@ -211,12 +285,15 @@ class GraphReader(object):
             content = bfile.BFile(content, 'rb').read()
 
         if file_type == 'pdmodel':
-            data = analyse_model(content)
-            self.graph_buffer['manual_input_model'] = Model(data)
+            with _defer_gc():
+                data = analyse_model_cached(content, cache_dir,
+                                            self.cache_max_size)
+                self.graph_buffer['manual_input_model'] = Model(data)
 
         elif file_type == 'vdlgraph':
-            self.graph_buffer['manual_input_model'] = Model(
-                json.loads(content.decode()))
+            with _defer_gc():
+                self.graph_buffer['manual_input_model'] = Model(
+                    json.loads(content.decode()))
 
         else:
             return
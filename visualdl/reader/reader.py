@@ -13,17 +13,44 @@
 # limitations under the License.
 # =======================================================================
 import collections
-import os  # noqa: F401
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial  # noqa: F401
 
+import numpy as np
+
 from visualdl.component import components
 from visualdl.io import bfile
 from visualdl.proto import record_pb2
+from visualdl.reader import snapshot
 from visualdl.reader.record_reader import RecordReader
+from visualdl.server.data_manager import bucket_from_state
 from visualdl.server.data_manager import default_data_manager
+from visualdl.server.log import logger
+from visualdl.utils.record_index import is_index_file
 from visualdl.utils.string_util import decode_tag
 from visualdl.utils.string_util import encode_tag
 
+# Maps value type in `Record.Value` to component.
+VALUE_COMPONENTS = {
+    "value": "scalar",
+    "image": "image",
+    "embeddings": "embeddings",
+    "bytes_embeddings": "embeddings",
+    "audio": "audio",
+    "histogram": "histogram",
+    "pr_curve": "pr_curve",
+    "roc_curve": "roc_curve",
+    "meta_data": "meta_data",
+    "text": "text",
+    "hparam": "hyper_parameters",
+    "tag_value": "scalars"
+}
+
 
 def is_VDLRecord_file(path, check=False):
     """Determine whether it is a VDL log file according to the file name.
@@ -37,7 +64,7 @@ def is_VDLRecord_file(path, check=False):
     Returns:
         True if the file is a VDL log file, otherwise false.
     """
-    if "vdlrecords" not in path:
+    if "vdlrecords" not in path or is_index_file(path):
         return False
     if check:
         _reader = RecordReader(filepath=path)
@@ -49,16 +76,115 @@ def is_VDLRecord_file(path, check=False):
     return True
 
 
+def load_log_file(filepath, offset=0):
+    """Read and decode records of log file from `offset`.
+
+    Run in worker processes for parallel ingestion, scalar data is returned
+    as compact numpy arrays rather than protobuf objects.
+
+    Args:
+        filepath: Path of vdl log file.
+        offset: Byte offset of the first record to read.
+
+    Returns:
+        A tuple of (offset, scalars, values). `offset` is where next read
+        starts, `scalars` is a dict maps (tag, sub_tag) to arrays of steps,
+        timestamps and values, sub_tag is None for `scalar` data. `values`
+        is a list of other serialized `Record.Value` in order.
+    """
+    reader = RecordReader(filepath=filepath)
+    reader.seek(offset)
+    scalars = collections.OrderedDict()
+    values = []
+    for record_bin in reader.get_remain():
+        record = record_pb2.Record()
+        record.ParseFromString(record_bin)
+        for value in record.values:
+            value_type = value.WhichOneof("one_value")
+            if "value" == value_type:
+                key = (value.tag, None)
+                scalar = value.value
+            elif "tag_value" == value_type:
+                key = (value.tag, value.tag_value.tag)
+                scalar = value.tag_value.value
+            else:
+                values.append(value.SerializeToString())
+                continue
+            if key not in scalars:
+                scalars[key] = ([], [], [])
+            steps, timestamps, scalar_values = scalars[key]
+            steps.append(value.id)
+            timestamps.append(value.timestamp)
+            scalar_values.append(scalar)
+    for key, (steps, timestamps, scalar_values) in scalars.items():
+        scalars[key] = (np.array(steps, dtype=np.int64),
+                        np.array(timestamps, dtype=np.int64),
+                        np.array(scalar_values, dtype=np.float32))
+    return reader.offset, scalars, values
+
+
+class _LogReloaderThread(threading.Thread):
+    """Load new data of log reader in background every `reload_interval`
+    seconds, so that requests can be served without touching filesystem.
+    """
+
+    def __init__(self, log_reader, reload_interval):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self._log_reader = log_reader
+        self._reload_interval = reload_interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def run(self):
+        while not self._stop_event.wait(self._reload_interval):
+            try:
+                self._log_reader._load_new_data(update=True)
+            except Exception as e:
+                # keep reloading, the error may be caused by unfinished
+                # writing or unstable filesystem.
+                logger.error('Failed to reload logs, error: {}'.format(e))
+
+
 class LogReader(object):
     """Log reader to read vdl log, support for frontend api in lib.py.
 
     """
 
-    def __init__(self, logdir='', file_path=''):
+    def __init__(self,
+                 logdir='',
+                 file_path='',
+                 reload_interval=None,
+                 ingest_workers=0,
+                 snapshot_dir=None,
+                 snapshot_interval=60,
+                 snapshot_only=False,
+                 scalar_series_size=None):
         """Instance of LogReader
 
         Args:
             logdir: The dir include vdl log files, multiple subfolders allowed.
+            reload_interval: If set, walk `logdir` and load new data every
+                `reload_interval` seconds in a background thread, and
+                `load_new_data` will return immediately without touching
+                filesystem.
+            ingest_workers: If greater than 1, log files of different runs
+                are read and decoded in a pool of `ingest_workers` processes.
+            snapshot_dir: If set, loaded data and read offsets of log files
+                are saved to a snapshot in this directory at most every
+                `snapshot_interval` seconds and when closed, and restored
+                when created, so that only new records are read.
+            snapshot_interval: Min interval in seconds to save snapshot.
+            snapshot_only: If True, log files are never read, but data is
+                loaded from snapshot in `snapshot_dir` whenever it is saved
+                by another LogReader of the same `logdir`, so that many
+                processes can serve data loaded by one process.
+            scalar_series_size: If set, maximum number of points of scalar
+                series kept for each tag to downsample data in step range,
+                0 to disable it.
         """
         if isinstance(logdir, str):
             self.dir = [logdir]
@@ -73,6 +199,27 @@ class LogReader(object):
         self.tags2name = {}
 
         self.file_readers = {}
+        # {filepath: (size, mtime)} of log files when last read.
+        self._file_stats = {}
+        self._load_lock = threading.Lock()
+        self._reloader = None
+        self._ingest_workers = ingest_workers
+        self._ingest_executor = None
+        self._snapshot_path = snapshot.get_snapshot_path(
+            snapshot_dir, self.dir) if snapshot_dir and logdir else None
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_time = time.time()
+        self._snapshot_dirty = False
+        self._snapshot_only = bool(snapshot_only and self._snapshot_path)
+        # (mtime, size) of snapshot file when last loaded.
+        self._snapshot_stat = None
+        # {(plugin, key): version} of buckets saved to snapshot.
+        self._snapshot_versions = {}
+        # {(plugin, key): (version, bucket)} of buckets loaded from snapshot.
+        self._snapshot_buckets = {}
+        # Identity of loaded data, versions of data are only comparable with
+        # the same identity.
+        self.instance_id = uuid.uuid4().hex[:8]
 
         # {'run': {'scalar': {'tag1': data, 'tag2': data}}}
         self._log_datas = collections.defaultdict(
@@ -90,10 +237,17 @@ class LogReader(object):
                 exec("self.get_%s=partial(self.get_data, '%s')" % (name, name))
         elif logdir:
             self.data_manager = default_data_manager
+            if self._snapshot_path and not self._snapshot_only:
+                self._restore_snapshot()
+            if scalar_series_size is not None:
+                self.data_manager.set_scalar_series_size(scalar_series_size)
             self.load_new_data(update=True)
             self._a_tags = {}
 
             self._model = ""
+            if reload_interval:
+                self._reloader = _LogReloaderThread(self, reload_interval)
+                self._reloader.start()
 
     @property
     def model(self):
@@ -143,21 +297,68 @@ class LogReader(object):
 
         return log_tags
 
-    def get_log_data(self, component, run, tag):
+    def get_log_data(self, component, run, tag, start_step=None,
+                     end_step=None):
+        """Get all data of `tag` without sampling.
+
+        If log file has a sidecar index, only records in step range will be
+        read from log file, otherwise the whole log file is scanned.
+
+        Args:
+            component: Component type of `tag`.
+            run: Run of `tag`.
+            tag: Decoded tag of data.
+            start_step: Minimum step included, no limit if None.
+            end_step: Maximum step included, no limit if None.
+        """
+        step_range = (start_step, end_step)
         if (run in self._log_datas.keys()
                 and component in self._log_datas[run].keys()
-                and tag in self._log_datas[run][component].keys()):
-            return self._log_datas[run][component][tag]
+                and (tag, step_range) in self._log_datas[run][component].keys()):
+            return self._log_datas[run][component][(tag, step_range)]
         else:
             file_path = bfile.join(run, self.walks[run])
             reader = self._get_file_reader(file_path=file_path, update=False)
-            remain = self.get_remain(reader=reader)
-            data = self.read_log_data(
-                remain=remain, update=False)[component][tag]
+            if reader.get_index() is not None:
+                remain = reader.get_records(encode_tag(tag), start_step,
+                                            end_step)
+            else:
+                remain = self.get_remain(reader=reader)
+            with self._load_lock:
+                data = self.read_log_data(
+                    remain=remain, update=False)[component][tag]
+            data = [
+                item for item in data
+                if (start_step is None or item.id >= start_step) and (
+                    end_step is None or item.id <= end_step)
+            ]
             data = self.parsing_from_proto(component, data)
-            self._log_datas[run][component][tag] = data
+            self._log_datas[run][component][(tag, step_range)] = data
             return data
 
+    def iter_log_data(self, component, run, tag, start_step=None,
+                      end_step=None):
+        """Same as `get_log_data`, but yield data one by one and do not
+        cache it, so that data of a large log file is never held in memory
+        at once.
+
+        Only records contain `tag` are read from log file by index. If log
+        file has no sidecar index, it is built by scanning log file once.
+        """
+        file_path = bfile.join(run, self.walks[run])
+        reader = self._get_file_reader(file_path=file_path, update=False)
+        for record_bin in reader.iter_records(encode_tag(tag), start_step,
+                                              end_step):
+            record = record_pb2.Record()
+            record.ParseFromString(record_bin)
+            for value in record.values:
+                if decode_tag(value.tag) != tag or VALUE_COMPONENTS.get(
+                        value.WhichOneof("one_value")) != component:
+                    continue
+                if (start_step is None or value.id >= start_step) and (
+                        end_step is None or value.id <= end_step):
+                    yield self.parsing_from_proto(component, [value])[0]
+
     def get_tags(self):
         return self._get_log_tags()
 
@@ -167,43 +368,40 @@ class LogReader(object):
     def parse_from_bin(self, record_bin):
         """Register to self._tags by component type.
 
+        Only the first value of record is parsed, use `parse_records_from_bin`
+        for records with multi values.
+
         Args:
             record_bin: Binary data from vdl log file.
         """
         record = record_pb2.Record()
         record.ParseFromString(record_bin)
-        value = record.values[0]
+        return self._parse_value(record, record.values[0])
+
+    def parse_records_from_bin(self, record_bin):
+        """Register to self._tags by component type for all values in record.
+
+        Args:
+            record_bin: Binary data from vdl log file.
+
+        Returns:
+            A list of (component, dir, tag, value) for each value.
+        """
+        record = record_pb2.Record()
+        record.ParseFromString(record_bin)
+        return [self._parse_value(record, value) for value in record.values]
+
+    def _parse_value(self, record, value):
         tag = decode_tag(value.tag)
         path = bfile.join(self.reader.dir, tag)
 
         if path not in self._tags.keys():
             value_type = value.WhichOneof("one_value")
-            if "value" == value_type:
-                component = "scalar"
-            elif "image" == value_type:
-                component = "image"
-            elif "embeddings" == value_type:
-                component = "embeddings"
-            elif "audio" == value_type:
-                component = "audio"
-            elif "histogram" == value_type:
-                component = "histogram"
-            elif "pr_curve" == value_type:
-                component = "pr_curve"
-            elif "roc_curve" == value_type:
-                component = "roc_curve"
-            elif "meta_data" == value_type:
-                self.update_meta_data(record)
-                component = "meta_data"
-            elif "text" == value_type:
-                component = "text"
-            elif "hparam" == value_type:
-                component = "hyper_parameters"
-            elif "tag_value" == value_type:
-                component = "scalars"
-            else:
+            if value_type not in VALUE_COMPONENTS:
                 raise TypeError("Invalid value type `%s`." % value_type)
-            self._tags[path] = component
+            if "meta_data" == value_type:
+                self.update_meta_data(record)
+            self._tags[path] = VALUE_COMPONENTS[value_type]
 
         return self._tags[path], self.reader.dir, tag, value
 
@@ -213,11 +411,15 @@ class LogReader(object):
             self.name2tags[meta.display_name] = self.reader.dir
             self.tags2name[self.reader.dir] = meta.display_name
 
-    def get_all_walk(self):
-        self.walks = {}
+    def _walk_logdirs(self):
+        walks = {}
         for dir in self.dir:
             for root, dirs, files in bfile.walk(dir):
-                self.walks.update({root: files})
+                walks.update({root: files})
+        return walks
+
+    def get_all_walk(self):
+        self.walks = self._walk_logdirs()
 
     def logs(self, update=False):
         """Get logs.
@@ -229,10 +431,8 @@ class LogReader(object):
                                 "exp2": "vdlrecords.1587375685.log"}
         """
         if self.walks is None or update is True:
-            self.get_all_walk()
-
             walks_temp = {}
-            for run, tags in self.walks.items():
+            for run, tags in self._walk_logdirs().items():
                 tags_temp = [tag for tag in tags if is_VDLRecord_file(tag)]
                 tags_temp.sort(reverse=True)
                 if len(tags_temp) > 0:
@@ -300,20 +500,108 @@ class LogReader(object):
             filepath = bfile.join(dir, path)
             self.register_reader(filepath, dir)
 
+    def _get_file_stat(self, reader):
+        """Get stat of log file of `reader`, or None if the filesystem can
+        not tell it.
+        """
+        try:
+            return bfile.stat(reader.filepath)
+        except Exception:
+            return None
+
+    def _is_file_modified(self, reader, file_stat):
+        """Determine whether log file of `reader` changed since last read.
+
+        Always return True if the filesystem can not tell it.
+        """
+        if file_stat is None:
+            return True
+        return self._file_stats.get(reader.filepath) != file_stat
+
+    def _mark_file_read(self, reader, file_stat):
+        """Record stat of log file got before it is read, only if all data
+        of it is read, so that file failed to read or read partially is read
+        again on next reload even if it is not changed any more.
+        """
+        if file_stat is not None and reader.offset >= file_stat[0]:
+            self._file_stats[reader.filepath] = file_stat
+        else:
+            self._file_stats.pop(reader.filepath, None)
+
     def add_remain(self):
         """Add remain data to data_manager.
 
         Add remain data to data manager according its component type and tag
         one by one.
         """
-        for reader in self.readers.values():
+        readers = []
+        for reader in list(self.readers.values()):
+            file_stat = self._get_file_stat(reader)
+            if self._is_file_modified(reader, file_stat):
+                readers.append((reader, file_stat))
+        if readers:
+            self._snapshot_dirty = True
+        if self._ingest_workers > 1 and len(readers) > 1:
+            self._add_remain_parallel(readers)
+            return
+        for reader, file_stat in readers:
             self.reader = reader
-            remain = self.reader.get_remain()
+            offset = reader.offset
+            try:
+                remain = self.reader.get_remain()
+            except Exception:
+                # Records read before failure are dropped, read them again.
+                reader.seek(offset)
+                raise
             for item in remain:
-                component, dir, tag, record = self.parse_from_bin(item)
-
-                self.data_manager.add_item(component, self.reader.dir, tag,
-                                           record)
+                for component, dir, tag, record in self.parse_records_from_bin(
+                        item):
+                    self.data_manager.add_item(component, self.reader.dir,
+                                               tag, record)
+            self._mark_file_read(reader, file_stat)
+
+    def _add_remain_parallel(self, readers):
+        """Read and decode log files in worker processes, then add data to
+        data_manager.
+        """
+        if self._ingest_executor is None:
+            # Spawned workers never inherit locks held by threads of
+            # server, such as the one reloading logs in background.
+            self._ingest_executor = ProcessPoolExecutor(
+                max_workers=self._ingest_workers,
+                mp_context=multiprocessing.get_context('spawn'))
+        futures = [(self._ingest_executor.submit(
+            load_log_file, reader.filepath, reader.offset), reader, file_stat)
+                   for reader, file_stat in readers]
+        # Merge in order of readers, so that data is the same as serial
+        # loading.
+        for future, reader, file_stat in futures:
+            try:
+                offset, scalars, values = future.result()
+            except Exception as e:
+                logger.error('Failed to load `{}`: {}'.format(
+                    reader.filepath, e))
+                # Read it again on next reload even if it is not changed.
+                self._file_stats.pop(reader.filepath, None)
+                continue
+            self.reader = reader
+            for (tag, sub_tag), arrays in scalars.items():
+                tag = decode_tag(tag)
+                path = bfile.join(reader.dir, tag)
+                if path not in self._tags:
+                    self._tags[path] = 'scalar' if sub_tag is None else 'scalars'
+                steps, timestamps, scalar_values = arrays
+                self.data_manager.add_scalar_values(
+                    reader.dir, tag, steps.tolist(), timestamps.tolist(),
+                    scalar_values.tolist(), sub_tag)
+            for value_bin in values:
+                record = record_pb2.Record()
+                value = record.values.add()
+                value.ParseFromString(value_bin)
+                component, dir, tag, value = self._parse_value(record, value)
+                self.data_manager.add_item(component, reader.dir, tag, value)
+            reader.seek(offset)
+            self._mark_file_read(reader, file_stat)
 
     def get_remain(self, reader=None):
         """Get all remain data by self.reader.
@@ -332,8 +620,9 @@ class LogReader(object):
         _log_data = collections.defaultdict(lambda: collections.defaultdict(
             list))
         for item in remain:
-            component, dir, tag, record = self.parse_from_bin(item)
-            _log_data[component][tag].append(record)
+            for component, dir, tag, record in self.parse_records_from_bin(
+                    item):
+                _log_data[component][tag].append(record)
         if update:
             self._log_data = _log_data
         return _log_data
@@ -343,6 +632,9 @@ class LogReader(object):
         return self._log_data
 
     def runs(self, update=True):
+        if self._reloader is not None or self._snapshot_only:
+            # walks are updated by reloader in background or by snapshot.
+            update = False
         self.logs(update=update)
         return list(self.walks.keys())
 
@@ -380,14 +672,189 @@ class LogReader(object):
         """Load remain data.
 
         Make sure all readers for every vdl log file are registered, load all
-        remain data.
+        remain data. Return immediately if data is reloaded in background.
         """
-        if self.logdir is not None:
-            self.register_readers(update=update)
-            self.add_remain()
+        if self._reloader is not None:
+            return
+        self._load_new_data(update=update)
+
+    def _load_new_data(self, update=True):
+        if self._snapshot_only:
+            self._follow_snapshot()
+        elif self.logdir is not None:
+            with self._load_lock:
+                self.register_readers(update=update)
+                self.add_remain()
+                if self._snapshot_path and time.time(
+                ) - self._snapshot_time >= self._snapshot_interval:
+                    self._save_snapshot()
+
+    def save_snapshot(self):
+        """Save snapshot now if enabled and data changed since last saved.
+        """
+        if self._snapshot_path and not self._snapshot_only:
+            with self._load_lock:
+                self._save_snapshot()
+
+    def _save_snapshot(self):
+        """Save loaded data and offsets of log files to snapshot.
+
+        Should be called with `_load_lock` held.
+        """
+        if not self._snapshot_dirty:
+            return
+        files = {}
+        for path, reader in self.readers.items():
+            file_stat = self._file_stats.get(path)
+            if file_stat is None:
+                # Can not validate without stat, skip snapshot.
+                return
+            files[path] = (reader.dir, reader.offset, file_stat)
+        reservoirs, buckets = self.data_manager.get_state(
+            self._snapshot_versions)
+        first_save = not self._snapshot_versions
+        try:
+            # Only buckets changed since last saved are written.
+            for (plugin, key), (version, (meta, arrays)) in buckets.items():
+                snapshot.save_bucket(
+                    snapshot.get_bucket_path(self._snapshot_path, plugin,
+                                             key), meta, arrays)
+                self._snapshot_versions[(plugin, key)] = version
+            state = {
+                'files': files,
+                'walks': self.walks,
+                'instance_id': self.instance_id,
+                'tags': self._tags,
+                'name2tags': self.name2tags,
+                'tags2name': self.tags2name,
+                'data_manager': reservoirs,
+                'buckets': [[plugin, key, version] for (plugin, key), version
+                            in self._snapshot_versions.items()]
+            }
+            snapshot.save_snapshot(self._snapshot_path, state)
+            self._snapshot_dirty = False
+            if first_save:
+                snapshot.remove_stale_buckets(self._snapshot_path,
+                                              self._snapshot_versions)
+        except Exception as e:
+            logger.error('Failed to save snapshot `{}`: {}'.format(
+                self._snapshot_path, e))
+        self._snapshot_time = time.time()
+
+    def _restore_snapshot(self):
+        """Restore loaded data and offsets of log files from snapshot.
+
+        Snapshot is ignored if any log file in it is truncated or rewritten.
+        """
+        state = snapshot.load_snapshot(self._snapshot_path)
+        if state is None:
+            return
+        files = state['files']
+        if not snapshot.is_snapshot_valid(
+            {path: file_stat
+             for path, (_, _, file_stat) in files.items()}):
+            logger.info('Log files changed, ignore snapshot `{}`.'.format(
+                self._snapshot_path))
+            return
+        buckets = self._load_snapshot_buckets(state['buckets'], {})
+        if buckets is None:
+            logger.info('Buckets of snapshot `{}` are missing, ignore '
+                        'it.'.format(self._snapshot_path))
+            return
+        with self._load_lock:
+            for path, (dir, offset, file_stat) in files.items():
+                reader = RecordReader(filepath=path, dir=dir)
+                reader.seek(offset)
+                self.readers[path] = reader
+                self._file_stats[path] = tuple(file_stat)
+            self._tags.update(state['tags'])
+            self.name2tags.update(state['name2tags'])
+            self.tags2name.update(state['tags2name'])
+            self.data_manager.set_state(
+                state['data_manager'],
+                {key: bucket
+                 for key, (_, bucket) in buckets.items()})
+            self._snapshot_versions = {
+                key: version
+                for key, (version, _) in buckets.items()
+            }
+        logger.info('Restored {} log files from snapshot `{}`.'.format(
+            len(files), self._snapshot_path))
+
+    def _follow_snapshot(self):
+        """Replace loaded data by snapshot if it is saved since last loaded.
+        """
+        try:
+            stat = os.stat(self._snapshot_path)
+        except OSError:
+            return
+        with self._load_lock:
+            if (stat.st_mtime_ns, stat.st_size) == self._snapshot_stat:
+                return
+            state = snapshot.load_snapshot(self._snapshot_path)
+            if state is None:
+                return
+            # Versions are only comparable with the same instance id, which
+            # changes if data is loaded again.
+            buckets = self._load_snapshot_buckets(
+                state['buckets'], self._snapshot_buckets
+                if state['instance_id'] == self.instance_id else {})
+            if buckets is None:
+                # Saved again while loading, try again next time.
+                return
+            self._snapshot_buckets = buckets
+            self._snapshot_stat = (stat.st_mtime_ns, stat.st_size)
+            self.walks = state.get('walks') or {}
+            self._tags = state['tags']
+            self.name2tags = state['name2tags']
+            self.tags2name = state['tags2name']
+            self.data_manager.set_state(
+                state['data_manager'],
+                {key: bucket
+                 for key, (_, bucket) in buckets.items()})
+            self.instance_id = state['instance_id']
+
+    def _load_snapshot_buckets(self, versions, loaded):
+        """Load buckets of snapshot, except those already loaded with the
+        same versions.
+
+        Args:
+            versions: A list of [plugin, key, version] of buckets in
+                snapshot.
+            loaded: A dict maps (plugin, key) to (version, bucket) loaded
+                before.
+
+        Returns:
+            A dict maps (plugin, key) to (version, bucket) of all buckets in
+            snapshot, or None if any bucket file is missing.
+        """
+        buckets = {}
+        for plugin, key, version in versions:
+            bucket = loaded.get((plugin, key))
+            if bucket is None or bucket[0] != version:
+                data = snapshot.load_bucket(
+                    snapshot.get_bucket_path(self._snapshot_path, plugin,
+                                             key))
+                if data is None:
+                    return None
+                bucket = (version, bucket_from_state(*data))
+            buckets[(plugin, key)] = bucket
+        return buckets
+
+    def close(self):
+        """Stop reloading data in background and ingestion workers, and
+        save snapshot if enabled.
+        """
+        if self._reloader is not None:
+            self._reloader.stop()
+            self._reloader = None
+        self.save_snapshot()
+        if self._ingest_executor is not None:
+            self._ingest_executor.shutdown()
+            self._ingest_executor = None
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
+        self.close()
@@ -14,8 +14,18 @@
 # =======================================================================
 
 from visualdl.io import bfile
+from visualdl.proto import record_pb2
+from visualdl.server.log import logger
+from visualdl.utils.crc32 import masked_crc32c
+from visualdl.utils.record_index import hash_tag
+from visualdl.utils.record_index import INDEX_DTYPE
+from visualdl.utils.record_index import RecordIndex
+from visualdl.utils.record_index import RecordIndexWriter
+import numpy as np
 import struct
 
+_SCAN_CHUNK_SIZE = 65536
+
 
 class _RecordReader(object):
     def __init__(self, filepath=None):
@@ -26,24 +36,77 @@ class _RecordReader(object):
                 '{} does not point to valid Events file'.format(filepath))
 
         self._curr_event = None
+        self._filepath = filepath
         self.file_handle = bfile.BFile(filepath, 'rb')
+        # Whether records are packaged with crc, detected by first record.
+        self._crc = None
+        self._corrupted_offset = None
 
-    def get_next(self):
-        # Read the header
-        self._curr_event = None
-        header_str = self.file_handle.read(8)
-        if len(header_str) != 8:
-            # Hit EOF so raise and exit
+    def _read(self, offset, size):
+        data = self.file_handle.read(size)
+        if len(data) != size:
+            # Hit EOF so raise and exit, the incomplete record may be still
+            # writing, so read it again next time.
+            self.file_handle.seek(offset)
             raise EOFError('No more events to read on LFS.')
-        header = struct.unpack('Q', header_str)
-        header_len = int(header[0])
-        event_str = self.file_handle.read(header_len)
+        return data
+
+    def _detect_crc(self, offset, header_str):
+        header_crc = self._read(offset, 4)
+        self._crc = struct.unpack('<I', header_crc)[0] == masked_crc32c(
+            header_str)
+        if not self._crc:
+            self.file_handle.seek(offset + 8)
+
+    def get_next(self):
+        while True:
+            self._curr_event = None
+            offset = self.file_handle.tell()
+            # Read the header
+            header_str = self._read(offset, 8)
+            header_len = int(struct.unpack('Q', header_str)[0])
+            if self._crc is None:
+                self._detect_crc(offset, header_str)
+            elif self._crc:
+                header_crc = struct.unpack('<I', self._read(offset, 4))[0]
+                if header_crc != masked_crc32c(header_str):
+                    # Length of record is broken, records after it can not
+                    # be located any more.
+                    if self._corrupted_offset != offset:
+                        self._corrupted_offset = offset
+                        logger.error(
+                            'Header crc mismatch at offset {} of `{}`, '
+                            'records after it are ignored.'.format(
+                                offset, self._filepath))
+                    self.file_handle.seek(offset)
+                    raise EOFError('Record header is corrupted.')
+
+            event_str = self._read(offset, header_len)
+            if self._crc:
+                footer_crc = struct.unpack('<I', self._read(offset, 4))[0]
+                if footer_crc != masked_crc32c(event_str):
+                    logger.warning(
+                        'Data crc mismatch at offset {} of `{}`, the record '
+                        'is skipped.'.format(offset, self._filepath))
+                    continue
 
-        self._curr_event = event_str
+            self._curr_event = event_str
+            return
 
     def record(self):
         return self._curr_event
 
+    @property
+    def offset(self):
+        return self.file_handle.tell()
+
+    def seek(self, offset):
+        self.file_handle.seek(offset)
+
+    @property
+    def crc(self):
+        return self._crc
+
 
 class _RecordReaderIterator(object):
     """A iterator of record reader.
@@ -62,6 +125,13 @@ class _RecordReaderIterator(object):
             raise StopIteration
         return self._reader.record()
 
+    @property
+    def offset(self):
+        return self._reader.offset
+
+    def seek(self, offset):
+        self._reader.seek(offset)
+
 
 class RecordReader(object):
     """Record reader of log file.
@@ -73,6 +143,11 @@ class RecordReader(object):
         self._filepath = filepath
         self._dir = dir
         self._reader = _RecordReaderIterator(filepath)
+        self._index = None
+        # End offset of records scanned into in-memory index, None if index
+        # is loaded from sidecar file.
+        self._scanned_offset = None
+        self._random_reader = None
 
     def get_next(self, update=False):
         """Get next data in log file.
@@ -107,6 +182,91 @@ class RecordReader(object):
             results.append(item)
         return results
 
+    @property
+    def offset(self):
+        """Byte offset of the next record to read in log file.
+        """
+        return self._reader.offset
+
+    def seek(self, offset):
+        """Move to the record at byte `offset` of log file.
+
+        Args:
+            offset (int): Byte offset of a record, usually got from
+                `RecordReader.offset`.
+        """
+        self._reader.seek(offset)
+
+    @property
+    def filepath(self):
+        return self._filepath
+
+    def get_index(self):
+        """Get index of log file, load it from sidecar file if exists.
+
+        Returns:
+            Instance of RecordIndex, or None if log file has no index.
+        """
+        if self._index is None:
+            self._index = RecordIndex.load(self._filepath)
+        else:
+            self._index.update()
+        return self._index
+
+    def get_records(self, tag, start_step=None, end_step=None):
+        """Get records contain `tag` in step range by seeking with index.
+
+        Sequential reading by `get_next` or `get_remain` is not affected.
+        If log file has no sidecar index, an index is built in memory by
+        scanning log file, and only records appended since last scan are
+        scanned on later calls.
+
+        Args:
+            tag (string): Tag of value, as written by `LogWriter`.
+            start_step (int): Minimum step included, no limit if None.
+            end_step (int): Maximum step included, no limit if None.
+
+        Returns:
+            A list of binary records.
+        """
+        offsets = self._get_offsets(tag, start_step, end_step)
+        if self._random_reader is None:
+            self._random_reader = _RecordReader(self._filepath)
+        results = []
+        for offset in offsets.tolist():
+            self._random_reader.seek(offset)
+            self._random_reader.get_next()
+            results.append(self._random_reader.record())
+        return results
+
+    def iter_records(self, tag, start_step=None, end_step=None):
+        """Same as `get_records`, but yield records one by one, so that
+        records of a large log file are never held in memory at once.
+
+        A separate file handle is used, so it is safe to iterate while
+        other records are read by this reader.
+        """
+        offsets = self._get_offsets(tag, start_step, end_step)
+        reader = _RecordReader(self._filepath)
+        try:
+            for offset in offsets:
+                reader.seek(int(offset))
+                reader.get_next()
+                yield reader.record()
+        finally:
+            reader.file_handle.close()
+
+    def _get_offsets(self, tag, start_step=None, end_step=None):
+        index = self.get_index()
+        if index is None or self._scanned_offset is not None:
+            entries, self._scanned_offset = _scan_record_index(
+                self._filepath, self._scanned_offset or 0)
+            if index is None:
+                self._index = index = RecordIndex(entries)
+            else:
+                index.extend(entries)
+        return index.get_offsets(tag, start_step, end_step)
+
     @property
     def dir(self):
         return self._dir
@@ -114,3 +274,87 @@ class RecordReader(object):
     @dir.setter
     def dir(self, value):
         self._dir = value
+
+
+def is_crc_record_file(filepath):
+    """Determine whether records in log file are packaged with crc.
+
+    Returns:
+        True or False, or None if log file has no complete record.
+    """
+    reader = _RecordReader(filepath)
+    try:
+        reader.get_next()
+    except EOFError:
+        pass
+    return reader.crc
+
+
+def scan_record_index(filepath, offset=0):
+    """Scan log file to get index entries of records.
+
+    Args:
+        filepath (string): Path of vdl log file.
+        offset (int): Byte offset of the first record to scan.
+
+    Returns:
+        Index entries as numpy.ndarray with dtype `INDEX_DTYPE`.
+    """
+    return _scan_record_index(filepath, offset)[0]
+
+
+def _scan_record_index(filepath, offset=0):
+    """Same as `scan_record_index`, but also return byte offset after the
+    last complete record scanned, where the next scan should start.
+    """
+    reader = _RecordReader(filepath)
+    reader.seek(offset)
+    tag_hashes = {}
+    # Entries are converted to array chunk by chunk, since a list of tuples
+    # is many times larger for log file with millions of records.
+    chunks = []
+    entries = []
+    while True:
+        offset = reader.offset
+        try:
+            reader.get_next()
+        except EOFError:
+            break
+        record = record_pb2.Record()
+        record.ParseFromString(reader.record())
+        for value in record.values:
+            tag_hash = tag_hashes.get(value.tag)
+            if tag_hash is None:
+                tag_hash = tag_hashes[value.tag] = hash_tag(value.tag)
+            entries.append((offset, value.id, tag_hash))
+        if len(entries) >= _SCAN_CHUNK_SIZE:
+            chunks.append(np.array(entries, dtype=INDEX_DTYPE))
+            entries = []
+    chunks.append(np.array(entries, dtype=INDEX_DTYPE))
+    return np.concatenate(chunks), offset
+
+
+def build_record_index(filepath):
+    """Build sidecar index for a vdl log file written without index.
+
+    If sidecar index already exists, only records after the last indexed
+    record will be appended to it.
+
+    Args:
+        filepath (string): Path of vdl log file.
+
+    Returns:
+        Number of index entries added.
+    """
+    offset = 0
+    index = RecordIndex.load(filepath)
+    if index is not None and len(index):
+        reader = _RecordReader(filepath)
+        reader.seek(int(index.entries['offset'].max()))
+        reader.get_next()
+        offset = reader.offset
+    entries = scan_record_index(filepath, offset)
+    writer = RecordIndexWriter(filepath)
+    writer.add_entries(entries)
+    writer.close()
+    return len(entries)
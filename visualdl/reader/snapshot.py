@@ -0,0 +1,183 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import io
+import json
+import os
+import struct
+
+import numpy as np
+
+from visualdl.io import bfile
+from visualdl.server.log import logger
+from visualdl.utils.md5_util import md5
+
+# Format of snapshot file and bucket files: (little-endian)
+# byte      magic[8]
+# uint32    version
+# byte      state as json in snapshot file, or `.npz` of numpy arrays in
+#           bucket file, with json of other state in array `__meta__`
+#
+# Buckets of data are saved to their own files in `{snapshot}.buckets`, so
+# that only changed buckets are saved and loaded again. Snapshot holds only
+# plain data, which is loaded without pickle, so that it never runs code.
+SNAPSHOT_MAGIC = b'VDLSNAP\0'
+SNAPSHOT_VERSION = 6
+_HEADER = struct.Struct('<8sI')
+
+
+def get_snapshot_path(snapshot_dir, logdirs):
+    """Get path of snapshot file for `logdirs`.
+
+    Args:
+        snapshot_dir: Directory to store snapshot files.
+        logdirs: A list of log directories.
+    """
+    key = json.dumps(sorted(os.path.abspath(dir) for dir in logdirs))
+    return os.path.join(snapshot_dir, 'vdlsnapshot.{}'.format(md5(key)))
+
+
+def get_bucket_path(path, plugin, key):
+    """Get path of file of bucket `key` of `plugin` in snapshot `path`."""
+    return os.path.join(path + '.buckets',
+                        '{}.bucket'.format(md5(plugin + '/' + key)))
+
+
+def remove_stale_buckets(path, buckets):
+    """Remove files of buckets not in snapshot `path` any more.
+
+    Args:
+        path: Path of snapshot file.
+        buckets: A list of (plugin, key) of buckets in snapshot.
+    """
+    dirname = path + '.buckets'
+    if not os.path.isdir(dirname):
+        return
+    paths = set(
+        get_bucket_path(path, plugin, key) for plugin, key in buckets)
+    for filename in os.listdir(dirname):
+        bucket_path = os.path.join(dirname, filename)
+        if bucket_path not in paths:
+            try:
+                os.remove(bucket_path)
+            except OSError:
+                pass
+
+
+def _save(path, data):
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as fp:
+        fp.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+        fp.write(data)
+    os.replace(temp_path, path)
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as fp:
+        magic, version = _HEADER.unpack(fp.read(_HEADER.size))
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            logger.info('Ignore snapshot `{}` of other version.'.format(path))
+            return None
+        return fp.read()
+
+
+def save_snapshot(path, state):
+    """Save state to snapshot file atomically.
+
+    Args:
+        path: Path of snapshot file.
+        state: State to save, must be json serializable.
+    """
+    _save(path, json.dumps(state).encode())
+
+
+def load_snapshot(path):
+    """Load state from snapshot file.
+
+    Returns:
+        State saved by `save_snapshot`, or None if snapshot file not exists
+        or is invalid.
+    """
+    try:
+        data = _load(path)
+        return None if data is None else json.loads(data.decode())
+    except Exception as e:
+        logger.error('Failed to load snapshot `{}`: {}'.format(path, e))
+        return None
+
+
+def save_bucket(path, meta, arrays):
+    """Save state of bucket to file atomically.
+
+    Args:
+        path: Path of bucket file, see `get_bucket_path`.
+        meta: Json serializable dict.
+        arrays: A dict of numpy arrays.
+    """
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        __meta__=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        **arrays)
+    _save(path, buffer.getvalue())
+
+
+def load_bucket(path):
+    """Load state of bucket from file.
+
+    Returns:
+        A tuple of meta and arrays saved by `save_bucket`, or None if file
+        not exists or is invalid.
+    """
+    try:
+        data = _load(path)
+        if data is None:
+            return None
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+        meta = json.loads(arrays.pop('__meta__').tobytes().decode())
+        return meta, arrays
+    except Exception as e:
+        logger.error('Failed to load snapshot `{}`: {}'.format(path, e))
+        return None
+
+
+def is_snapshot_valid(files):
+    """Determine whether log files are only appended since snapshot.
+
+    Args:
+        files: A dict maps path of log file to (size, mtime) when snapshot
+            was taken.
+
+    Returns:
+        True if every log file still exists, is not truncated, and is not
+        rewritten with same size.
+    """
+    for path, (size, mtime) in files.items():
+        try:
+            file_stat = bfile.stat(path) if bfile.exists(path) else None
+        except Exception:
+            file_stat = None
+        if file_stat is None:
+            return False
+        current_size, current_mtime = file_stat
+        if current_size < size or (current_size == size
+                                   and current_mtime != mtime):
+            return False
+    return True
@@ -13,13 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =======================================================================
+import atexit
 import functools
 import gzip
+import itertools
 import json
 import os
 from io import BytesIO
 
+from flask import has_request_context
 from flask import request
+from werkzeug.http import quote_etag
 
 from visualdl import LogReader
 from visualdl.python.cache import MemCache
@@ -27,10 +31,54 @@ from visualdl.reader.graph_reader import GraphReader
 from visualdl.server import lib
 from visualdl.server.client_manager import ClientManager
 from visualdl.server.log import logger
+from visualdl.utils.dir import GRAPH_CACHE_PATH
+from visualdl.utils.string_util import decode_tag
 
 error_retry_times = 3
 error_sleep_time = 2  # seconds
 
+# Routes whose responses only depend on log data, they are served with ETag
+# of data version. Routes mapped to a plugin use version of the bucket of
+# `run` and `tag` in request, others use version of all data.
+VERSIONED_ROUTES = {
+    'runs': None,
+    'tags': None,
+    'logs': None,
+    'scalar/tags': None,
+    'scalars/tags': None,
+    'image/tags': None,
+    'text/tags': None,
+    'audio/tags': None,
+    'embedding/tags': None,
+    'histogram/tags': None,
+    'pr-curve/tags': None,
+    'roc-curve/tags': None,
+    'scalar/list': 'scalar',
+    'scalars/list': None,
+    'scalar/batch': None,
+    'scalar/data': 'scalar',
+    'scalars/data': None,
+    'image/list': 'image',
+    'image/image': 'image',
+    'text/list': 'text',
+    'text/text': 'text',
+    'audio/list': 'audio',
+    'audio/audio': 'audio',
+    'embedding/list': None,
+    'embedding/tensor': None,
+    'embedding/metadata': None,
+    'histogram/list': 'histogram',
+    'pr-curve/list': 'pr_curve',
+    'roc-curve/list': 'roc_curve',
+    'pr-curve/steps': None,
+    'roc-curve/steps': None,
+    'hparams/importance': None,
+    'hparams/data': None,
+    'hparams/indicators': None,
+    'hparams/list': None,
+    'hparams/metric': None
+}
+
 
 def gen_result(data=None, status=0, msg=''):
     return {'status': status, 'msg': msg, 'data': data}
@@ -68,6 +116,44 @@ def result(mimetype='application/json', headers=None):
     return decorator
 
 
+def streamed(mimetype='application/json'):
+    '''
+    Like `result`, but func returns an iterable of chunks, which is streamed
+    and not cached. `mimetype` can be a callable of arguments of func. The
+    first chunk is got before streaming, so that errors such as invalid
+    arguments are responded as json.
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                chunks = iter(func(self, *args, **kwargs))
+                first = list(itertools.islice(chunks, 1))
+            except Exception as e:
+                return json.dumps(gen_result(status=-1, msg='{}'.format(
+                    e))), 'application/json', None
+            if callable(mimetype):
+                mimetype_output = mimetype(self, *args, **kwargs)
+            else:
+                mimetype_output = mimetype
+            return itertools.chain(first, chunks), mimetype_output, None
+
+        return wrapper
+
+    return decorator
+
+
+def stream_result(items):
+    '''
+    Stream json response of `gen_result(list(items))` item by item, so
+    that large response is neither built nor held in memory at once.
+    '''
+    yield '{"status": 0, "msg": "", "data": ['
+    for index, item in enumerate(items):
+        yield (', ' if index else '') + json.dumps(item)
+    yield ']}'
+
+
 def try_call(function, *args, **kwargs):
     res = lib.retry(error_retry_times, function, error_sleep_time, *args,
                     **kwargs)
@@ -77,9 +163,31 @@ def try_call(function, *args, **kwargs):
 
 
 class Api(object):
-    def __init__(self, logdir, model, cache_timeout):
-        self._reader = LogReader(logdir)
-        self._graph_reader = GraphReader(logdir)
+    def __init__(self,
+                 logdir,
+                 model,
+                 cache_timeout,
+                 reload_interval=0,
+                 ingest_workers=0,
+                 snapshot_dir=None,
+                 cache_max_size=512,
+                 snapshot_only=False,
+                 scalar_series_size=0,
+                 graph_cache_size=1024):
+        self._reader = LogReader(
+            logdir,
+            reload_interval=reload_interval,
+            ingest_workers=ingest_workers,
+            snapshot_dir=snapshot_dir,
+            snapshot_only=snapshot_only,
+            scalar_series_size=scalar_series_size)
+        if snapshot_dir and not snapshot_only:
+            # Save the latest snapshot when server exits.
+            atexit.register(self._reader.close)
+        self._graph_reader = GraphReader(
+            logdir,
+            cache_dir=GRAPH_CACHE_PATH if graph_cache_size else None,
+            cache_max_size=int(graph_cache_size * 1024 * 1024))
         self._graph_reader.set_displayname(self._reader)
         if model:
             if 'vdlgraph' in model:
@@ -90,14 +198,65 @@ class Api(object):
             self.model_name = ''
         self.graph_reader_client_manager = ClientManager(self._graph_reader)
         # use a memory cache to reduce disk reading frequency.
-        cache = MemCache(timeout=cache_timeout)
-        self._cache = lib.cache_get(cache)
+        self._mem_cache = MemCache(
+            timeout=cache_timeout, max_bytes=int(cache_max_size * 1024 * 1024))
+        self._cache = lib.cache_get(self._mem_cache)
+
+    def _versioned_key(self, key, plugin=None, run=None, tag=None):
+        # Cached data never outlives the data version it is computed from,
+        # which is version of bucket of `run` and `tag` of `plugin` if given,
+        # so that new data of other buckets does not invalidate it.
+        return '{}@{}'.format(key, self._get_version(plugin, run, tag))
 
     def _get(self, key, func, *args, **kwargs):
-        return self._cache(key, func, self._reader, *args, **kwargs)
+        return self._cache(
+            self._versioned_key(key), func, self._reader, *args, **kwargs)
 
     def _get_with_retry(self, key, func, *args, **kwargs):
-        return self._cache(key, try_call, func, self._reader, *args, **kwargs)
+        return self._cache(
+            self._versioned_key(key), try_call, func, self._reader, *args,
+            **kwargs)
+
+    def _get_bucket_with_retry(self, plugin, key, func, run, tag, *args):
+        """
+        Same as `_get_with_retry`, but `func` only reads data of bucket of
+        `run` and `tag` of `plugin`, which are the first arguments of it.
+        """
+        return self._cache(
+            self._versioned_key(key, plugin, run, tag), try_call, func,
+            self._reader, run, tag, *args)
+
+    def get_etag(self, path, args):
+        '''
+        Get ETag of response of path by version of data it depends on, None
+        if response of path does not only depend on log data.
+        '''
+        if path not in VERSIONED_ROUTES:
+            return None
+        return self._get_data_version(VERSIONED_ROUTES[path],
+                                      args.get('run'), args.get('tag'))
+
+    def _get_data_version(self, plugin=None, run=None, tag=None):
+        self._reader.load_new_data()
+        return self._get_version(plugin, run, tag)
+
+    def _get_version(self, plugin=None, run=None, tag=None):
+        data_manager = self._reader.data_manager
+        if plugin is not None and run and tag:
+            run = self._reader.name2tags.get(run, run)
+            version = data_manager.get_version(plugin, run, decode_tag(tag))
+        else:
+            version = data_manager.get_version()
+        # Versions of data are only comparable with the same instance id.
+        return '{}-{}'.format(self._reader.instance_id, version)
+
+    @result()
+    def data_version(self, plugin=None, run=None, tag=None):
+        '''
+        Get version of bucket of `run` and `tag` of `plugin`, or version of
+        all data if not specified, which changes whenever new data is loaded.
+        '''
+        return self._get_data_version(plugin, run, tag)
 
     @result()
     def components(self):
@@ -112,6 +271,10 @@ class Api(object):
         tabs.update(self._graph_reader.component_tabs(update=True))
         return tabs
 
+    @result()
+    def cache_stats(self):
+        return self._mem_cache.get_stats()
+
     @result()
     def runs(self):
         return self._get('data/runs', lib.get_runs)
@@ -189,15 +352,63 @@ class Api(object):
         key = os.path.join('data/plugin/hparams/metric', run, metric)
         return self._get_with_retry(key, lib.get_hparam_metric, run, metric)
 
-    @result('text/csv')
+    @streamed('text/csv')
     def hparam_data(self, type='tsv'):
-        key = os.path.join('data/plugin/hparams/data', type)
-        return self._get_with_retry(key, lib.get_hparam_data, type)
+        return lib.get_hparam_data(self._reader, type)
+
+    @result()
+    def scalar_list(self,
+                    run,
+                    tag,
+                    mode=None,
+                    width=None,
+                    start_step=None,
+                    end_step=None,
+                    since_step=None,
+                    since_version=None):
+        key = os.path.join('data/plugin/scalars/scalars', run, tag,
+                           str(mode), str(width), str(start_step),
+                           str(end_step), str(since_step), str(since_version))
+        return self._get_bucket_with_retry('scalar', key, lib.get_scalar, run,
+                                           tag, mode, width, start_step,
+                                           end_step, since_step, since_version)
 
-    @result()
-    def scalar_list(self, run, tag):
-        key = os.path.join('data/plugin/scalars/scalars', run, tag)
-        return self._get_with_retry(key, lib.get_scalar, run, tag)
+    @result('application/octet-stream')
+    def scalar_list_binary(self,
+                           run,
+                           tag,
+                           mode=None,
+                           width=None,
+                           start_step=None,
+                           end_step=None,
+                           since_step=None,
+                           since_version=None):
+        key = os.path.join('data/plugin/scalars/scalars', run, tag,
+                           str(mode), str(width), str(start_step),
+                           str(end_step), str(since_step), str(since_version),
+                           'binary')
+        return self._get_bucket_with_retry('scalar', key,
+                                           lib.get_scalar_binary, run, tag,
+                                           mode, width, start_step, end_step,
+                                           since_step, since_version)
+
+    @streamed()
+    def scalar_batch(self,
+                     runs,
+                     tags,
+                     mode=None,
+                     width=None,
+                     start_step=None,
+                     end_step=None):
+        '''
+        Get scalar data of all `tags` in all `runs`, both are json arrays.
+        '''
+        if not runs or not tags:
+            raise ValueError('`runs` and `tags` are required.')
+        return stream_result(
+            lib.get_scalar_batch(self._reader, json.loads(runs),
+                                 json.loads(tags), mode, width, start_step,
+                                 end_step))
 
     @result()
     def scalars_list(self, run, tag, sub_tag):
@@ -205,10 +416,10 @@ class Api(object):
                            sub_tag)
         return self._get_with_retry(key, lib.get_scalars, run, tag, sub_tag)
 
-    @result('text/csv')
+    @streamed(lambda self, run, tag, type='tsv': 'application/octet-stream'
+              if 'parquet' == type else 'text/csv')
     def scalar_data(self, run, tag, type='tsv'):
-        key = os.path.join('data/plugin/scalars/data', run, tag, type)
-        return self._get_with_retry(key, lib.get_scalar_data, run, tag, type)
+        return lib.get_scalar_data(self._reader, run, tag, type)
 
     @result('text/csv')
     def scalars_data(self, run, tag, sub_tag, type='tsv'):
@@ -218,43 +429,58 @@ class Api(object):
                                     sub_tag, type)
 
     @result()
-    def image_list(self, mode, tag):
-        key = os.path.join('data/plugin/images/images', mode, tag)
-        return self._get_with_retry(key, lib.get_image_tag_steps, mode, tag)
+    def image_list(self, mode, tag, since_step=None, since_version=None):
+        key = os.path.join('data/plugin/images/images', mode, tag,
+                           str(since_step), str(since_version))
+        return self._get_bucket_with_retry('image', key,
+                                           lib.get_image_tag_steps, mode, tag,
+                                           since_step, since_version)
 
     @result('image/png')
-    def image_image(self, mode, tag, index=0):
+    def image_image(self, mode, tag, index=0, id=None):
         index = int(index)
+        id = int(id) if id not in (None, '') else None
         key = os.path.join('data/plugin/images/individualImage', mode, tag,
-                           str(index))
-        return self._get_with_retry(key, lib.get_individual_image, mode, tag,
-                                    index)
+                           str(index), str(id))
+        return self._get_bucket_with_retry('image', key,
+                                           lib.get_individual_image, mode, tag,
+                                           index, id)
 
     @result()
-    def text_list(self, mode, tag):
-        key = os.path.join('data/plugin/text/text', mode, tag)
-        return self._get_with_retry(key, lib.get_text_tag_steps, mode, tag)
+    def text_list(self, mode, tag, since_step=None, since_version=None):
+        key = os.path.join('data/plugin/text/text', mode, tag,
+                           str(since_step), str(since_version))
+        return self._get_bucket_with_retry('text', key, lib.get_text_tag_steps,
+                                           mode, tag, since_step,
+                                           since_version)
 
     @result('text/plain')
-    def text_text(self, mode, tag, index=0):
+    def text_text(self, mode, tag, index=0, id=None):
         index = int(index)
+        id = int(id) if id not in (None, '') else None
         key = os.path.join('data/plugin/text/individualText', mode, tag,
-                           str(index))
-        return self._get_with_retry(key, lib.get_individual_text, mode, tag,
-                                    index)
+                           str(index), str(id))
+        return self._get_bucket_with_retry('text', key,
+                                           lib.get_individual_text, mode, tag,
+                                           index, id)
 
     @result()
-    def audio_list(self, run, tag):
-        key = os.path.join('data/plugin/audio/audio', run, tag)
-        return self._get_with_retry(key, lib.get_audio_tag_steps, run, tag)
+    def audio_list(self, run, tag, since_step=None, since_version=None):
+        key = os.path.join('data/plugin/audio/audio', run, tag,
+                           str(since_step), str(since_version))
+        return self._get_bucket_with_retry('audio', key,
+                                           lib.get_audio_tag_steps, run, tag,
+                                           since_step, since_version)
 
     @result('audio/wav')
-    def audio_audio(self, run, tag, index=0):
+    def audio_audio(self, run, tag, index=0, id=None):
         index = int(index)
+        id = int(id) if id not in (None, '') else None
         key = os.path.join('data/plugin/audio/individualAudio', run, tag,
-                           str(index))
-        return self._get_with_retry(key, lib.get_individual_audio, run, tag,
-                                    index)
+                           str(index), str(id))
+        return self._get_bucket_with_retry('audio', key,
+                                           lib.get_individual_audio, run, tag,
+                                           index, id)
 
     @result()
     def embedding_embedding(self,
@@ -262,11 +488,13 @@ class Api(object):
                             tag='default',
                             reduction='pca',
                             dimension=2):
-        dimension = int(dimension)
-        key = os.path.join('data/plugin/embeddings/embeddings', run,
-                           str(dimension), reduction)
-        return self._get_with_retry(key, lib.get_embeddings, run, tag,
-                                    reduction, dimension)
+        tag = tag or 'default'
+        reduction = reduction or 'pca'
+        dimension = int(dimension) if dimension else 2
+        # Results are cached by reduction engine, and partial results of
+        # running reduction should not be cached.
+        return lib.get_embeddings(self._reader, run, tag, reduction,
+                                  dimension)
 
     @result()
     def embedding_list(self):
@@ -275,12 +503,14 @@ class Api(object):
 
     @result('text/tab-separated-values')
     def embedding_metadata(self, name):
-        key = os.path.join('data/plugin/embeddings/metadata', name)
+        # Name is path of run and tag, which may be absolute.
+        key = 'data/plugin/embeddings/metadata/' + name
         return self._get_with_retry(key, lib.get_embedding_labels, name)
 
     @result('application/octet-stream')
     def embedding_tensor(self, name):
-        key = os.path.join('data/plugin/embeddings/tensor', name)
+        # Name is path of run and tag, which may be absolute.
+        key = 'data/plugin/embeddings/tensor/' + name
         return self._get_with_retry(key, lib.get_embedding_tensors, name)
 
     @result()
@@ -289,19 +519,49 @@ class Api(object):
                                     lib.get_histogram_tags)
 
     @result()
-    def histogram_list(self, run, tag):
-        key = os.path.join('data/plugin/histogram/histogram', run, tag)
-        return self._get_with_retry(key, lib.get_histogram, run, tag)
+    def histogram_list(self, run, tag, since_step=None, since_version=None):
+        key = os.path.join('data/plugin/histogram/histogram', run, tag,
+                           str(since_step), str(since_version))
+        return self._get_bucket_with_retry('histogram', key, lib.get_histogram,
+                                           run, tag, since_step, since_version)
+
+    @result('application/octet-stream')
+    def histogram_list_binary(self,
+                              run,
+                              tag,
+                              since_step=None,
+                              since_version=None):
+        key = os.path.join('data/plugin/histogram/histogram', run, tag,
+                           str(since_step), str(since_version), 'binary')
+        return self._get_bucket_with_retry('histogram', key,
+                                           lib.get_histogram_binary, run, tag,
+                                           since_step, since_version)
 
     @result()
     def pr_curves_pr_curve(self, run, tag):
         key = os.path.join('data/plugin/pr_curves/pr_curve', run, tag)
-        return self._get_with_retry(key, lib.get_pr_curve, run, tag)
+        return self._get_bucket_with_retry('pr_curve', key, lib.get_pr_curve,
+                                           run, tag)
+
+    @result('application/octet-stream')
+    def pr_curves_pr_curve_binary(self, run, tag):
+        key = os.path.join('data/plugin/pr_curves/pr_curve', run, tag,
+                           'binary')
+        return self._get_bucket_with_retry('pr_curve', key,
+                                           lib.get_pr_curve_binary, run, tag)
 
     @result()
     def roc_curves_roc_curve(self, run, tag):
         key = os.path.join('data/plugin/roc_curves/roc_curve', run, tag)
-        return self._get_with_retry(key, lib.get_roc_curve, run, tag)
+        return self._get_bucket_with_retry('roc_curve', key, lib.get_roc_curve,
+                                           run, tag)
+
+    @result('application/octet-stream')
+    def roc_curves_roc_curve_binary(self, run, tag):
+        key = os.path.join('data/plugin/roc_curves/roc_curve', run, tag,
+                           'binary')
+        return self._get_bucket_with_retry('roc_curve', key,
+                                           lib.get_roc_curve_binary, run, tag)
 
     @result()
     def pr_curves_steps(self, run):
@@ -356,7 +616,12 @@ class Api(object):
                                              'vdlgraph')
 
     @result()
-    def graph_manipulate(self, run, nodeid, expand, keep_state):
+    def graph_manipulate(self,
+                         run,
+                         nodeid,
+                         expand,
+                         keep_state,
+                         since_version=None):
         client_ip = request.remote_addr
         graph_reader = self.graph_reader_client_manager.get_data(client_ip)
         if expand is not None:
@@ -373,10 +638,21 @@ class Api(object):
                 keep_state = False
         else:
             keep_state = False
-        return lib.get_graph(graph_reader, run, nodeid, expand, keep_state)
-
-    @result()
-    def graph_search(self, run, nodeid, keep_state, is_node):
+        return lib.get_graph(
+            graph_reader,
+            run,
+            nodeid,
+            expand,
+            keep_state,
+            since_version=since_version)
+
+    @result()
+    def graph_search(self,
+                     run,
+                     nodeid,
+                     keep_state,
+                     is_node,
+                     since_version=None):
         client_ip = request.remote_addr
         graph_reader = self.graph_reader_client_manager.get_data(client_ip)
         if keep_state is not None:
@@ -395,7 +671,13 @@ class Api(object):
         else:
             is_node = False
         return lib.get_graph_search(graph_reader, run, nodeid, keep_state,
-                                    is_node)
+                                    is_node, since_version)
+
+    @result()
+    def graph_find(self, run, query, offset, limit):
+        client_ip = request.remote_addr
+        graph_reader = self.graph_reader_client_manager.get_data(client_ip)
+        return lib.get_graph_find(graph_reader, run, query, offset, limit)
 
     @result()
     def graph_get_all_nodes(self, run):
@@ -424,8 +706,19 @@ def get_component_tabs(*apis, vdl_args, request_args):
     return list(all_tabs)
 
 
-def create_api_call(logdir, model, cache_timeout):
-    api = Api(logdir, model, cache_timeout)
+def create_api_call(logdir,
+                    model,
+                    cache_timeout,
+                    reload_interval=0,
+                    ingest_workers=0,
+                    snapshot_dir=None,
+                    cache_max_size=512,
+                    snapshot_only=False,
+                    scalar_series_size=0,
+                    graph_cache_size=1024):
+    api = Api(logdir, model, cache_timeout, reload_interval, ingest_workers,
+              snapshot_dir, cache_max_size, snapshot_only, scalar_series_size,
+              graph_cache_size)
     routes = {
         'components': (api.components, []),
         'runs': (api.runs, []),
@@ -441,30 +734,41 @@ def create_api_call(logdir, model, cache_timeout):
         'histogram/tags': (api.histogram_tags, []),
         'pr-curve/tags': (api.pr_curve_tags, []),
         'roc-curve/tags': (api.roc_curve_tags, []),
-        'scalar/list': (api.scalar_list, ['run', 'tag']),
+        'scalar/list': (api.scalar_list,
+                        ['run', 'tag', 'mode', 'width', 'start_step', 'end_step',
+                         'since_step', 'since_version']),
+        'scalar/batch': (api.scalar_batch,
+                         ['runs', 'tags', 'mode', 'width', 'start_step', 'end_step']),
         'scalars/list': (api.scalars_list, ['run', 'tag', 'sub_tag']),
         'scalar/data': (api.scalar_data, ['run', 'tag', 'type']),
         'scalars/data': (api.scalars_data, ['run', 'tag', 'sub_tag', 'type']),
-        'image/list': (api.image_list, ['run', 'tag']),
-        'image/image': (api.image_image, ['run', 'tag', 'index']),
-        'text/list': (api.text_list, ['run', 'tag']),
-        'text/text': (api.text_text, ['run', 'tag', 'index']),
-        'audio/list': (api.audio_list, ['run', 'tag']),
-        'audio/audio': (api.audio_audio, ['run', 'tag', 'index']),
+        'image/list': (api.image_list,
+                       ['run', 'tag', 'since_step', 'since_version']),
+        'image/image': (api.image_image, ['run', 'tag', 'index', 'id']),
+        'text/list': (api.text_list,
+                      ['run', 'tag', 'since_step', 'since_version']),
+        'text/text': (api.text_text, ['run', 'tag', 'index', 'id']),
+        'audio/list': (api.audio_list,
+                       ['run', 'tag', 'since_step', 'since_version']),
+        'audio/audio': (api.audio_audio, ['run', 'tag', 'index', 'id']),
         'embedding/embedding': (api.embedding_embedding,
                                 ['run', 'tag', 'reduction', 'dimension']),
         'embedding/list': (api.embedding_list, []),
         'embedding/tensor': (api.embedding_tensor, ['name']),
         'embedding/metadata': (api.embedding_metadata, ['name']),
-        'histogram/list': (api.histogram_list, ['run', 'tag']),
+        'histogram/list': (api.histogram_list,
+                           ['run', 'tag', 'since_step', 'since_version']),
         'graph/graph': (api.graph_graph, ['run', 'expand_all', 'refresh']),
         'graph/static_graph': (api.graph_static_graph, []),
         'graph/upload': (api.graph_upload, []),
-        'graph/search': (api.graph_search,
-                         ['run', 'nodeid', 'keep_state', 'is_node']),
+        'graph/search': (api.graph_search, [
+            'run', 'nodeid', 'keep_state', 'is_node', 'since_version'
+        ]),
         'graph/get_all_nodes': (api.graph_get_all_nodes, ['run']),
-        'graph/manipulate': (api.graph_manipulate,
-                             ['run', 'nodeid', 'expand', 'keep_state']),
+        'graph/find': (api.graph_find, ['run', 'query', 'offset', 'limit']),
+        'graph/manipulate': (api.graph_manipulate, [
+            'run', 'nodeid', 'expand', 'keep_state', 'since_version'
+        ]),
         'pr-curve/list': (api.pr_curves_pr_curve, ['run', 'tag']),
         'roc-curve/list': (api.roc_curves_roc_curve, ['run', 'tag']),
         'pr-curve/steps': (api.pr_curves_steps, ['run']),
@@ -474,7 +778,17 @@ def create_api_call(logdir, model, cache_timeout):
         'hparams/indicators': (api.hparam_indicator, []),
         'hparams/list': (api.hparam_list, []),
         'hparams/metric': (api.hparam_metric, ['run', 'metric']),
-        'component_tabs': (api.component_tabs, [])
+        'component_tabs': (api.component_tabs, []),
+        'cache/stats': (api.cache_stats, []),
+        'data/version': (api.data_version, ['plugin', 'run', 'tag'])
+    }
+    # Routes which can respond columnar binary by `format=binary`, see
+    # `visualdl.utils.columnar`. Arguments are same as json routes.
+    binary_routes = {
+        'scalar/list': api.scalar_list_binary,
+        'histogram/list': api.histogram_list_binary,
+        'pr-curve/list': api.pr_curves_pr_curve_binary,
+        'roc-curve/list': api.roc_curves_roc_curve_binary
     }
 
     def call(path: str, args):
@@ -483,7 +797,19 @@ def create_api_call(logdir, model, cache_timeout):
             return json.dumps(gen_result(
                 status=1, msg='api not found')), 'application/json', None
         method, call_arg_names = route
+        if args.get('format') == 'binary' and path in binary_routes:
+            method = binary_routes[path]
         call_args = [args.get(name) for name in call_arg_names]
-        return method(*call_args)
+        etag = api.get_etag(path, args)
+        if etag is None:
+            return method(*call_args)
+        headers = {'ETag': quote_etag(etag), 'Cache-Control': 'no-cache'}
+        if has_request_context() and request.method in (
+                'GET', 'HEAD') and etag in request.if_none_match:
+            # Not modified, skip computing response.
+            return b'', 'application/json', headers
+        data, mimetype, result_headers = method(*call_args)
+        headers.update(result_headers or {})
+        return data, mimetype, headers
 
     return call
@@ -15,9 +15,11 @@
 # =======================================================================
 import json
 import multiprocessing
+import multiprocessing.connection
 import os
 import re
 import signal
+import socket
 import sys
 import threading
 import time
@@ -32,23 +34,33 @@ from flask import request
 from flask import Response
 from flask import send_file
 from flask_babel import Babel
+from werkzeug.serving import make_server
 
 import visualdl.server
 from visualdl import __version__
+from visualdl import LogReader
 from visualdl.component.inference.fastdeploy_lib import get_start_arguments
 from visualdl.component.inference.fastdeploy_server import create_fastdeploy_api_call
 from visualdl.component.inference.model_convert_server import create_model_convert_api_call
 from visualdl.component.profiler.profiler_server import create_profiler_api_call
 from visualdl.server.api import create_api_call
 from visualdl.server.api import get_component_tabs
+from visualdl.server.args import default_reload_interval
 from visualdl.server.args import parse_args
 from visualdl.server.args import ParseArgs
 from visualdl.server.log import info
+from visualdl.server.log import logger
 from visualdl.server.serve import upload_to_dev
 from visualdl.server.template import Template
 from visualdl.utils import update_util
 
 SERVER_DIR = os.path.join(visualdl.ROOT, 'server')
+# Min interval in seconds to save snapshot for serving processes, only
+# buckets changed since last saved are written and loaded again.
+WORKERS_SNAPSHOT_INTERVAL = 2
+# Interval in seconds to restart serving processes which exited, so that a
+# worker crashing at start never restarts in a busy loop.
+WORKERS_RESTART_INTERVAL = 1
 
 support_language = ["en", "zh"]
 default_language = support_language[0]
@@ -84,7 +96,11 @@ def create_app(args):  # noqa: C901
     )  # we add this to prevent SIGINT not work in multiprocess queue waiting
     babel = Babel(app, locale_selector=get_locale)  # noqa:F841
     # Babel api from flask_babel v3.0.0
-    api_call = create_api_call(args.logdir, args.model, args.cache_timeout)
+    api_call = create_api_call(args.logdir, args.model, args.cache_timeout,
+                               args.reload_interval, args.ingest_workers,
+                               args.snapshot_dir, args.cache_max_size,
+                               args.snapshot_only, args.scalar_series_size,
+                               args.graph_cache_size)
     profiler_api_call = create_profiler_api_call(args.logdir)
     inference_api_call = create_model_convert_api_call()
     fastdeploy_api_call = create_fastdeploy_api_call()
@@ -145,8 +161,10 @@ def create_app(args):  # noqa: C901
     @app.route(api_path + '/<path:method>', methods=["GET", "POST"])
     def serve_api(method):
         data, mimetype, headers = api_call(method, request.args)
+        # Reply 304 if ETag in headers matches If-None-Match of request.
         return make_response(
-            Response(data, mimetype=mimetype, headers=headers))
+            Response(data, mimetype=mimetype,
+                     headers=headers)).make_conditional(request)
 
     @app.route(api_path + '/profiler/<path:method>', methods=["GET", "POST"])
     def serve_profiler_api(method):
@@ -630,10 +648,96 @@ def wait_until_live(args: ParseArgs):
         webbrowser.open(url + args.public_path)
 
 
+def _serve(args, fd):
+    # Only load data saved by main process.
+    args.snapshot_only = True
+    app = create_app(args)
+    make_server(
+        args.host, args.port, app, threaded=True, fd=fd).serve_forever()
+
+
+def _supervise_workers(args, fd, parent_pid):
+    '''
+    Run `args.workers` serving processes, log every one which exits and
+    restart it, until main process `parent_pid` exits.
+    '''
+    # Daemonic workers are terminated at exit.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    context = multiprocessing.get_context('fork')
+    workers = {}
+    while os.getppid() == parent_pid:
+        while len(workers) < args.workers:
+            process = context.Process(
+                target=_serve, args=(args, fd), daemon=True)
+            process.start()
+            workers[process.sentinel] = process
+        exited = multiprocessing.connection.wait(
+            list(workers), timeout=WORKERS_RESTART_INTERVAL)
+        for sentinel in exited:
+            process = workers.pop(sentinel)
+            process.join()
+            logger.error(
+                'Serving process %d exited with code %s, restart it.',
+                process.pid, process.exitcode)
+        if exited:
+            time.sleep(WORKERS_RESTART_INTERVAL)
+
+
+def _run_workers(args):
+    '''
+    Load logs in main process and save them to snapshot, and serve requests
+    in `args.workers` processes sharing one listening socket, which load
+    data from snapshot, so that loading logs and heavy requests never block
+    other requests.
+
+    Every serving process keeps its own copy of loaded data, and loads
+    buckets changed since it loaded the snapshot last time. Serving
+    processes are run by a supervisor process, which restarts any of them
+    exited, and main process exits if the supervisor exits.
+    '''
+    family = socket.AF_INET6 if ':' in args.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    # Fork before any thread is started in main process.
+    context = multiprocessing.get_context('fork')
+    supervisor = context.Process(
+        target=_supervise_workers, args=(args, sock.fileno(), os.getpid()))
+    supervisor.start()
+    info('Serving with %d worker processes, data is shared by snapshot in '
+         '`%s`.', args.workers, args.snapshot_dir)
+    reader = LogReader(
+        args.logdir,
+        reload_interval=args.reload_interval or default_reload_interval,
+        ingest_workers=args.ingest_workers,
+        snapshot_dir=args.snapshot_dir,
+        snapshot_interval=WORKERS_SNAPSHOT_INTERVAL,
+        scalar_series_size=args.scalar_series_size)
+    threading.Thread(
+        target=wait_until_live, args=(args, ), daemon=True).start()
+    try:
+        supervisor.join()
+        logger.error('Supervisor of serving processes exited with code %s, '
+                     'stop serving.', supervisor.exitcode)
+    finally:
+        if supervisor.is_alive():
+            supervisor.terminate()
+            supervisor.join()
+        reader.close()
+    sys.exit(1)
+
+
 def _run(args):
     args = ParseArgs(**args)
     os.system('')
     info('\033[1;33mVisualDL %s\033[0m', __version__)
+    if args.workers > 1 and args.logdir:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _run_workers(args)
+            return
+        logger.warning('Multiple workers are not supported on this platform, '
+                       'serving in one process.')
     app = create_app(args)
     threading.Thread(target=wait_until_live, args=(args, )).start()
     app.run(debug=False, host=args.host, port=args.port, threaded=False)
@@ -19,10 +19,19 @@ from argparse import ArgumentParser
 from visualdl import __version__
 from visualdl.server.log import init_logger
 from visualdl.server.log import logger
+from visualdl.utils.dir import GRAPH_CACHE_PATH
+from visualdl.utils.dir import SNAPSHOT_CACHE_PATH
 
 default_host = None
 default_port = 8040
 default_cache_timeout = 20
+default_cache_max_size = 512
+default_reload_interval = 5
+default_ingest_workers = 0
+default_snapshot_dir = ''
+default_workers = 0
+default_scalar_series_size = 0
+default_graph_cache_size = 1024
 default_public_path = '/app'
 default_product = 'normal'
 
@@ -35,6 +44,21 @@ class DefaultArgs(object):
         self.host = args.get('host', default_host)
         self.port = args.get('port', default_port)
         self.cache_timeout = args.get('cache_timeout', default_cache_timeout)
+        self.cache_max_size = args.get('cache_max_size',
+                                       default_cache_max_size)
+        self.reload_interval = args.get('reload_interval',
+                                        default_reload_interval)
+        self.ingest_workers = args.get('ingest_workers',
+                                       default_ingest_workers)
+        self.snapshot_dir = args.get('snapshot_dir', default_snapshot_dir)
+        self.workers = args.get('workers', default_workers)
+        self.scalar_series_size = args.get('scalar_series_size',
+                                           default_scalar_series_size)
+        self.graph_cache_size = args.get('graph_cache_size',
+                                         default_graph_cache_size)
+        # Serve data loaded by another process from snapshot, only used by
+        # serving processes when `workers` is greater than 1.
+        self.snapshot_only = args.get('snapshot_only', False)
         self.language = args.get('language')
         self.public_path = args.get('public_path')
         self.api_only = args.get('api_only', False)
@@ -101,6 +125,10 @@ def format_args(args):
     if args.api_only:
         args.open_browser = False
 
+    # data is shared with serving processes by snapshot
+    if args.workers and args.workers > 1 and not args.snapshot_dir:
+        args.snapshot_dir = SNAPSHOT_CACHE_PATH
+
     # set host to localhost if host is not set
     if not args.host:
         args.host = get_host(args.host, args.port)
@@ -118,6 +146,14 @@ class ParseArgs(object):
         self.host = args.host
         self.port = args.port
         self.cache_timeout = args.cache_timeout
+        self.cache_max_size = args.cache_max_size
+        self.reload_interval = args.reload_interval
+        self.ingest_workers = args.ingest_workers
+        self.snapshot_dir = args.snapshot_dir
+        self.workers = args.workers
+        self.scalar_series_size = args.scalar_series_size
+        self.graph_cache_size = args.graph_cache_size
+        self.snapshot_only = args.snapshot_only
         self.language = args.language
         self.public_path = args.public_path
         self.api_only = args.api_only
@@ -178,6 +214,79 @@ def parse_args():
         default=default_cache_timeout,
         help="memory cache timeout duration in seconds (default: %(default)s)",
     )
+    parser.add_argument(
+        "--cache-max-size",
+        action="store",
+        dest="cache_max_size",
+        type=float,
+        default=default_cache_max_size,
+        help="maximum size of memory cache in MB, least recently used data "
+        "is evicted when exceeded, 0 means unlimited (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--reload-interval",
+        action="store",
+        dest="reload_interval",
+        type=float,
+        default=default_reload_interval,
+        help="interval in seconds to load new logs in background, "
+        "0 means loading logs on each request (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--ingest-workers",
+        action="store",
+        dest="ingest_workers",
+        type=int,
+        default=default_ingest_workers,
+        help="number of processes to read logs of different runs in "
+        "parallel, 0 or 1 means reading in server process "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        action="store",
+        dest="snapshot_dir",
+        type=str,
+        nargs="?",
+        const=SNAPSHOT_CACHE_PATH,
+        default=default_snapshot_dir,
+        help="save loaded data to a snapshot in this directory, so that "
+        "restarted server only reads new logs, use `%s` if no directory "
+        "is given (default: disabled)" % SNAPSHOT_CACHE_PATH,
+    )
+    parser.add_argument(
+        "--workers",
+        action="store",
+        dest="workers",
+        type=int,
+        default=default_workers,
+        help="number of processes to serve requests, if greater than 1, "
+        "logs are loaded by the main process and shared with serving "
+        "processes by snapshot in `--snapshot-dir`, every process keeps its "
+        "own copy of loaded data in memory and loads changed tags from "
+        "snapshot at most every 2 seconds (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--scalar-series-size",
+        action="store",
+        dest="scalar_series_size",
+        type=int,
+        default=default_scalar_series_size,
+        help="max number of points kept for each scalar tag, about 20 bytes "
+        "each, to downsample scalars in step range, 0 means downsampling "
+        "sampled points instead (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--graph-cache-size",
+        action="store",
+        dest="graph_cache_size",
+        type=float,
+        default=default_graph_cache_size,
+        help="maximum size in MB of cache files of analysed `.pdmodel` "
+        "graphs in `%s`, least recently used ones are removed when "
+        "exceeded, 0 means disabling the cache (default: %%(default)s)" %
+        GRAPH_CACHE_PATH,
+    )
     parser.add_argument(
         "-L",
         "--language",
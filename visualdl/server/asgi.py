@@ -0,0 +1,419 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import asyncio
+import json
+import sys
+import urllib.parse
+
+from flask import Flask
+from flask import request
+from flask import Response
+
+from visualdl import __version__
+from visualdl.server.api import create_api_call
+from visualdl.server.api import gen_result
+from visualdl.server.args import parse_args
+from visualdl.server.args import ParseArgs
+from visualdl.server.log import info
+from visualdl.server.log import logger
+
+try:
+    import uvicorn
+    UVICORN_ENABLED = True
+except ImportError:
+    UVICORN_ENABLED = False
+
+# Interval in seconds to check new data for live channels.
+LIVE_INTERVAL = 0.5
+# Interval in seconds to send keep-alive comment in idle event streams.
+KEEPALIVE_INTERVAL = 15
+
+
+def _call_json(api_call, path, args):
+    data, _, _ = api_call(path, args)
+    result = json.loads(data)
+    if result['status'] != 0:
+        raise ValueError(result['msg'])
+    return result['data']
+
+
+class _Subscription(object):
+    '''
+    Scalar series of (run, tag) subscribed by a live channel, with version
+    of data already sent for each of them, and queue of events to send.
+    '''
+    def __init__(self):
+        # Maps (run, tag) to [data version, `since_version` of next delta].
+        self._series = {}
+        self.pending = False
+        self.events = asyncio.Queue()
+
+    def update(self, message):
+        '''
+        Update by message like `{"subscribe": [[run, tag], ...]}` and
+        `{"unsubscribe": [[run, tag], ...]}`.
+        '''
+        for run, tag in message.get('unsubscribe', []):
+            self._series.pop((run, tag), None)
+        for run, tag in message.get('subscribe', []):
+            if (run, tag) not in self._series:
+                self._series[(run, tag)] = [None, 0]
+                self.pending = True
+
+    def items(self):
+        '''List of ((run, tag), cursor) of subscribed series.'''
+        return list(self._series.items())
+
+
+class _LiveWatcher(object):
+    '''
+    Watch new data for all live channels of app, so that version of data is
+    polled once every `LIVE_INTERVAL` however many channels are open, and
+    events are fanned out to queues of subscriptions.
+    '''
+    def __init__(self, api_call):
+        self._api_call = api_call
+        self._subscriptions = set()
+        self._task = None
+
+    def add(self, subscription):
+        self._subscriptions.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def remove(self, subscription):
+        # Task exits by itself once no subscription is left.
+        self._subscriptions.discard(subscription)
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        version = None
+        while self._subscriptions:
+            subscriptions = list(self._subscriptions)
+            try:
+                current = await loop.run_in_executor(
+                    None, _call_json, self._api_call, 'data/version', {})
+                if current != version or any(subscription.pending
+                                             for subscription in subscriptions):
+                    version = current
+                    events = await loop.run_in_executor(
+                        None, self.poll, subscriptions)
+                    for subscription, subscription_events in events:
+                        subscription.events.put_nowait(subscription_events)
+            except Exception as e:
+                logger.warning('Failed to poll live data: {}'.format(e))
+            await asyncio.sleep(LIVE_INTERVAL)
+
+    def poll(self, subscriptions):
+        '''
+        Get new scalar points of series subscribed by `subscriptions` since
+        last poll, blocks on loading data so should be run in executor.
+
+        Version of each series is got once, and delta of it once for all
+        subscriptions having the same version of it, so that subscriptions
+        of the same series share one request after their first poll.
+
+        Returns:
+            A list of (subscription, events), events are non-empty lists
+            of `{run, tag, version, reset, removed, ids, records}`, same as
+            response of `scalar/list` with `since_version`.
+        '''
+        versions = {}
+        deltas = {}
+        result = []
+        for subscription in subscriptions:
+            subscription.pending = False
+            events = []
+            for (run, tag), cursor in subscription.items():
+                if (run, tag) not in versions:
+                    versions[(run, tag)] = _call_json(
+                        self._api_call, 'data/version', {
+                            'plugin': 'scalar',
+                            'run': run,
+                            'tag': tag
+                        })
+                version = versions[(run, tag)]
+                # Version of bucket is 0 until the series is logged.
+                if version == cursor[0] or version.endswith('-0'):
+                    continue
+                key = (run, tag, cursor[1])
+                if key not in deltas:
+                    deltas[key] = self._get_event(run, tag, cursor[1])
+                event = deltas[key]
+                if event is None:
+                    continue
+                cursor[0] = version
+                cursor[1] = event['version']
+                # Points got before but removed by sampling are in
+                # `removed`, or client replaces all of them if `reset`.
+                if event['records'] or event['removed'] or event['reset']:
+                    events.append(event)
+            if events:
+                result.append((subscription, events))
+        return result
+
+    def _get_event(self, run, tag, since_version):
+        delta = _call_json(self._api_call, 'scalar/list', {
+            'run': run,
+            'tag': tag,
+            'since_version': str(since_version)
+        })
+        if delta is None:
+            return None
+        event = {'run': run, 'tag': tag}
+        event.update(delta)
+        return event
+
+
+async def _read_body(receive):
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _receive_subscription(receive, subscription):
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        text = message.get('text')
+        if text is None:
+            text = (message.get('bytes') or b'').decode()
+        try:
+            subscription.update(json.loads(text))
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning('Invalid live message `{}`: {}'.format(text, e))
+
+
+class AsgiApp(object):
+    '''
+    ASGI application serving api routes of `create_api_call` under
+    `{public_path}/api` like `visualdl.server.app`, and live channels at
+    `{public_path}/api/live/scalar` pushing new scalar points as soon as
+    they are loaded:
+
+    - HTTP GET with `runs` and `tags` as json arrays, responds server-sent
+      events for every series of runs and tags.
+    - WebSocket, subscribes series by json messages like
+      `{"subscribe": [[run, tag], ...]}` or `{"unsubscribe": [...]}`.
+
+    Every event is json of `{run, tag, version, reset, removed, ids,
+    records}`, same as response of `scalar/list` with `since_version`, the
+    first event of a series contains all its sampled points. Client removes
+    points of ids in `removed`, or replaces all points if `reset`, before
+    appending `records`. Data is polled by one watcher shared by all live
+    channels.
+    '''
+    def __init__(self, args):
+        self._api_call = create_api_call(
+            args.logdir, args.model, args.cache_timeout, args.reload_interval,
+            args.ingest_workers, args.snapshot_dir, args.cache_max_size,
+            args.snapshot_only, args.scalar_series_size,
+            args.graph_cache_size)
+        self._api_path = args.public_path + '/api'
+        # Api calls are run in flask request context, so that ETag, remote
+        # address and uploaded files are handled same as `server.app`.
+        self._flask_app = Flask(__name__)
+        self._watcher = _LiveWatcher(self._api_call)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._serve_lifespan(receive, send)
+            return
+        prefix = self._api_path + '/'
+        path = None
+        if scope['path'].startswith(prefix):
+            path = scope['path'][len(prefix):]
+        if scope['type'] == 'websocket':
+            if path == 'live/scalar':
+                await self._serve_live_websocket(receive, send)
+            else:
+                await send({'type': 'websocket.close', 'code': 1008})
+        elif path == 'live/scalar':
+            await self._serve_live_events(scope, receive, send)
+        elif path is not None:
+            await self._serve_api(scope, receive, send, path)
+        else:
+            await self._send_json(send, 404, gen_result(
+                status=1, msg='api not found'))
+
+    async def _serve_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _call_api(self, scope, path, body):
+        client = scope.get('client') or ('', 0)
+        with self._flask_app.test_request_context(
+                scope['path'],
+                method=scope['method'],
+                query_string=scope['query_string'].decode('latin-1'),
+                headers=[(key.decode('latin-1'), value.decode('latin-1'))
+                         for key, value in scope['headers']],
+                data=body,
+                environ_base={'REMOTE_ADDR': client[0]}):
+            data, mimetype, headers = self._api_call(path, request.args)
+            # Reply 304 if ETag in headers matches If-None-Match of request.
+            return Response(
+                data, mimetype=mimetype,
+                headers=headers).make_conditional(request)
+
+    async def _serve_api(self, scope, receive, send, path):
+        body = await _read_body(receive)
+        loop = asyncio.get_event_loop()
+        response = await loop.run_in_executor(None, self._call_api, scope,
+                                              path, body)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': [(key.lower().encode('latin-1'),
+                             value.encode('latin-1'))
+                            for key, value in response.headers.items()
+                            if key.lower() != 'date']
+            })
+            # Streamed responses are generated while sending.
+            chunks = response.iter_encoded()
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True
+                })
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            response.close()
+
+    async def _send_json(self, send, status, data):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json')]
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': json.dumps(data).encode()
+        })
+
+    async def _watch(self, subscription, closed):
+        '''
+        Yield new events of subscription got by shared watcher, or empty
+        list if idle for `KEEPALIVE_INTERVAL`, until `closed` is done.
+        '''
+        self._watcher.add(subscription)
+        try:
+            while not closed.done():
+                events = asyncio.ensure_future(subscription.events.get())
+                await asyncio.wait([events, closed],
+                                   timeout=KEEPALIVE_INTERVAL,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if events.done():
+                    yield events.result()
+                else:
+                    events.cancel()
+                    if not closed.done():
+                        yield []
+        finally:
+            self._watcher.remove(subscription)
+
+    async def _serve_live_events(self, scope, receive, send):
+        subscription = _Subscription()
+        query = urllib.parse.parse_qs(scope['query_string'].decode())
+        try:
+            runs = json.loads(query['runs'][0])
+            tags = json.loads(query['tags'][0])
+            subscription.update(
+                {'subscribe': [(run, tag) for run in runs for tag in tags]})
+        except (KeyError, ValueError, TypeError) as e:
+            await self._send_json(send, 400, gen_result(
+                status=-1, msg='Invalid runs or tags: {}'.format(e)))
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream'),
+                        (b'cache-control', b'no-cache')]
+        })
+        closed = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            async for events in self._watch(subscription, closed):
+                body = ''.join('data: {}\n\n'.format(json.dumps(event))
+                               for event in events) or ': keepalive\n\n'
+                await send({
+                    'type': 'http.response.body',
+                    'body': body.encode(),
+                    'more_body': True
+                })
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            closed.cancel()
+
+    async def _serve_live_websocket(self, receive, send):
+        if (await receive())['type'] != 'websocket.connect':
+            return
+        await send({'type': 'websocket.accept'})
+        subscription = _Subscription()
+        closed = asyncio.ensure_future(
+            _receive_subscription(receive, subscription))
+        try:
+            async for events in self._watch(subscription, closed):
+                for event in events:
+                    await send({
+                        'type': 'websocket.send',
+                        'text': json.dumps(event)
+                    })
+        finally:
+            closed.cancel()
+
+
+def create_app(args):
+    '''
+    Create ASGI application by `ParseArgs`, which can be served by any ASGI
+    server such as uvicorn or hypercorn.
+    '''
+    return AsgiApp(args)
+
+
+def main():
+    args = ParseArgs(**parse_args())
+    if not UVICORN_ENABLED:
+        logger.error('Please install uvicorn to serve VisualDL as ASGI '
+                     'application by `pip install uvicorn[standard]`.')
+        sys.exit(-1)
+    info('\033[1;33mVisualDL %s\033[0m', __version__)
+    app = create_app(args)
+    info('Serving VisualDL api at http://%s:%s%s', args.host, args.port,
+         args.public_path + '/api')
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,20 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =======================================================================
-import copy
+import collections
+import threading
+
+# Max number of clients whose data are kept, least recently used are evicted.
+DEFAULT_MAX_CLIENTS = 256
 
 
 class ClientManager:
     '''
     This class manages data with status like graph. For data with status but managed by backend,
     we should prevent data for different clients interfere with each other.
+
+    Data of each client is forked by `data.fork()`, which should share immutable part with other
+    clients and only copy status. Data of least recently used clients are evicted when more than
+    `max_clients` clients are served, and forked again when they come back.
     '''
 
-    def __init__(self, data):
+    def __init__(self, data, max_clients=DEFAULT_MAX_CLIENTS):
         self._proto_data = data
-        self.ip_data_map = {}
+        self._max_clients = max_clients
+        self.ip_data_map = collections.OrderedDict()
+        self._lock = threading.Lock()
 
     def get_data(self, ip):
-        if ip not in self.ip_data_map:
-            self.ip_data_map[ip] = copy.deepcopy(self._proto_data)
-        return self.ip_data_map[ip]
+        with self._lock:
+            if ip in self.ip_data_map:
+                self.ip_data_map.move_to_end(ip)
+            else:
+                self.ip_data_map[ip] = self._proto_data.fork()
+                while len(self.ip_data_map) > self._max_clients:
+                    self.ip_data_map.popitem(last=False)
+            return self.ip_data_map[ip]
@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =======================================================================
-import collections
+import array
+import bisect
+import itertools
 import random
 import threading
 
+import numpy as np
+
+from visualdl.proto.record_pb2 import Record
+
 DEFAULT_PLUGIN_MAXSIZE = {
     "scalar": 1000,
     "image": 10,
@@ -30,6 +36,57 @@ DEFAULT_PLUGIN_MAXSIZE = {
 }
 
 
+# Maximum number of points of scalar series for each tag, which is used to
+# downsample data in step range, see `_ScalarSeries`. Each point takes 20
+# bytes. Series is disabled if it is 0, and sampled data is used instead.
+DEFAULT_SCALAR_SERIES_MAXSIZE = 0
+
+# Number of latest removed items remembered by each bucket, so that client
+# can remove them from data got before. Client should get all data again if
+# it is older than that.
+REMOVED_LOG_SIZE = 256
+
+# Versions of buckets are taken from one counter, so that a version is never
+# reused in a process and changes whenever data of the bucket changes.
+_version_counter = itertools.count(1)
+_version_lock = threading.Lock()
+
+
+def _reserve_versions(version):
+    """Make versions taken later larger than `version`, which is restored
+    from snapshot.
+    """
+    global _version_counter
+    with _version_lock:
+        if next(_version_counter) <= version:
+            _version_counter = itertools.count(version + 1)
+
+
+def _pack_values(values):
+    """Pack `Record.Value`s as bytes in uint8 array and offsets of them."""
+    data = [value.SerializeToString() for value in values]
+    offsets = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in data], out=offsets[1:])
+    return np.frombuffer(b''.join(data), dtype=np.uint8), offsets
+
+
+def _unpack_values(data, offsets):
+    data = data.tobytes()
+    offsets = offsets.tolist()
+    return [
+        Record.Value.FromString(data[start:end])
+        for start, end in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def _to_int(value):
+    return None if value is None else int(value)
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
 def add_sub_tag(tag, sub_tag):
     return tag.replace('%', '_') + '_' + sub_tag
 
@@ -39,15 +96,25 @@ class Reservoir(object):
 
     Store each reservoir bucket by key, and each bucket is a list sampling
     with reservoir algorithm.
+
+    Only creating bucket takes lock of reservoir, adding and getting items
+    only take lock of the bucket, so that different tags never block each
+    other.
+
+    Each bucket has a version updated after its data changes, which can be
+    used to validate cached responses.
     """
 
-    def __init__(self, max_size, seed=0):
+    def __init__(self, max_size, seed=0, bucket_class=None, bucket_args=None):
         """Creates a new reservoir.
 
         Args:
             max_size: The number of values to keep in the reservoir for each tag,
                 if max_size is zero, all values will be kept in bucket.
             seed: The seed to initialize a random.Random().
+            bucket_class: Class of reservoir bucket, default to
+                _ReservoirBucket.
+            bucket_args: A dict of extra keyword arguments to create bucket.
             num_item_index: The index of data to add.
 
         Raises:
@@ -56,10 +123,112 @@ class Reservoir(object):
         if max_size < 0 or max_size != round(max_size):
             raise ValueError("Max_size must be nonnegative integer.")
         self._max_size = max_size
-        self._buckets = collections.defaultdict(lambda: _ReservoirBucket(
-            max_size=self._max_size, random_instance=random.Random(seed)))
+        self._seed = seed
+        self._bucket_class = bucket_class or _ReservoirBucket
+        self._bucket_args = dict(bucket_args or {})
+        self._buckets = {}
+        self._versions = {}
+        self._version = 0
         self._mutex = threading.Lock()
 
+    def _new_bucket(self):
+        return self._bucket_class(
+            max_size=self._max_size,
+            random_instance=random.Random(self._seed),
+            **self._bucket_args)
+
+    def set_bucket_args(self, **kwargs):
+        """Set extra keyword arguments to create buckets, buckets already
+        created are not changed.
+        """
+        with self._mutex:
+            self._bucket_args.update(kwargs)
+
+    def _get_bucket(self, key):
+        """Get bucket by key.
+
+        Raises:
+            KeyError: If bucket not exists.
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            raise KeyError("Key %s not in buckets.keys()" % key)
+        return bucket
+
+    def _get_or_create_bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._mutex:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = self._new_bucket()
+        return bucket
+
+    def get_state(self, versions=None):
+        """Get state of reservoir without buckets, and states of buckets
+        changed since `versions`, so that buckets are saved to snapshot only
+        if changed. States are plain data, see `_ReservoirBucket.get_state`.
+
+        Args:
+            versions: A dict maps key of bucket to its version saved last
+                time, all buckets are returned if None.
+
+        Returns:
+            A tuple of json serializable state of reservoir, and a dict maps
+            key of changed bucket to (version, state of bucket).
+        """
+        with self._mutex:
+            buckets = dict(self._buckets)
+            state = {
+                'max_size': self._max_size,
+                'seed': self._seed,
+                'bucket_class': self._bucket_class.STATE_NAME,
+                'bucket_args': dict(self._bucket_args),
+                'versions': dict(self._versions),
+                'version': self._version
+            }
+        changed = {}
+        for key, bucket in buckets.items():
+            version = state['versions'].get(key, 0)
+            if versions is None or versions.get(key) != version:
+                changed[key] = (version, bucket.get_state())
+        return state, changed
+
+    @classmethod
+    def from_state(cls, state, buckets):
+        """Create reservoir by state got from `get_state` and all buckets.
+
+        Args:
+            state: State of reservoir got from `get_state`.
+            buckets: A dict maps key to bucket, see `bucket_from_state`.
+        """
+        reservoir = cls(
+            state['max_size'],
+            seed=state['seed'],
+            bucket_class=_BUCKET_CLASSES[state['bucket_class']],
+            bucket_args=state['bucket_args'])
+        reservoir._buckets = dict(buckets)
+        reservoir._versions = dict(state['versions'])
+        reservoir._version = state['version']
+        # Versions are kept, so that processes loading the same snapshot
+        # have the same versions.
+        _reserve_versions(reservoir._version)
+        return reservoir
+
+    def _touch(self, key):
+        self._versions[key] = self._version = next(_version_counter)
+
+    def get_version(self, run=None, tag=None):
+        """Get version of bucket of run and tag, or version of the whole
+        reservoir if run is None.
+
+        Returns:
+            Version as int, 0 if bucket not exists.
+        """
+        if run is None:
+            return self._version
+        return self._versions.get(run + "/" + tag, 0)
+
     @property
     def keys(self):
         """Return all keys in self._buckets.
@@ -68,8 +237,7 @@ class Reservoir(object):
             All keys in reservoir buckets.
         :return:
         """
-        with self._mutex:
-            return list(self._buckets.keys())
+        return list(self._buckets)
 
     def _exist_in_keys(self, key):
         """Determine if key exists.
@@ -80,7 +248,7 @@ class Reservoir(object):
         Returns:
             True if key exists in buckets.keys, otherwise False.
         """
-        return True if key in self._buckets.keys() else False
+        return key in self._buckets
 
     def exist_in_keys(self, run, tag):
         """Determine if run_tag exists.
@@ -98,10 +266,7 @@ class Reservoir(object):
         return self._exist_in_keys(key)
 
     def _get_num_items_index(self, key):
-        keys = self.keys
-        if key not in keys:
-            raise KeyError("Key %s not in buckets.keys()" % key)
-        return self._buckets[key].num_items_index
+        return self._get_bucket(key).num_items_index
 
     def get_num_items_index(self, run, tag):
         key = run + "/" + tag
@@ -116,11 +281,7 @@ class Reservoir(object):
         Returns:
             One bucket in reservoir buckets by key.
         """
-        keys = self.keys
-        with self._mutex:
-            if key not in keys:
-                raise KeyError("Key %s not in buckets.keys()" % key)
-            return self._buckets[key].items
+        return self._get_bucket(key).items
 
     def get_items(self, run, tag):
         """Get items with tag 'run_tag'
@@ -137,6 +298,78 @@ class Reservoir(object):
         key = run + "/" + tag
         return self._get_items(key)
 
+    def get_scalar_arrays(self, run, tag):
+        """Get scalar data of 'run_tag' as arrays without creating protobuf.
+
+        Only valid for reservoir with bucket class `_ScalarReservoirBucket`.
+
+        Args:
+            run: Identity of one tablet.
+            tag: Identity of one record in tablet.
+
+        Returns:
+            A tuple of steps, timestamps and values, see
+            `_ScalarReservoirBucket.arrays`.
+        """
+        key = run + "/" + tag
+        return self._get_bucket(key).arrays
+
+    def get_items_since(self, run, tag, version=None, step=None):
+        """Get items of bucket added after `version` and with step larger
+        than `step`, so that client only gets new items since last request.
+
+        Args:
+            run: Identity of one tablet.
+            tag: Identity of one record in tablet.
+            version: Version of bucket got last time.
+            step: Largest step got last time.
+
+        Returns:
+            A tuple of current version, ids and items, and ids of items got
+            before but removed since `version`, see
+            `_ReservoirBucket.get_items_since`.
+        """
+        key = run + "/" + tag
+        return self._get_bucket(key).get_items_since(version, step)
+
+    def get_item(self, run, tag, id):
+        """Get item of 'run_tag' by its id got by `get_items_since`.
+
+        Raises:
+            KeyError: If item is not in bucket any more.
+        """
+        key = run + "/" + tag
+        return self._get_bucket(key).get_item(id)
+
+    def get_scalar_arrays_since(self, run, tag, version=None, step=None):
+        """Get data of bucket as numpy arrays like `get_scalar_arrays`, but
+        only data added after `version` and with step larger than `step`.
+
+        Returns:
+            A tuple of current version, ids, steps, timestamps and values,
+            and ids of data removed since `version`, see
+            `_ScalarReservoirBucket.get_arrays_since`.
+        """
+        key = run + "/" + tag
+        return self._get_bucket(key).get_arrays_since(version, step)
+
+    def get_scalar_series(self, run, tag, start_step=None, end_step=None):
+        """Get scalar series of 'run_tag' in step range.
+
+        Only valid for reservoir with bucket class `_ScalarReservoirBucket`.
+
+        Args:
+            run: Identity of one tablet.
+            tag: Identity of one record in tablet.
+            start_step: Minimum step included, no limit if None.
+            end_step: Maximum step included, no limit if None.
+
+        Returns:
+            A tuple of steps, timestamps and values sorted by step.
+        """
+        key = run + "/" + tag
+        return self._get_bucket(key).get_series(start_step, end_step)
+
     def _add_item(self, key, item):
         """Add a new item to reservoir buckets with given tag as key.
 
@@ -146,15 +379,14 @@ class Reservoir(object):
         If bucket with key is full, each item will be added with same
         probability.
 
-        Add new item to buckets will always valid because self._buckets is a
-        collection.defaultdict.
+        Bucket with key will be created if not exists.
 
         Args:
             key: Tag of one bucket to add new item.
             item: New item to add to bucket.
         """
-        with self._mutex:
-            self._buckets[key].add_item(item)
+        self._get_or_create_bucket(key).add_item(item)
+        self._touch(key)
 
     def _add_scalar_item(self, key, item):
         """Add a new scalar item to reservoir buckets with given tag as key.
@@ -165,15 +397,14 @@ class Reservoir(object):
         If bucket with key is full, each item will be added with same
         probability.
 
-        Add new item to buckets will always valid because self._buckets is a
-        collection.defaultdict.
+        Bucket with key will be created if not exists.
 
         Args:
             key: Tag of one bucket to add new item.
             item: New item to add to bucket.
         """
-        with self._mutex:
-            self._buckets[key].add_scalar_item(item)
+        self._get_or_create_bucket(key).add_scalar_item(item)
+        self._touch(key)
 
     def _add_scalars_item(self, key, item):
         """Add a new scalar item to reservoir buckets with given tag as key.
@@ -184,15 +415,14 @@ class Reservoir(object):
         If bucket with key is full, each item will be added with same
         probability.
 
-        Add new item to buckets will always valid because self._buckets is a
-        collection.defaultdict.
+        Bucket with key will be created if not exists.
 
         Args:
             key: Tag of one bucket to add new item.
             item: New item to add to bucket.
         """
-        with self._mutex:
-            self._buckets[key].add_scalars_item(item)
+        self._get_or_create_bucket(key).add_scalars_item(item)
+        self._touch(key)
 
     def add_item(self, run, tag, item):
         """Add a new item to reservoir buckets with given tag as key.
@@ -226,9 +456,36 @@ class Reservoir(object):
         else:
             raise ValueError("Not scalar type:" + item.WhichOneof("one_value"))
 
+    def add_scalar_values(self,
+                          run,
+                          tag,
+                          steps,
+                          timestamps,
+                          values,
+                          sub_tag=None):
+        """Add a batch of scalar values of one tag to reservoir buckets.
+
+        Key of bucket is the same as `add_scalar_item`.
+
+        Args:
+            run: Identity of one tablet.
+            tag: Identity of one record in tablet.
+            steps: A list of steps.
+            timestamps: A list of timestamps.
+            values: A list of values.
+            sub_tag: Sub tag for `scalars` data, None for `scalar` data.
+        """
+        if sub_tag is None:
+            key = run + "/" + tag
+        else:
+            key = run + "/" + add_sub_tag(tag, sub_tag) + "/" + tag
+        self._get_or_create_bucket(key).add_scalar_values(
+            tag, sub_tag, steps, timestamps, values)
+        self._touch(key)
+
     def _cut_tail(self, key):
-        with self._mutex:
-            self._buckets[key].cut_tail()
+        self._get_bucket(key).cut_tail()
+        self._touch(key)
 
     def cut_tail(self, run, tag):
         """Pop the last item in reservoir buckets.
@@ -248,6 +505,9 @@ class _ReservoirBucket(object):
     """Data manager for sampling data, use reservoir sampling.
     """
 
+    # Name of bucket class in state, see `get_state`.
+    STATE_NAME = 'default'
+
     def __init__(self, max_size, random_instance=None):
         """Create a _ReservoirBucket instance.
 
@@ -267,6 +527,16 @@ class _ReservoirBucket(object):
         self._random = random_instance if random_instance is not None else \
             random.Random(0)
         self._items = []
+        # Sequence number of each item in order of adding, which is
+        # increasing since new item is always put at the end, and used as
+        # stable id of item.
+        self._seqs = []
+        self._next_seq = 0
+        # Versions when items are removed and seqs of them, items removed at
+        # or before `_removed_since` are forgotten.
+        self._removed_versions = array.array('q')
+        self._removed_seqs = array.array('q')
+        self._removed_since = 0
         self._mutex = threading.Lock()
         self._num_items_index = 0
 
@@ -276,6 +546,99 @@ class _ReservoirBucket(object):
         # improve performance when data is monotonous
         self._last_special = False
 
+    def get_state(self):
+        """Get state of bucket as plain data, so that it is saved to
+        snapshot without pickle, items are saved as serialized protobuf.
+
+        Returns:
+            A tuple of json serializable dict and a dict of numpy arrays,
+            which can be saved by `numpy.savez`.
+        """
+        with self._mutex:
+            return self._get_state()
+
+    def _get_state(self):
+        version, internal, gauss_next = self._random.getstate()
+        meta = {
+            'class': self.STATE_NAME,
+            'max_size': self._max_size,
+            'random': [version, gauss_next],
+            'next_seq': self._next_seq,
+            'removed_since': self._removed_since,
+            'num_items_index': self._num_items_index,
+            'last_special': self._last_special
+        }
+        arrays = {
+            'random': np.array(internal, dtype=np.int64),
+            'seqs': np.array(self._seqs, dtype=np.int64),
+            'removed_versions': np.array(self._removed_versions,
+                                         dtype=np.int64),
+            'removed_seqs': np.array(self._removed_seqs, dtype=np.int64)
+        }
+        arrays['items'], arrays['item_offsets'] = _pack_values(self._items)
+        for name in ('max_scalar', 'min_scalar'):
+            item = getattr(self, name)
+            if item is not None:
+                arrays[name] = _pack_values([item])[0]
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        """Create bucket by state got from `get_state`."""
+        bucket = cls(meta['max_size'])
+        bucket._set_state(meta, arrays)
+        return bucket
+
+    def _set_state(self, meta, arrays):
+        version, gauss_next = meta['random']
+        self._random.setstate(
+            (version, tuple(arrays['random'].tolist()), gauss_next))
+        self._next_seq = meta['next_seq']
+        self._removed_since = meta['removed_since']
+        self._num_items_index = meta['num_items_index']
+        self._last_special = meta['last_special']
+        self._seqs = arrays['seqs'].tolist()
+        self._removed_versions = array.array('q', arrays['removed_versions'])
+        self._removed_seqs = array.array('q', arrays['removed_seqs'])
+        self._items = _unpack_values(arrays['items'], arrays['item_offsets'])
+        for name in ('max_scalar', 'min_scalar'):
+            if name in arrays:
+                setattr(self, name,
+                        Record.Value.FromString(arrays[name].tobytes()))
+
+    def _append(self, item):
+        self._items.append(item)
+        self._seqs.append(self._next_seq)
+
+    def _pop(self, index):
+        self._items.pop(index)
+        self._record_removed(self._seqs.pop(index))
+
+    def _replace_last(self, item):
+        self._items[-1] = item
+        self._record_removed(self._seqs[-1])
+        self._seqs[-1] = self._next_seq
+
+    def _record_removed(self, seq):
+        self._removed_versions.append(self._next_seq)
+        self._removed_seqs.append(seq)
+        if len(self._removed_seqs) >= 2 * REMOVED_LOG_SIZE:
+            self._removed_since = self._removed_versions[-REMOVED_LOG_SIZE - 1]
+            del self._removed_versions[:-REMOVED_LOG_SIZE]
+            del self._removed_seqs[:-REMOVED_LOG_SIZE]
+
+    def _get_removed(self, version):
+        """Get seqs of items added at or before `version` and removed after
+        it, None if `version` is newer than bucket or removed items since it
+        are forgotten, then client should get all items again.
+        """
+        if version is None:
+            return []
+        if version > self._next_seq or version < self._removed_since:
+            return None
+        start = bisect.bisect_right(self._removed_versions, version)
+        return [seq for seq in self._removed_seqs[start:] if seq <= version]
+
     def add_item(self, item):
         """ Add an item to bucket, replacing an old item with probability.
 
@@ -286,15 +649,16 @@ class _ReservoirBucket(object):
             item: The item to add to reservoir bucket.
         """
         with self._mutex:
+            self._next_seq += 1
             if len(self._items) < self._max_size or self._max_size == 0:
-                self._items.append(item)
+                self._append(item)
             else:
                 r = self._random.randint(1, self._num_items_index)
                 if r < self._max_size:
-                    self._items.pop(r)
-                    self._items.append(item)
+                    self._pop(r)
+                    self._append(item)
                 else:
-                    self._items[-1] = item
+                    self._replace_last(item)
             self._num_items_index += 1
 
     def add_scalar_item(self, item):
@@ -309,6 +673,7 @@ class _ReservoirBucket(object):
             item: The item to add to reservoir bucket.
         """
         with self._mutex:
+            self._next_seq += 1
             # save max and min value
             if not self.max_scalar or self.max_scalar.value < item.value:
                 self.max_scalar = item
@@ -317,7 +682,7 @@ class _ReservoirBucket(object):
 
             if len(self._items) < self._max_size or self._max_size == 0:
                 # capacity is valid, append directly
-                self._items.append(item)
+                self._append(item)
             else:
                 if self._last_special:
                     if self._items[-1].id == self.min_scalar.id or self._items[
@@ -328,8 +693,8 @@ class _ReservoirBucket(object):
                         # data is monotonous, drop last item by reservoir algorithm
                         r = self._random.randint(1, self._num_items_index)
                         if r >= self._max_size:
-                            self._items.pop(-1)
-                            self._items.append(item)
+                            self._pop(-1)
+                            self._append(item)
                             self._num_items_index += 1
                             return
                 if item.id == self.min_scalar.id or item.id == self.max_scalar.id:
@@ -348,8 +713,8 @@ class _ReservoirBucket(object):
                             r = r - 1
                         elif r + 1 < self._max_size:
                             r = r + 1
-                    self._items.pop(r)
-                    self._items.append(item)
+                    self._pop(r)
+                    self._append(item)
 
             self._num_items_index += 1
 
@@ -363,6 +728,7 @@ class _ReservoirBucket(object):
             item: The item to add to reservoir bucket.
         """
         with self._mutex:
+            self._next_seq += 1
             # save max and min value
             if not self.max_scalar or self.max_scalar.tag_value.value < item.tag_value.value:
                 self.max_scalar = item
@@ -371,7 +737,7 @@ class _ReservoirBucket(object):
 
             if len(self._items) < self._max_size or self._max_size == 0:
                 # capacity is valid, append directly
-                self._items.append(item)
+                self._append(item)
             else:
                 if self._last_special:
                     if self._items[-1].id == self.min_scalar.id or self._items[
@@ -382,8 +748,8 @@ class _ReservoirBucket(object):
                         # data is monotic, drop last item by reservoir algorithm
                         r = self._random.randint(1, self._num_items_index)
                         if r >= self._max_size:
-                            self._items.pop(-1)
-                            self._items.append(item)
+                            self._pop(-1)
+                            self._append(item)
                             self._num_items_index += 1
                             return
                 if item.id == self.min_scalar.id or item.id == self.max_scalar.id:
@@ -402,10 +768,10 @@ class _ReservoirBucket(object):
                             r = r - 1
                         elif r + 1 < self._max_size:
                             r = r + 1
-                    self._items.pop(r)
-                    self._items.append(item)
+                    self._pop(r)
+                    self._append(item)
                 else:
-                    self._items[-1] = item
+                    self._replace_last(item)
 
             self._num_items_index += 1
 
@@ -419,6 +785,56 @@ class _ReservoirBucket(object):
         with self._mutex:
             return self._items
 
+    @property
+    def version(self):
+        """Version of bucket, which is seq of the latest added item, and
+        increases whenever items change.
+        """
+        with self._mutex:
+            return self._next_seq
+
+    def _since_index(self, version):
+        return bisect.bisect_right(self._seqs, version)
+
+    def get_items_since(self, version=None, step=None):
+        """Get items added after `version`, and with step larger than
+        `step`.
+
+        Args:
+            version: Version of bucket got by client last time.
+            step: Largest step got by client last time.
+
+        Returns:
+            A tuple of current version, seqs of items as their ids, items,
+            and ids of items added at or before `version` but removed since
+            then. Removed ids are None and all items are returned, if
+            `version` is newer than bucket, which happens when log is
+            reloaded, or too many items are removed since `version`.
+        """
+        with self._mutex:
+            current = self._next_seq
+            removed = self._get_removed(version)
+            start = 0 if removed is None or version is None else \
+                self._since_index(version)
+            indices = [
+                index for index in range(start, len(self._items))
+                if step is None or self._items[index].id > step
+            ]
+            return (current, [self._seqs[index] for index in indices],
+                    [self._items[index] for index in indices], removed)
+
+    def get_item(self, seq):
+        """Get item by its seq got by `get_items_since`.
+
+        Raises:
+            KeyError: If item is not in bucket any more.
+        """
+        with self._mutex:
+            index = bisect.bisect_left(self._seqs, seq)
+            if index == len(self._seqs) or self._seqs[index] != seq:
+                raise KeyError('Item {} is not in bucket.'.format(seq))
+            return self._items[index]
+
     @property
     def num_items_index(self):
         with self._mutex:
@@ -431,8 +847,553 @@ class _ReservoirBucket(object):
         method is used to handle this problem.
         """
         with self._mutex:
-            self._items.pop()
+            # Version changes, so that removal is seen by client.
+            self._next_seq += 1
+            self._pop(-1)
+            self._num_items_index -= 1
+
+
+def _min_max_indices(values):
+    """Get indices of min and max points of every 4 points.
+
+    Returns:
+        Sorted indices of 2 distinct points of every 4 points, the first min
+        and the last max are taken, NaN is ignored unless all values of the
+        4 points are the same.
+    """
+    values = values.reshape(-1, 4)
+    nan = np.isnan(values)
+    mins = np.argmin(np.where(nan, np.inf, values), axis=1)
+    maxs = 3 - np.argmax(np.where(nan, -np.inf, values)[:, ::-1], axis=1)
+    same = mins == maxs
+    maxs[same] = np.where(mins[same] == 0, 3, 0)
+    offsets = np.arange(0, len(values) * 4, 4)
+    return np.stack(
+        [offsets + np.minimum(mins, maxs), offsets + np.maximum(mins, maxs)],
+        axis=1).ravel()
+
+
+def _min_max_points(points):
+    """Same as `_min_max_indices` for a list of 4 (step, timestamp, value),
+    without overhead of numpy for so few points.
+
+    Returns:
+        A list of 2 points.
+    """
+    low = high = None
+    for index, point in enumerate(points):
+        value = point[2]
+        if value != value:
+            continue
+        if low is None or value < points[low][2]:
+            low = index
+        if high is None or value >= points[high][2]:
+            high = index
+    if low is None:
+        low, high = 0, 3
+    elif low == high:
+        high = 3 if low == 0 else 0
+    if low > high:
+        low, high = high, low
+    return [points[low], points[high]]
+
+
+class _ScalarSeries(object):
+    """Scalar series with bounded size, as a min/max pyramid.
+
+    Points of level 0 are raw points, every 4 points of a level are
+    compacted to their min and max points as 2 points of the next level,
+    so that peaks are never dropped. All points in the series array are of
+    the same level, and newer points of lower levels are kept in pending
+    buffers until they are compacted to that level, so that resolution is
+    the same along the whole series. When series array is full, it is
+    compacted to the next level, halving resolution.
+    """
+
+    _INIT_CAPACITY = 16
+
+    def __init__(self, max_size):
+        # Size is multiple of 4 to compact series array without remainder.
+        self._max_size = max(max_size - max_size % 4, 4)
+        self._size = 0
+        self._steps = np.empty(self._INIT_CAPACITY, dtype=np.int64)
+        self._timestamps = np.empty(self._INIT_CAPACITY, dtype=np.int64)
+        self._values = np.empty(self._INIT_CAPACITY, dtype=np.float32)
+        # Pending points of each level lower than series array, each is a
+        # list of less than 4 (step, timestamp, value).
+        self._pending = []
+
+    def __len__(self):
+        return self._size + sum(len(points) for points in self._pending)
+
+    def get_state(self):
+        """Get state of series as plain data, see
+        `_ReservoirBucket.get_state`.
+        """
+        meta = {
+            'max_size': self._max_size,
+            'size': self._size,
+            'pending': [[[int(step), int(timestamp),
+                          float(value)] for step, timestamp, value in points]
+                        for points in self._pending]
+        }
+        arrays = {
+            'steps': self._steps[:self._size],
+            'timestamps': self._timestamps[:self._size],
+            'values': self._values[:self._size]
+        }
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        series = cls(meta['max_size'])
+        size = meta['size']
+        series._resize(max(size, cls._INIT_CAPACITY))
+        series._steps[:size] = arrays['steps']
+        series._timestamps[:size] = arrays['timestamps']
+        series._values[:size] = arrays['values']
+        series._size = size
+        series._pending = [[tuple(point) for point in points]
+                           for points in meta['pending']]
+        return series
+
+    @property
+    def level(self):
+        return len(self._pending)
+
+    def _resize(self, capacity):
+        for name in ('_steps', '_timestamps', '_values'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _compact(self):
+        keep = _min_max_indices(self._values[:self._size])
+        self._size = len(keep)
+        for name in ('_steps', '_timestamps', '_values'):
+            column = getattr(self, name)
+            column[:self._size] = column[keep]
+        self._pending.append([])
+
+    def _append(self, step, timestamp, value):
+        if self._size == len(self._steps):
+            self._resize(min(self._size * 2, self._max_size))
+        self._steps[self._size] = step
+        self._timestamps[self._size] = timestamp
+        self._values[self._size] = value
+        self._size += 1
+
+    def add(self, step, timestamp, value):
+        points = [(step, timestamp, value)]
+        for pending in self._pending:
+            pending.extend(points)
+            if len(pending) < 4:
+                return
+            points = _min_max_points(pending)
+            del pending[:]
+        if self._size + len(points) > self._max_size:
+            # Points are of the level lower than compacted series array.
+            self._compact()
+            self._pending[-1].extend(points)
+            return
+        for point in points:
+            self._append(*point)
+
+    def pop(self):
+        """Remove the last point if it is not compacted yet.
+        """
+        if self._pending:
+            if self._pending[0]:
+                self._pending[0].pop()
+        elif self._size:
+            self._size -= 1
+
+    def get(self, start_step=None, end_step=None):
+        steps = self._steps[:self._size]
+        timestamps = self._timestamps[:self._size]
+        values = self._values[:self._size]
+        # Pending points of higher levels are older.
+        pending = [
+            point for points in reversed(self._pending) for point in points
+        ]
+        if pending:
+            steps = np.concatenate(
+                [steps, np.array([point[0] for point in pending],
+                                 dtype=np.int64)])
+            timestamps = np.concatenate(
+                [timestamps, np.array([point[1] for point in pending],
+                                      dtype=np.int64)])
+            values = np.concatenate(
+                [values, np.array([point[2] for point in pending],
+                                  dtype=np.float32)])
+        return _select_steps(steps, timestamps, values, start_step, end_step)
+
+
+def _select_steps(steps, timestamps, values, start_step=None, end_step=None):
+    """Select points in step range sorted by step.
+
+    Returns:
+        A tuple of steps, timestamps and values numpy arrays.
+    """
+    mask = np.ones(len(steps), dtype=bool)
+    if start_step is not None:
+        mask &= steps >= start_step
+    if end_step is not None:
+        mask &= steps <= end_step
+    steps = steps[mask]
+    order = np.argsort(steps, kind='stable')
+    return steps[order], timestamps[mask][order], values[mask][order]
+
+
+class _ScalarReservoirBucket(_ReservoirBucket):
+    """Reservoir bucket for scalar data, stores steps, timestamps and values
+    in contiguous numpy arrays instead of a list of protobuf.
+
+    Sampling is the same as `_ReservoirBucket.add_scalar_item`, the max and
+    min points are always reserved.
+    """
+
+    STATE_NAME = 'scalar'
+    _INIT_CAPACITY = 16
+
+    def __init__(self,
+                 max_size,
+                 random_instance=None,
+                 series_size=DEFAULT_SCALAR_SERIES_MAXSIZE):
+        """
+        Args:
+            max_size: The maximum size of reservoir bucket.
+            random_instance: The random number generator.
+            series_size: The maximum size of scalar series, no series is kept
+                if it is 0.
+        """
+        super(_ScalarReservoirBucket, self).__init__(max_size,
+                                                     random_instance)
+        self._size = 0
+        self._steps = np.empty(0, dtype=np.int64)
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0, dtype=np.float32)
+        self._seqs = np.empty(0, dtype=np.int64)
+        # For scalars data, tag and sub tag are the same for whole bucket.
+        self._tag = None
+        self._sub_tag = None
+
+        self._max_step = None
+        self._max_value = None
+        self._min_step = None
+        self._min_value = None
+
+        self._series = _ScalarSeries(series_size) if series_size else None
+
+    def _get_state(self):
+        meta, arrays = super(_ScalarReservoirBucket, self)._get_state()
+        size = self._size
+        meta.update({
+            'size': size,
+            'tag': self._tag,
+            'sub_tag': self._sub_tag,
+            'max_step': _to_int(self._max_step),
+            'max_value': _to_float(self._max_value),
+            'min_step': _to_int(self._min_step),
+            'min_value': _to_float(self._min_value),
+            'series': None
+        })
+        arrays.update({
+            'steps': self._steps[:size],
+            'timestamps': self._timestamps[:size],
+            'values': self._values[:size],
+            'seqs': self._seqs[:size]
+        })
+        if self._series is not None:
+            meta['series'], series_arrays = self._series.get_state()
+            for name, value in series_arrays.items():
+                arrays['series_' + name] = value
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, meta, arrays):
+        bucket = cls(meta['max_size'], series_size=0)
+        bucket._set_state(meta, arrays)
+        return bucket
+
+    def _set_state(self, meta, arrays):
+        super(_ScalarReservoirBucket, self)._set_state(meta, arrays)
+        self._size = meta['size']
+        self._steps = arrays['steps'].astype(np.int64)
+        self._timestamps = arrays['timestamps'].astype(np.int64)
+        self._values = arrays['values'].astype(np.float32)
+        self._seqs = arrays['seqs'].astype(np.int64)
+        self._tag = meta['tag']
+        self._sub_tag = meta['sub_tag']
+        self._max_step = meta['max_step']
+        self._max_value = meta['max_value']
+        self._min_step = meta['min_step']
+        self._min_value = meta['min_value']
+        if meta['series'] is not None:
+            self._series = _ScalarSeries.from_state(
+                meta['series'], {
+                    name[len('series_'):]: value
+                    for name, value in arrays.items()
+                    if name.startswith('series_')
+                })
+
+    def _reserve(self, size):
+        capacity = len(self._steps)
+        if size <= capacity:
+            return
+        capacity = max(capacity * 2, size, self._INIT_CAPACITY)
+        if self._max_size:
+            capacity = min(capacity, self._max_size)
+        for name in ('_steps', '_timestamps', '_values', '_seqs'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _set(self, index, step, timestamp, value):
+        self._steps[index] = step
+        self._timestamps[index] = timestamp
+        self._values[index] = value
+        self._seqs[index] = self._next_seq
+
+    def _pop_and_append(self, index, step, timestamp, value):
+        self._record_removed(int(self._seqs[index]))
+        last = self._size - 1
+        for column in (self._steps, self._timestamps, self._values,
+                       self._seqs):
+            column[index:last] = column[index + 1:self._size]
+        self._set(last, step, timestamp, value)
+
+    def _replace_last(self, step, timestamp, value):
+        self._record_removed(int(self._seqs[self._size - 1]))
+        self._set(self._size - 1, step, timestamp, value)
+
+    def _is_special(self, step):
+        return step == self._min_step or step == self._max_step
+
+    def add_item(self, item):
+        self.add_scalar_item(item)
+
+    def add_scalar_item(self, item):
+        """ Add an scalar item to bucket, replacing an old item with probability.
+
+        Args:
+            item: The item to add to reservoir bucket, its type is `value` or
+                `tag_value`.
+        """
+        if item.WhichOneof("one_value") == "tag_value":
+            if self._sub_tag is None:
+                self._tag = item.tag
+                self._sub_tag = item.tag_value.tag
+            # keep same as _ReservoirBucket.add_scalars_item
+            self._add(item.id, item.timestamp, item.tag_value.value, True)
+        else:
+            if self._tag is None:
+                self._tag = item.tag
+            self._add(item.id, item.timestamp, item.value, False)
+
+    add_scalars_item = add_scalar_item
+
+    def _add(self, step, timestamp, value, replace_last):
+        with self._mutex:
+            self._add_value(step, timestamp, value, replace_last)
+
+    def add_scalar_values(self, tag, sub_tag, steps, timestamps, values):
+        """Add a batch of scalar values of one tag to bucket.
+
+        Same as adding `Record.Value` by `add_scalar_item` one by one.
+
+        Args:
+            tag: Tag of values.
+            sub_tag: Sub tag of `tag_value`, None for `value`.
+            steps: A list of steps.
+            timestamps: A list of timestamps.
+            values: A list of values.
+        """
+        replace_last = sub_tag is not None
+        with self._mutex:
+            if self._tag is None:
+                self._tag = tag
+            if sub_tag is not None and self._sub_tag is None:
+                self._sub_tag = sub_tag
+            for step, timestamp, value in zip(steps, timestamps, values):
+                self._add_value(step, timestamp, value, replace_last)
+
+    def _add_value(self, step, timestamp, value, replace_last):
+        self._next_seq += 1
+        if self._series is not None:
+            self._series.add(step, timestamp, value)
+        # save max and min value
+        if self._max_step is None or self._max_value < value:
+            self._max_step, self._max_value = step, value
+        if self._min_step is None or self._min_value > value:
+            self._min_step, self._min_value = step, value
+
+        if self._size < self._max_size or self._max_size == 0:
+            # capacity is valid, append directly
+            self._reserve(self._size + 1)
+            self._set(self._size, step, timestamp, value)
+            self._size += 1
+        else:
+            if self._last_special:
+                if self._is_special(self._steps[self._size - 1]):
+                    # data is not monotonous, set special to False
+                    self._last_special = False
+                else:
+                    # data is monotonous, drop last item by reservoir algorithm
+                    r = self._random.randint(1, self._num_items_index)
+                    if r >= self._max_size:
+                        self._replace_last(step, timestamp, value)
+                        self._num_items_index += 1
+                        return
+            if self._is_special(step):
+                # this item is max or min, should be reserved
+                r = self._random.randint(1, self._max_size - 1)
+                self._last_special = True
+            else:
+                # drop by reservoir algorithm
+                r = self._random.randint(1, self._num_items_index)
+                self._last_special = False
+            if r < self._max_size:
+                if self._is_special(self._steps[r]):
+                    # reserve max and min point
+                    if r - 1 > 0:
+                        r = r - 1
+                    elif r + 1 < self._max_size:
+                        r = r + 1
+                self._pop_and_append(r, step, timestamp, value)
+            elif replace_last:
+                self._replace_last(step, timestamp, value)
+
+        self._num_items_index += 1
+
+    @property
+    def arrays(self):
+        """Get copies of data in bucket.
+
+        Returns:
+            A tuple of steps (int64), timestamps (int64) and values (float32)
+            numpy arrays.
+        """
+        with self._mutex:
+            size = self._size
+            return (self._steps[:size].copy(), self._timestamps[:size].copy(),
+                    self._values[:size].copy())
+
+    def _since_index(self, version):
+        return int(
+            np.searchsorted(
+                self._seqs[:self._size], version, side='right'))
+
+    def _since_indices(self, version, step):
+        removed = self._get_removed(version)
+        if removed is None or version is None:
+            start = 0
+        else:
+            start = self._since_index(version)
+        indices = np.arange(start, self._size)
+        if step is not None:
+            indices = indices[self._steps[start:self._size] > step]
+        return indices, removed
+
+    def get_arrays_since(self, version=None, step=None):
+        """Get copies of data added after `version`, and with step larger
+        than `step`.
+
+        Returns:
+            A tuple of current version, seqs as ids, steps, timestamps and
+            values, and ids of data removed since `version`, same as
+            `_ReservoirBucket.get_items_since`.
+        """
+        with self._mutex:
+            indices, removed = self._since_indices(version, step)
+            return (self._next_seq, self._seqs[indices], self._steps[indices],
+                    self._timestamps[indices], self._values[indices], removed)
+
+    def get_series(self, start_step=None, end_step=None):
+        """Get series in step range, or sampled data if series is disabled.
+
+        Returns:
+            A tuple of steps, timestamps and values numpy arrays sorted by
+            step.
+        """
+        with self._mutex:
+            if self._series is not None:
+                return self._series.get(start_step, end_step)
+            size = self._size
+            return _select_steps(self._steps[:size], self._timestamps[:size],
+                                 self._values[:size], start_step, end_step)
+
+    @property
+    def items(self):
+        """Get data in bucket as a list of `Record.Value`.
+
+        Returns:
+            All items.
+        """
+        return self._to_items(*self.arrays)
+
+    def get_items_since(self, version=None, step=None):
+        with self._mutex:
+            indices, removed = self._since_indices(version, step)
+            current = self._next_seq
+            seqs = self._seqs[indices].tolist()
+            arrays = (self._steps[indices], self._timestamps[indices],
+                      self._values[indices])
+        return current, seqs, self._to_items(*arrays), removed
+
+    def get_item(self, seq):
+        with self._mutex:
+            index = self._since_index(seq - 1)
+            if index == self._size or self._seqs[index] != seq:
+                raise KeyError('Item {} is not in bucket.'.format(seq))
+            return self._to_items(self._steps[index:index + 1],
+                                  self._timestamps[index:index + 1],
+                                  self._values[index:index + 1])[0]
+
+    def _to_items(self, steps, timestamps, values):
+        if self._sub_tag is not None:
+            return [
+                Record.Value(
+                    id=step,
+                    tag=self._tag,
+                    timestamp=timestamp,
+                    tag_value=Record.TagValue(tag=self._sub_tag, value=value))
+                for step, timestamp, value in zip(
+                    steps.tolist(), timestamps.tolist(), values.tolist())
+            ]
+        return [
+            Record.Value(id=step, tag=self._tag, timestamp=timestamp,
+                         value=value)
+            for step, timestamp, value in zip(
+                steps.tolist(), timestamps.tolist(), values.tolist())
+        ]
+
+    def cut_tail(self):
+        with self._mutex:
+            self._next_seq += 1
+            self._record_removed(int(self._seqs[self._size - 1]))
+            self._size -= 1
             self._num_items_index -= 1
+            if self._series is not None:
+                self._series.pop()
+
+
+_BUCKET_CLASSES = {
+    bucket_class.STATE_NAME: bucket_class
+    for bucket_class in (_ReservoirBucket, _ScalarReservoirBucket)
+}
+
+
+def bucket_from_state(meta, arrays):
+    """Create bucket by state got from `get_state` of bucket.
+
+    Args:
+        meta: Json serializable dict of state.
+        arrays: A dict of numpy arrays of state.
+    """
+    return _BUCKET_CLASSES[meta['class']].from_state(meta, arrays)
 
 
 class DataManager(object):
@@ -448,7 +1409,9 @@ class DataManager(object):
         """
         self._reservoirs = {
             "scalar":
-            Reservoir(max_size=DEFAULT_PLUGIN_MAXSIZE["scalar"]),
+            Reservoir(
+                max_size=DEFAULT_PLUGIN_MAXSIZE["scalar"],
+                bucket_class=_ScalarReservoirBucket),
             "histogram":
             Reservoir(max_size=DEFAULT_PLUGIN_MAXSIZE["histogram"]),
             "image":
@@ -470,6 +1433,14 @@ class DataManager(object):
         }
         self._mutex = threading.Lock()
 
+    def set_scalar_series_size(self, size):
+        """Set maximum size of scalar series of tags added later.
+
+        Args:
+            size: Maximum number of points of each series, 0 to disable.
+        """
+        self._reservoirs["scalar"].set_bucket_args(series_size=size)
+
     def add_reservoir(self, plugin):
         """Add reservoir to reservoirs.
 
@@ -494,10 +1465,10 @@ class DataManager(object):
         Returns:
             Reservoir bucket for plugin.
         """
-        with self._mutex:
-            if plugin not in self._reservoirs.keys():
-                raise KeyError("Key %s not in reservoirs." % plugin)
-            return self._reservoirs[plugin]
+        reservoir = self._reservoirs.get(plugin)
+        if reservoir is None:
+            raise KeyError("Key %s not in reservoirs." % plugin)
+        return reservoir
 
     def add_item(self, plugin, run, tag, item):
         """Add item to one plugin reservoir bucket.
@@ -510,11 +1481,97 @@ class DataManager(object):
             tag: Tag will be used to generate paths of tablets.
             item: The item to add to reservoir bucket.
         """
+        if 'scalar' == plugin or 'scalars' == plugin:  # We adapt scalars data to be saved in scalar reservoir.
+            self._reservoirs['scalar'].add_scalar_item(run, tag, item)
+        else:
+            self._reservoirs[plugin].add_item(run, tag, item)
+
+    def add_scalar_values(self,
+                          run,
+                          tag,
+                          steps,
+                          timestamps,
+                          values,
+                          sub_tag=None):
+        """Add a batch of scalar values of one tag to scalar reservoir.
+
+        Args:
+            run: Each tablet has different 'run'.
+            tag: Tag will be used to generate paths of tablets.
+            steps: A list of steps.
+            timestamps: A list of timestamps.
+            values: A list of values.
+            sub_tag: Sub tag for `scalars` data, None for `scalar` data.
+        """
+        self._reservoirs['scalar'].add_scalar_values(run, tag, steps,
+                                                     timestamps, values,
+                                                     sub_tag)
+
+    def get_version(self, plugin=None, run=None, tag=None):
+        """Get version of data, which changes whenever data changes.
+
+        Args:
+            plugin: Name of reservoir, versions of all reservoirs are
+                combined if None.
+            run: Run of bucket, version of whole reservoir if None.
+            tag: Tag of bucket.
+
+        Returns:
+            Version as int.
+        """
+        if plugin is None:
+            return max(reservoir.get_version()
+                       for reservoir in list(self._reservoirs.values()))
+        return self.get_reservoir(plugin).get_version(run, tag)
+
+    def get_state(self, versions=None):
+        """Get state of all reservoirs for snapshot, with buckets changed
+        since `versions`.
+
+        Args:
+            versions: A dict maps (plugin, key) of bucket to its version
+                saved last time, all buckets are returned if None.
+
+        Returns:
+            A tuple of dict maps plugin name to state of reservoir without
+            buckets, and dict maps (plugin, key) of changed bucket to
+            (version, state of bucket), all of them are plain data, see
+            `Reservoir.get_state`.
+        """
         with self._mutex:
-            if 'scalar' == plugin or 'scalars' == plugin:  # We adapt scalars data to be saved in scalar reservoir.
-                self._reservoirs['scalar'].add_scalar_item(run, tag, item)
-            else:
-                self._reservoirs[plugin].add_item(run, tag, item)
+            reservoirs = dict(self._reservoirs)
+        plugin_versions = None
+        if versions is not None:
+            plugin_versions = {plugin: {} for plugin in reservoirs}
+            for (plugin, key), version in versions.items():
+                plugin_versions.setdefault(plugin, {})[key] = version
+        state = {}
+        buckets = {}
+        for plugin, reservoir in reservoirs.items():
+            state[plugin], changed = reservoir.get_state(
+                None if plugin_versions is None else plugin_versions[plugin])
+            for key, bucket in changed.items():
+                buckets[(plugin, key)] = bucket
+        return state, buckets
+
+    def set_state(self, state, buckets):
+        """Replace all reservoirs by state got from `get_state`.
+
+        Args:
+            state: A dict maps plugin name to state of reservoir.
+            buckets: A dict maps (plugin, key) to bucket of all buckets,
+                created by `bucket_from_state`.
+        """
+        plugin_buckets = {plugin: {} for plugin in state}
+        for (plugin, key), bucket in buckets.items():
+            plugin_buckets[plugin][key] = bucket
+        reservoirs = {
+            plugin: Reservoir.from_state(reservoir_state,
+                                         plugin_buckets[plugin])
+            for plugin, reservoir_state in state.items()
+        }
+        with self._mutex:
+            self._reservoirs.update(reservoirs)
 
     def get_keys(self):
         """Get all plugin buckets name.
@@ -522,8 +1579,7 @@ class DataManager(object):
         Returns:
             All plugin keys.
         """
-        with self._mutex:
-            return self._reservoirs.keys()
+        return self._reservoirs.keys()
 
 
 default_data_manager = DataManager()
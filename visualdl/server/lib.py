@@ -14,17 +14,28 @@
 # =======================================================================
 import csv
 import io
+import itertools
 import math
 import os
 import sys
 import time
-from functools import partial  # noqa: F401
+from functools import partial
 
 import numpy as np
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_ENABLED = True
+except ImportError:
+    PARQUET_ENABLED = False
 
 from visualdl.component import components
 from visualdl.io import bfile
 from visualdl.server.log import logger
+from visualdl.server.reduction import check_reduction
+from visualdl.server.reduction import default_reduction_engine
+from visualdl.utils import columnar
+from visualdl.utils.downsample import DOWNSAMPLE_METHODS
 from visualdl.utils.importance import calc_all_hyper_param_importance
 from visualdl.utils.list_util import duplicate_removal
 from visualdl.utils.string_util import decode_tag
@@ -34,6 +45,9 @@ MODIFY_PREFIX = {}
 MODIFIED_RUNS = []
 EMBEDDING_NAME = {}
 embedding_names = []
+DEFAULT_DOWNSAMPLE_WIDTH = 1000
+# Number of rows in each chunk of exported data.
+EXPORT_CHUNK_ROWS = 10000
 
 
 def s2ms(timestamp):
@@ -134,7 +148,86 @@ for name in components.keys():
     exec("get_%s_tags=partial(get_logs, component='%s')" % (name, name))
 
 
+def _iter_csv(header, rows, delimiter):
+    """Yield csv text of `header` and `rows` chunk by chunk.
+    """
+    with io.StringIO() as fp:
+        csv_writer = csv.writer(fp, delimiter=delimiter)
+        csv_writer.writerow(header)
+        for index, row in enumerate(rows, 1):
+            csv_writer.writerow(row)
+            if index % EXPORT_CHUNK_ROWS == 0:
+                yield fp.getvalue()
+                fp.seek(0)
+                fp.truncate()
+        yield fp.getvalue()
+
+
+class _ChunkSink(object):
+    """Writable file-like object to get bytes written by parquet writer.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+        self.closed = False
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _iter_parquet(header, types, rows):
+    """Yield parquet file of `rows` chunk by chunk, every chunk of rows is
+    written as a row group.
+
+    Args:
+        header: Names of columns.
+        types: Names of pyarrow types of columns, such as `int64`.
+        rows: An iterable of rows.
+    """
+    if not PARQUET_ENABLED:
+        raise RuntimeError('Please install pyarrow to export parquet.')
+    types = [getattr(pyarrow, name)() for name in types]
+    schema = pyarrow.schema(list(zip(header, types)))
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, EXPORT_CHUNK_ROWS))
+        if not chunk:
+            break
+        columns = [
+            pyarrow.array(column, type=column_type)
+            for column, column_type in zip(zip(*chunk), types)
+        ]
+        writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+        yield sink.pop()
+    writer.close()
+    yield sink.pop()
+
+
 def get_hparam_data(log_reader, type='tsv'):
+    """Export hparams and metrics of all runs as csv or tsv by `type`.
+
+    Returns:
+        A generator of text chunks.
+    """
     result = get_hparam_list(log_reader)
     delimeter = '\t' if 'tsv' == type else ','
     header = ['Trial ID']
@@ -164,16 +257,9 @@ def get_hparam_data(log_reader, type='tsv'):
         temp.update(item.get('metrics', {}))
         trans_result.append(temp)
     header = header + h_header + m_header
-    with io.StringIO() as fp:
-        csv_writer = csv.writer(fp, delimiter=delimeter)
-        csv_writer.writerow(header)
-        for item in trans_result:
-            row = []
-            for col_name in header:
-                row.append(item.get(col_name, ''))
-            csv_writer.writerow(row)
-        result = fp.getvalue()
-        return result
+    rows = ([item.get(col_name, '') for col_name in header]
+            for item in trans_result)
+    return _iter_csv(header, rows, delimeter)
 
 
 def get_hparam_importance(log_reader):
@@ -278,13 +364,9 @@ def get_hparam_indicator(log_reader):
 def get_hparam_metric(log_reader, run, tag):
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("scalar").get_items(
-        run, decode_tag(tag))
-    results = [[
-        s2ms(item.timestamp), item.id,
-        transfer_abnomal_scalar_value(item.value)
-    ] for item in records]
-    return results
+    steps, timestamps, values = log_reader.data_manager.get_reservoir(
+        "scalar").get_scalar_arrays(run, decode_tag(tag))
+    return scalar_arrays_to_list(steps, timestamps, values)
 
 
 def get_hparam_list(log_reader):
@@ -330,24 +412,217 @@ def get_hparam_list(log_reader):
     return results
 
 
-def get_scalar(log_reader, run, tag):
+def arrays_s2ms(timestamps):
+    return np.where(timestamps < 2000000000, timestamps * 1000, timestamps)
+
+
+def scalar_arrays_to_list(steps, timestamps, values):
+    """Convert scalar arrays to a list of [timestamp(ms), step, value].
+
+    Same as `s2ms` and `transfer_abnomal_scalar_value` applied to each item.
+    """
+    timestamps = arrays_s2ms(timestamps)
+    results = [
+        list(item)
+        for item in zip(timestamps.tolist(), steps.tolist(), values.tolist())
+    ]
+    for index in np.flatnonzero(~np.isfinite(values)).tolist():
+        results[index][2] = str(results[index][2])
+    return results
+
+
+def _parse_since(since_step, since_version):
+    return (int(since_step) if since_step not in (None, '') else None,
+            int(since_version) if since_version not in (None, '') else None)
+
+
+def _since_result(version, removed, ids, records):
+    """Pack records added since version got last time with current version.
+
+    Records are identified by `ids`, and ids of records got before but
+    removed from sampled data since then are in `removed`. `reset` is True
+    if data of client can not be updated, e.g. data is reloaded by server
+    or too many records are removed, then all records are returned and
+    client should replace its data instead of appending.
+    """
+    result = _since_meta(version, removed)
+    result['ids'] = ids
+    result['records'] = records
+    return result
+
+
+def _since_meta(version, removed):
+    return {
+        'version': version,
+        'reset': removed is None,
+        'removed': removed or []
+    }
+
+
+def get_scalar(log_reader,
+               run,
+               tag,
+               mode=None,
+               width=None,
+               start_step=None,
+               end_step=None,
+               since_step=None,
+               since_version=None):
+    """Get scalar data of `tag` in `run`.
+
+    By default return reservoir sampled data. If any of `mode`, `width`,
+    `start_step` or `end_step` is given, data in step range is taken from
+    scalar series, or sampled data if series is disabled, and downsampled
+    to `width` points by `mode`, which is `lttb` or `min_max`.
+
+    If `since_step` or `since_version` is given, only sampled data added
+    after version `since_version` and with step larger than `since_step`
+    is returned, with current version for next request and ids of data
+    removed since `since_version`, see `_since_result`.
+    """
+    steps, timestamps, values, since = _get_scalar(
+        log_reader, run, tag, mode, width, start_step, end_step, since_step,
+        since_version)
+    records = scalar_arrays_to_list(steps, timestamps, values)
+    if since is None:
+        return records
+    version, removed, ids = since
+    return _since_result(version, removed, ids.tolist(), records)
+
+
+def get_scalar_binary(log_reader,
+                      run,
+                      tag,
+                      mode=None,
+                      width=None,
+                      start_step=None,
+                      end_step=None,
+                      since_step=None,
+                      since_version=None):
+    """Same as `get_scalar`, but encoded by `visualdl.utils.columnar`.
+
+    Columns are `wallTime` (ms), `step` and `value`. Non-finite values are
+    kept as is. If data since version or step is queried, column `id` is
+    added, and meta has `version`, `reset` and `removed`.
+    """
+    steps, timestamps, values, since = _get_scalar(
+        log_reader, run, tag, mode, width, start_step, end_step, since_step,
+        since_version)
+    columns = [('wallTime', arrays_s2ms(timestamps)), ('step', steps),
+               ('value', values)]
+    if since is None:
+        return columnar.encode(columns)
+    version, removed, ids = since
+    return columnar.encode(columns + [('id', ids)],
+                           _since_meta(version, removed))
+
+
+def _get_scalar(log_reader, run, tag, mode, width, start_step, end_step,
+                since_step, since_version):
+    """Get scalar arrays for `get_scalar`.
+
+    Returns:
+        A tuple of steps, timestamps, values and (version, removed ids, ids)
+        if data since version or step is queried, otherwise None.
+    """
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("scalar").get_items(
-        run, decode_tag(tag))
+    reservoir = log_reader.data_manager.get_reservoir("scalar")
+    since_step, since_version = _parse_since(since_step, since_version)
+    downsample = mode is not None or width is not None or \
+        start_step is not None or end_step is not None
+    if since_step is not None or since_version is not None:
+        if downsample:
+            raise ValueError("`since_step` and `since_version` can not be "
+                             "used with downsampling.")
+        version, ids, steps, timestamps, values, removed = \
+            reservoir.get_scalar_arrays_since(run, decode_tag(tag),
+                                              since_version, since_step)
+        return steps, timestamps, values, (version, removed, ids)
+    if not downsample:
+        return _get_scalar_arrays(reservoir, run, decode_tag(tag)) + (None, )
+    mode, width, start_step, end_step = _parse_downsample(
+        mode, width, start_step, end_step)
+    return _get_scalar_arrays(reservoir, run, decode_tag(tag), mode, width,
+                              start_step, end_step) + (None, )
+
+
+def _parse_downsample(mode, width, start_step, end_step):
+    mode = mode or 'lttb'
+    if mode not in DOWNSAMPLE_METHODS:
+        raise ValueError("Invalid downsample mode `%s`." % mode)
+    width = int(width) if width else DEFAULT_DOWNSAMPLE_WIDTH
+    return (mode, width, int(start_step) if start_step is not None else None,
+            int(end_step) if end_step is not None else None)
+
+
+def _get_scalar_arrays(reservoir,
+                       run,
+                       tag,
+                       mode=None,
+                       width=None,
+                       start_step=None,
+                       end_step=None):
+    if mode is None:
+        return reservoir.get_scalar_arrays(run, tag)
+    steps, timestamps, values = reservoir.get_scalar_series(
+        run, tag, start_step, end_step)
+    indices = DOWNSAMPLE_METHODS[mode](steps, values, width)
+    return steps[indices], timestamps[indices], values[indices]
+
+
+def get_scalar_batch(log_reader,
+                     runs,
+                     tags,
+                     mode=None,
+                     width=None,
+                     start_step=None,
+                     end_step=None):
+    """Get scalar data of every tag in `tags` of every run in `runs`.
+
+    New data is loaded only once for all series, arguments are same as
+    `get_scalar`. Series not exist are skipped.
+
+    Returns:
+        A generator of dict with `run`, `tag` and `data`, which is same as
+        result of `get_scalar`, so that response can be streamed.
+    """
+    if mode is not None or width is not None or \
+            start_step is not None or end_step is not None:
+        mode, width, start_step, end_step = _parse_downsample(
+            mode, width, start_step, end_step)
+    log_reader.load_new_data()
+    reservoir = log_reader.data_manager.get_reservoir("scalar")
+    series = [(run, tag, log_reader.name2tags.get(run, run), decode_tag(tag))
+              for run in runs for tag in tags]
 
-    results = [[
-        s2ms(item.timestamp), item.id,
-        transfer_abnomal_scalar_value(item.value)
-    ] if item.WhichOneof("one_value") == "value" else [
-        s2ms(item.timestamp), item.id,
-        transfer_abnomal_scalar_value(item.tag_value.value)
-    ] for item in records]
+    def generate():
+        for run, tag, run_key, tag_key in series:
+            if not reservoir.exist_in_keys(run_key, tag_key):
+                continue
+            yield {
+                'run': run,
+                'tag': tag,
+                'data': scalar_arrays_to_list(*_get_scalar_arrays(
+                    reservoir, run_key, tag_key, mode, width, start_step,
+                    end_step))
+            }
 
-    return results
+    return generate()
 
 
 def get_scalar_data(log_reader, run, tag, type='tsv'):
+    """Export all data of `tag` in `run` without sampling.
+
+    Only records of `tag` are read from log file, and data is never held in
+    memory at once.
+
+    Args:
+        type: `tsv`, `csv` or `parquet`, which requires pyarrow.
+
+    Returns:
+        A generator of text chunks, or bytes chunks for parquet.
+    """
     is_scalars = False
     if os.path.basename(run).startswith(decode_tag(tag).replace('%', '_')) and \
         log_reader.tags().get(bfile.join(os.path.dirname(run), decode_tag(tag)), None) == 'scalars':
@@ -356,88 +631,145 @@ def get_scalar_data(log_reader, run, tag, type='tsv'):
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
     if is_scalars:
-        result = log_reader.get_log_data('scalars', run, decode_tag(tag))
+        rows = log_reader.iter_log_data('scalars', run, decode_tag(tag))
+        header = ['id', 'tag', 'sub_tag', 'timestamp', 'value']
+        types = ['int64', 'string', 'string', 'int64', 'float32']
     else:
-        result = log_reader.get_log_data('scalar', run, decode_tag(tag))
-        print('scalar', result, 'run', run, 'tag', decode_tag(tag))
+        rows = log_reader.iter_log_data('scalar', run, decode_tag(tag))
+        header = ['id', 'tag', 'timestamp', 'value']
+        types = ['int64', 'string', 'int64', 'float32']
+    if 'parquet' == type:
+        return _iter_parquet(header, types, rows)
     delimeter = '\t' if 'tsv' == type else ','
-    with io.StringIO() as fp:
-        csv_writer = csv.writer(fp, delimiter=delimeter)
-        if is_scalars:
-            csv_writer.writerow(['id', 'tag', 'sub_tag', 'timestamp', 'value'])
-        else:
-            csv_writer.writerow(['id', 'tag', 'timestamp', 'value'])
-        csv_writer.writerows(result)
-        result = fp.getvalue()
-        return result
+    return _iter_csv(header, rows, delimeter)
 
 
-def get_image_tag_steps(log_reader, run, tag):
+def _get_media_tag_steps(log_reader,
+                         plugin,
+                         run,
+                         tag,
+                         since_step=None,
+                         since_version=None):
+    """
+    Get steps of media records, with `id` to get individual data of record,
+    which never changes even if other records are removed from sampled
+    data, while index in the list of all records does.
+    """
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("image").get_items(
-        run, decode_tag(tag))
+    reservoir = log_reader.data_manager.get_reservoir(plugin)
+    since_step, since_version = _parse_since(since_step, since_version)
+    version, ids, records, removed = reservoir.get_items_since(
+        run, decode_tag(tag), since_version, since_step)
     result = [{
         "step": item.id,
-        "wallTime": s2ms(item.timestamp)
-    } for item in records]
-    return result
+        "wallTime": s2ms(item.timestamp),
+        "id": id
+    } for id, item in zip(ids, records)]
+    if since_step is None and since_version is None:
+        return result
+    return _since_result(version, removed, ids, result)
 
 
-def get_individual_image(log_reader, run, tag, step_index):
+def _get_media_record(log_reader, plugin, run, tag, step_index, id=None):
+    """Get media record by `id` got with its step if given, otherwise by
+    `step_index` in the list of all records.
+    """
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("image").get_items(
-        run, decode_tag(tag))
-    return records[step_index].image.encoded_image_string
+    reservoir = log_reader.data_manager.get_reservoir(plugin)
+    if id is not None:
+        return reservoir.get_item(run, decode_tag(tag), id)
+    return reservoir.get_items(run, decode_tag(tag))[step_index]
 
 
-def get_text_tag_steps(log_reader, run, tag):
-    run = log_reader.name2tags[run] if run in log_reader.name2tags else run
-    log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("text").get_items(
-        run, decode_tag(tag))
-    result = [{
-        "step": item.id,
-        "wallTime": s2ms(item.timestamp)
-    } for item in records]
-    return result
+def get_image_tag_steps(log_reader,
+                        run,
+                        tag,
+                        since_step=None,
+                        since_version=None):
+    return _get_media_tag_steps(log_reader, "image", run, tag, since_step,
+                                since_version)
 
 
-def get_individual_text(log_reader, run, tag, step_index):
-    run = log_reader.name2tags[run] if run in log_reader.name2tags else run
-    log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("text").get_items(
-        run, decode_tag(tag))
-    return records[step_index].text.encoded_text_string
+def get_individual_image(log_reader, run, tag, step_index, id=None):
+    return _get_media_record(log_reader, "image", run, tag, step_index,
+                             id).image.encoded_image_string
 
 
-def get_audio_tag_steps(log_reader, run, tag):
-    run = log_reader.name2tags[run] if run in log_reader.name2tags else run
-    log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("audio").get_items(
-        run, decode_tag(tag))
-    result = [{
-        "step": item.id,
-        "wallTime": s2ms(item.timestamp)
-    } for item in records]
-    return result
+def get_text_tag_steps(log_reader,
+                       run,
+                       tag,
+                       since_step=None,
+                       since_version=None):
+    return _get_media_tag_steps(log_reader, "text", run, tag, since_step,
+                                since_version)
+
+
+def get_individual_text(log_reader, run, tag, step_index, id=None):
+    return _get_media_record(log_reader, "text", run, tag, step_index,
+                             id).text.encoded_text_string
+
+
+def get_audio_tag_steps(log_reader,
+                        run,
+                        tag,
+                        since_step=None,
+                        since_version=None):
+    return _get_media_tag_steps(log_reader, "audio", run, tag, since_step,
+                                since_version)
+
+
+def get_individual_audio(log_reader, run, tag, step_index, id=None):
+    return _get_media_record(log_reader, "audio", run, tag, step_index,
+                             id).audio.encoded_audio_string
 
 
-def get_individual_audio(log_reader, run, tag, step_index):
+def _get_records(log_reader, plugin, run, tag):
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("audio").get_items(
+    return log_reader.data_manager.get_reservoir(plugin).get_items(
         run, decode_tag(tag))
-    result = records[step_index].audio.encoded_audio_string
-    return result
+
+
+def _curves_to_binary(records, field, names):
+    """Encode curves of `records` by `visualdl.utils.columnar`.
+
+    Columns are `wallTime` (ms), `step`, `offset`, `threshold` and curve
+    fields in `names`, a list of (name, dtype). Points of i-th curve are in range [offset[i], offset[i + 1]).
+    """
+    curves = [getattr(item, field) for item in records]
+    lengths = [len(getattr(curve, names[0][0])) for curve in curves]
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    thresholds = [
+        np.arange(1, length + 1, dtype=np.float64) / length
+        for length in lengths
+    ]
+    columns = [('wallTime',
+                np.array([s2ms(item.timestamp) for item in records],
+                         dtype=np.int64)),
+               ('step', np.array([item.id for item in records],
+                                 dtype=np.int64)), ('offset', offsets),
+               ('threshold', _concatenate(thresholds, np.float64))]
+    for name, dtype in names:
+        array = _concatenate([getattr(curve, name) for curve in curves], dtype)
+        # Counts are usually small, halve their size if possible.
+        if dtype == np.int64 and len(array) and \
+                np.abs(array).max() < np.iinfo(np.int32).max:
+            array = array.astype(np.int32)
+        columns.append((name, array))
+    return columnar.encode(columns)
+
+
+def _concatenate(arrays, dtype):
+    if not arrays:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate([np.asarray(array, dtype=dtype) for array in arrays])
 
 
 def get_pr_curve(log_reader, run, tag):
-    run = log_reader.name2tags[run] if run in log_reader.name2tags else run
-    log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("pr_curve").get_items(
-        run, decode_tag(tag))
+    records = _get_records(log_reader, "pr_curve", run, tag)
     results = []
     for item in records:
         pr_curve = item.pr_curve
@@ -455,11 +787,16 @@ def get_pr_curve(log_reader, run, tag):
     return results
 
 
+def get_pr_curve_binary(log_reader, run, tag):
+    records = _get_records(log_reader, "pr_curve", run, tag)
+    return _curves_to_binary(
+        records, 'pr_curve',
+        [('precision', np.float64), ('recall', np.float64), ('TP', np.int64),
+         ('FP', np.int64), ('TN', np.int64), ('FN', np.int64)])
+
+
 def get_roc_curve(log_reader, run, tag):
-    run = log_reader.name2tags[run] if run in log_reader.name2tags else run
-    log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("roc_curve").get_items(
-        run, decode_tag(tag))
+    records = _get_records(log_reader, "roc_curve", run, tag)
     results = []
     for item in records:
         roc_curve = item.roc_curve
@@ -477,6 +814,14 @@ def get_roc_curve(log_reader, run, tag):
     return results
 
 
+def get_roc_curve_binary(log_reader, run, tag):
+    records = _get_records(log_reader, "roc_curve", run, tag)
+    return _curves_to_binary(
+        records, 'roc_curve',
+        [('tpr', np.float64), ('fpr', np.float64), ('TP', np.int64),
+         ('FP', np.int64), ('TN', np.int64), ('FN', np.int64)])
+
+
 def get_pr_curve_step(log_reader, run, tag=None):
     fake_run = run
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
@@ -501,6 +846,47 @@ def get_roc_curve_step(log_reader, run, tag=None):
     return results
 
 
+def _get_embeddings_value(log_reader, run, tag):
+    records = log_reader.data_manager.get_reservoir("embeddings").get_items(
+        run, decode_tag(tag))
+    return records[0]
+
+
+def get_embedding_matrix(value):
+    """Get vectors of embeddings value as a 2D numpy.ndarray.
+
+    Packed vectors are read by `np.frombuffer` without parsing each row.
+    """
+    if value.WhichOneof("one_value") == "bytes_embeddings":
+        embeddings = value.bytes_embeddings
+        dtype = np.dtype(embeddings.dtype or 'float32').newbyteorder('<')
+        return np.frombuffer(
+            embeddings.encoded_vectors,
+            dtype=dtype).reshape(tuple(embeddings.shape))
+    return np.array([item.vectors for item in value.embeddings.embeddings],
+                    dtype=np.float32)
+
+
+def get_embeddings(log_reader, run, tag, reduction, dimension=2):
+    """Get embeddings reduced to `dimension` by `reduction` on server.
+
+    Reduction runs in background process, partial result is returned with
+    progress before it finishes.
+    """
+    check_reduction(reduction, dimension)
+    run = log_reader.name2tags[run] if run in log_reader.name2tags else run
+    log_reader.load_new_data()
+    value = _get_embeddings_value(log_reader, run, tag)
+    embedding, progress = default_reduction_engine.get(
+        (run, tag), (value.id, value.timestamp),
+        partial(get_embedding_matrix, value), reduction, dimension)
+    return {
+        'embedding': embedding.tolist() if embedding is not None else [],
+        'progress': progress,
+        'finished': progress >= 1
+    }
+
+
 def get_embeddings_list(log_reader):
     run2tag = get_logs(log_reader, 'embeddings')
 
@@ -509,13 +895,15 @@ def get_embeddings_list(log_reader):
         for tag in _tags:
             name = path = os.path.join(run, tag)
             if name in EMBEDDING_NAME:
-                return embedding_names
+                continue
             EMBEDDING_NAME.update({name: {'run': run, 'tag': tag}})
-            records = log_reader.data_manager.get_reservoir(
-                "embeddings").get_items(run, decode_tag(tag))
-            row_len = len(records[0].embeddings.embeddings)
-            col_len = len(records[0].embeddings.embeddings[0].vectors)
-            shape = [row_len, col_len]
+            value = _get_embeddings_value(log_reader, run, tag)
+            if value.WhichOneof("one_value") == "bytes_embeddings":
+                shape = list(value.bytes_embeddings.shape)
+            else:
+                row_len = len(value.embeddings.embeddings)
+                col_len = len(value.embeddings.embeddings[0].vectors)
+                shape = [row_len, col_len]
             embedding_names.append({
                 'name': name,
                 'shape': shape,
@@ -528,13 +916,15 @@ def get_embedding_labels(log_reader, name):
     run = EMBEDDING_NAME[name]['run']
     tag = EMBEDDING_NAME[name]['tag']
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("embeddings").get_items(
-        run, decode_tag(tag))
+    value = _get_embeddings_value(log_reader, run, tag)
+    if value.WhichOneof("one_value") == "bytes_embeddings":
+        return value.bytes_embeddings.encoded_labels.decode('utf-8')
+
     labels = []
-    for item in records[0].embeddings.embeddings:
+    for item in value.embeddings.embeddings:
         labels.append(item.label)
 
-    label_meta = records[0].embeddings.label_meta
+    label_meta = value.embeddings.label_meta
     if label_meta:
         labels = [label_meta] + labels
 
@@ -551,21 +941,29 @@ def get_embedding_tensors(log_reader, name):
     run = EMBEDDING_NAME[name]['run']
     tag = EMBEDDING_NAME[name]['tag']
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("embeddings").get_items(
-        run, decode_tag(tag))
-    vectors = []
-    for item in records[0].embeddings.embeddings:
-        vectors.append(item.vectors)
-    vectors = np.array(vectors).flatten().astype(np.float32).tobytes()
-    return vectors
+    value = _get_embeddings_value(log_reader, run, tag)
+    if value.WhichOneof("one_value") == "bytes_embeddings" and \
+            value.bytes_embeddings.dtype in ('', 'float32'):
+        # Already little-endian float32 as required by frontend.
+        return value.bytes_embeddings.encoded_vectors
+    return get_embedding_matrix(value).astype('<f4').tobytes()
 
 
-def get_histogram(log_reader, run, tag):
+def _get_histogram_records(log_reader, run, tag, since_step, since_version):
     run = log_reader.name2tags[run] if run in log_reader.name2tags else run
     log_reader.load_new_data()
-    records = log_reader.data_manager.get_reservoir("histogram").get_items(
-        run, decode_tag(tag))
-
+    reservoir = log_reader.data_manager.get_reservoir("histogram")
+    since_step, since_version = _parse_since(since_step, since_version)
+    if since_step is None and since_version is None:
+        return reservoir.get_items(run, decode_tag(tag)), None
+    version, ids, records, removed = reservoir.get_items_since(
+        run, decode_tag(tag), since_version, since_step)
+    return records, (version, removed, ids)
+
+
+def get_histogram(log_reader, run, tag, since_step=None, since_version=None):
+    records, since = _get_histogram_records(log_reader, run, tag, since_step,
+                                            since_version)
     results = []
     for item in records:
         histogram = item.histogram
@@ -577,7 +975,43 @@ def get_histogram(log_reader, run, tag):
                 [bin_edges[index], bin_edges[index + 1], hist[index]])
         results.append([s2ms(item.timestamp), item.id, histogram_data])
 
-    return results
+    if since is None:
+        return results
+    version, removed, ids = since
+    return _since_result(version, removed, ids, results)
+
+
+def get_histogram_binary(log_reader,
+                         run,
+                         tag,
+                         since_step=None,
+                         since_version=None):
+    """Same as `get_histogram`, but encoded by `visualdl.utils.columnar`.
+
+    Columns are `wallTime` (ms), `step`, `offset`, `hist` and `binEdges`.
+    Counts of i-th histogram are hist[offset[i]:offset[i + 1]], and its bin
+    edges are binEdges[offset[i] + i:offset[i + 1] + i + 1]. Column `id` is
+    added if data since version or step is queried.
+    """
+    records, since = _get_histogram_records(log_reader, run, tag, since_step,
+                                            since_version)
+    hists = [item.histogram.hist for item in records]
+    offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum([len(hist) for hist in hists], out=offsets[1:])
+    columns = [('wallTime',
+                np.array([s2ms(item.timestamp) for item in records],
+                         dtype=np.int64)),
+               ('step', np.array([item.id for item in records],
+                                 dtype=np.int64)), ('offset', offsets),
+               ('hist', _concatenate(hists, np.float64)),
+               ('binEdges',
+                _concatenate([item.histogram.bin_edges for item in records],
+                             np.float64))]
+    if since is None:
+        return columnar.encode(columns)
+    version, removed, ids = since
+    return columnar.encode(columns + [('id', np.array(ids, dtype=np.int64))],
+                           _since_meta(version, removed))
 
 
 def get_static_graph(log_reader):
@@ -594,27 +1028,51 @@ def get_graph(graph_reader,
               expand=False,
               keep_state=False,
               expand_all=False,
-              refresh=True):
+              refresh=True,
+              since_version=None):
     result = ""
     run = graph_reader.displayname2runs[
         run] if run in graph_reader.displayname2runs else run
     if nodeid is not None:
         refresh = False
+    _, since_version = _parse_since(None, since_version)
     result = graph_reader.get_graph(run, nodeid, expand, keep_state,
-                                    expand_all, refresh)
+                                    expand_all, refresh, since_version)
     return result
 
 
-def get_graph_search(graph_reader, run, nodeid, keep_state=False,
-                     is_node=True):
+def get_graph_search(graph_reader,
+                     run,
+                     nodeid,
+                     keep_state=False,
+                     is_node=True,
+                     since_version=None):
     result = ""
     run = graph_reader.displayname2runs[
         run] if run in graph_reader.displayname2runs else run
+    _, since_version = _parse_since(None, since_version)
     result = graph_reader.search_graph_node(
-        run, nodeid, keep_state=keep_state, is_node=is_node)
+        run,
+        nodeid,
+        keep_state=keep_state,
+        is_node=is_node,
+        since_version=since_version)
     return result
 
 
+def get_graph_find(graph_reader, run, query, offset=None, limit=None):
+    if not query:
+        raise ValueError('Query is required.')
+    offset = int(offset) if offset not in (None, '') else 0
+    limit = int(limit) if limit not in (None, '') else 20
+    if offset < 0 or limit <= 0:
+        raise ValueError('Offset and limit should be positive.')
+    run = graph_reader.displayname2runs[
+        run] if run in graph_reader.displayname2runs else run
+    return graph_reader.find_graph_nodes(run, query, offset,
+                                         min(limit, 1000))
+
+
 def get_graph_all_nodes(graph_reader, run):
     result = ""
     run = graph_reader.displayname2runs[
@@ -642,13 +1100,11 @@ def retry(ntimes, function, time2sleep, *args, **kwargs):
 
 
 def cache_get(cache):
+    def _update(key, func, *args, **kwargs):
+        logger.warning('update cache %s' % key)
+        return func(*args, **kwargs)
+
     def _handler(key, func, *args, **kwargs):
-        data = cache.get(key)
-        if data is None:
-            logger.warning('update cache %s' % key)
-            data = func(*args, **kwargs)
-            cache.set(key, data)
-            return data
-        return data
+        return cache.get_or_compute(key, _update, key, func, *args, **kwargs)
 
     return _handler
@@ -0,0 +1,558 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import atexit
+import collections
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from visualdl.server.log import logger
+from visualdl.utils.md5_util import md5
+
+# t-SNE with exact repulsive forces costs O(n^2) each iteration, larger
+# embeddings are laid out by umap-style negative sampling instead.
+TSNE_MAX_SIZE = 5000
+# Inputs are reduced to this dimension by pca before searching neighbors.
+NEIGHBORS_INPUT_DIM = 50
+# Number of results of finished reductions kept in memory.
+DEFAULT_CACHE_SIZE = 16
+# Report partial result every `PROGRESS_INTERVAL` iterations.
+PROGRESS_INTERVAL = 50
+# Max output dimension of reduction, embeddings are shown in 2D or 3D.
+MAX_DIMENSION = 3
+# Max number of running or queued tasks, more tasks are refused.
+MAX_PENDING_TASKS = 8
+
+
+def pca(x, dimension=2, seed=0, callback=None):
+    """Project `x` to its top `dimension` principal components.
+
+    Components are computed by eigen decomposition of covariance matrix when
+    feature dimension is small, otherwise by randomized SVD.
+
+    Args:
+        x (numpy.ndarray): Matrix with one vector each row.
+        dimension (int): Output dimension.
+        seed (int): Random seed of randomized SVD.
+        callback: Unused, to keep same signature as other methods.
+
+    Returns:
+        numpy.ndarray with shape (len(x), dimension).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x = x - x.mean(axis=0)
+    n, d = x.shape
+    k = min(dimension, n, d)
+    if d <= 1024:
+        _, eigenvectors = np.linalg.eigh(x.T @ x)
+        components = eigenvectors[:, ::-1][:, :k]
+    else:
+        rng = np.random.RandomState(seed)
+        # Halko et al., oversampling and power iterations for accuracy.
+        q = x @ rng.standard_normal((d, k + 10))
+        for _ in range(4):
+            q, _ = np.linalg.qr(q)
+            q = x @ (x.T @ q)
+        q, _ = np.linalg.qr(q)
+        _, _, vt = np.linalg.svd(q.T @ x, full_matrices=False)
+        components = vt[:k].T
+    # Make signs deterministic.
+    signs = np.sign(components[np.abs(components).argmax(axis=0), range(k)])
+    components *= np.where(signs == 0, 1, signs)
+    result = np.zeros((n, dimension))
+    result[:, :k] = x @ components
+    return result
+
+
+def _squared_distances(a, b):
+    distances = (a * a).sum(axis=1)[:, None] + (b * b).sum(axis=1)[None, :]
+    distances -= 2 * (a @ b.T)
+    return np.maximum(distances, 0, out=distances)
+
+
+def _take_nearest(distances, k):
+    """Get indices and distances of k smallest each row, sorted.
+    """
+    k = min(k, distances.shape[1])
+    indices = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    nearest = np.take_along_axis(distances, indices, axis=1)
+    order = np.argsort(nearest, axis=1)
+    return (np.take_along_axis(indices, order, axis=1),
+            np.take_along_axis(nearest, order, axis=1))
+
+
+def _exact_neighbors(x, k, block_size=1024):
+    n = len(x)
+    indices = np.empty((n, k), dtype=np.int64)
+    distances = np.empty((n, k))
+    for start in range(0, n, block_size):
+        block = _squared_distances(x[start:start + block_size], x)
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = \
+            np.inf
+        indices[start:start + block_size], distances[
+            start:start + block_size] = _take_nearest(block, k)
+    return indices, distances
+
+
+def _rp_tree_leaves(x, leaf_size, rng):
+    """Split points by random hyperplanes until each leaf is small enough.
+    """
+    leaves = []
+    stack = [np.arange(len(x))]
+    while stack:
+        indices = stack.pop()
+        if len(indices) <= leaf_size:
+            leaves.append(indices)
+            continue
+        a, b = rng.choice(indices, 2, replace=False)
+        projection = x[indices] @ (x[a] - x[b])
+        left = projection < np.median(projection)
+        if left.all() or not left.any():
+            left = rng.rand(len(indices)) < 0.5
+        stack.append(indices[left])
+        stack.append(indices[~left])
+    return leaves
+
+
+def _approximate_neighbors(x, k, n_trees, seed):
+    """Search neighbors in leaves of a random projection forest.
+    """
+    n = len(x)
+    rng = np.random.RandomState(seed)
+    leaf_size = max(4 * k, 64)
+    candidates = np.full((n, n_trees * k), -1, dtype=np.int64)
+    candidate_distances = np.full((n, n_trees * k), np.inf)
+    for tree in range(n_trees):
+        for leaf in _rp_tree_leaves(x, leaf_size, rng):
+            distances = _squared_distances(x[leaf], x[leaf])
+            np.fill_diagonal(distances, np.inf)
+            indices, distances = _take_nearest(distances, k)
+            columns = slice(tree * k, tree * k + indices.shape[1])
+            candidates[leaf, columns] = leaf[indices]
+            candidate_distances[leaf, columns] = distances
+    # The same neighbor found by different trees has the same distance,
+    # so duplicates are adjacent after sorting by distance.
+    order = np.argsort(candidate_distances, axis=1, kind='stable')
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    candidate_distances = np.take_along_axis(candidate_distances, order, axis=1)
+    duplicated = np.zeros(candidates.shape, dtype=bool)
+    duplicated[:, 1:] = candidates[:, 1:] == candidates[:, :-1]
+    candidate_distances[duplicated] = np.inf
+    indices, distances = _take_nearest(candidate_distances, k)
+    indices = np.take_along_axis(candidates, indices, axis=1)
+    # Fill missing neighbors with random points to keep shape.
+    missing = indices < 0
+    if missing.any():
+        indices[missing] = rng.randint(0, n, missing.sum())
+        diff = x[np.nonzero(missing)[0]] - x[indices[missing]]
+        distances[missing] = (diff * diff).sum(axis=1)
+    return indices, distances
+
+
+def nearest_neighbors(x, k, seed=0):
+    """Find k nearest neighbors of each vector, exclude itself.
+
+    Returns:
+        (indices, squared distances), both have shape (len(x), k).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[1] > NEIGHBORS_INPUT_DIM:
+        x = pca(x, NEIGHBORS_INPUT_DIM, seed=seed)
+    if len(x) <= 8192:
+        return _exact_neighbors(x, k)
+    return _approximate_neighbors(x, k, n_trees=8, seed=seed)
+
+
+def _binary_search(distances, target, kernel, n_steps=64):
+    """Find per row scale so that sum of kernel(distances, scale) is target.
+
+    `kernel` should increase with scale.
+    """
+    low = np.zeros(len(distances))
+    high = np.full(len(distances), np.inf)
+    scale = np.ones(len(distances))
+    for _ in range(n_steps):
+        larger = kernel(distances, scale[:, None]) > target
+        high = np.where(larger, scale, high)
+        low = np.where(larger, low, scale)
+        scale = np.where(np.isinf(high), scale * 2, (low + high) / 2)
+    return scale
+
+
+def _init_layout(x, dimension, seed, scale):
+    y = pca(x, dimension, seed=seed)
+    std = y[:, 0].std()
+    return y / std * scale if std > 0 else y
+
+
+def tsne(x, dimension=2, seed=0, callback=None, perplexity=30.0,
+         n_iter=500):
+    """t-SNE on affinities of nearest neighbors.
+
+    Embeddings larger than `TSNE_MAX_SIZE` fall back to `umap`.
+
+    Args:
+        x (numpy.ndarray): Matrix with one vector each row.
+        dimension (int): Output dimension.
+        seed (int): Random seed.
+        callback: Called with (partial result, progress) during optimizing.
+        perplexity (float): Effective number of neighbors.
+        n_iter (int): Number of iterations.
+
+    Returns:
+        numpy.ndarray with shape (len(x), dimension).
+    """
+    n = len(x)
+    if n > TSNE_MAX_SIZE:
+        return umap(x, dimension, seed=seed, callback=callback)
+    if n < 3:
+        return _init_layout(x, dimension, seed, 1)
+    k = min(n - 1, int(3 * perplexity))
+    indices, distances = nearest_neighbors(x, k, seed=seed)
+    distances = distances / distances.max(axis=1, keepdims=True).clip(1e-12)
+
+    def entropy(distances, precision):
+        p = np.exp(-distances * (1 / precision))
+        sum_p = p.sum(axis=1)
+        return np.log(sum_p) + (distances * p).sum(axis=1) / (
+            precision[:, 0] * sum_p)
+
+    precision = _binary_search(distances, np.log(min(perplexity, k)),
+                               entropy)
+    p = np.exp(-distances / precision[:, None])
+    p /= p.sum(axis=1, keepdims=True)
+    heads = np.concatenate([np.repeat(np.arange(n), k), indices.ravel()])
+    tails = np.concatenate([indices.ravel(), np.repeat(np.arange(n), k)])
+    p = np.concatenate([p.ravel(), p.ravel()]) / (2 * n)
+
+    y = _init_layout(x, dimension, seed, 1e-4)
+    velocity = np.zeros_like(y)
+    gains = np.ones_like(y)
+    learning_rate = max(n / 12 / 4, 50)
+    exaggeration_iter = min(250, n_iter // 2)
+    for i in range(n_iter):
+        exaggeration = 12 if i < exaggeration_iter else 1
+        # Attractive forces of neighbors.
+        diff = y[heads] - y[tails]
+        q = 1 / (1 + (diff * diff).sum(axis=1))
+        force = (exaggeration * p * q)[:, None] * diff
+        gradient = np.stack([
+            np.bincount(heads, weights=force[:, j], minlength=n)
+            for j in range(dimension)
+        ], axis=1)
+        # Exact repulsive forces of all points.
+        q_sum = 0
+        repulsion = np.zeros_like(y)
+        for start in range(0, n, 1024):
+            block = 1 / (1 + _squared_distances(y[start:start + 1024], y))
+            block[np.arange(len(block)),
+                  np.arange(start, start + len(block))] = 0
+            q_sum += block.sum()
+            block *= block
+            repulsion[start:start + 1024] = block.sum(
+                axis=1)[:, None] * y[start:start + 1024] - block @ y
+        gradient = 4 * (gradient - repulsion / q_sum)
+
+        momentum = 0.5 if i < exaggeration_iter else 0.8
+        same_sign = np.sign(gradient) == np.sign(velocity)
+        gains = np.where(same_sign, gains * 0.8, gains + 0.2).clip(0.01)
+        velocity = momentum * velocity - learning_rate * gains * gradient
+        y += velocity
+        if callback is not None and (i + 1) % PROGRESS_INTERVAL == 0:
+            callback(y, (i + 1) / n_iter)
+    return y
+
+
+def umap(x, dimension=2, seed=0, callback=None, n_neighbors=15,
+         n_epochs=None):
+    """Umap-style layout of fuzzy neighbor graph by negative sampling.
+
+    Args:
+        x (numpy.ndarray): Matrix with one vector each row.
+        dimension (int): Output dimension.
+        seed (int): Random seed.
+        callback: Called with (partial result, progress) during optimizing.
+        n_neighbors (int): Number of neighbors of each point in graph.
+        n_epochs (int): Number of epochs, 500 for small inputs and 200 for
+            large inputs if None.
+
+    Returns:
+        numpy.ndarray with shape (len(x), dimension).
+    """
+    n = len(x)
+    if n < 3:
+        return _init_layout(x, dimension, seed, 1)
+    k = min(n - 1, n_neighbors)
+    if n_epochs is None:
+        n_epochs = 500 if n <= 10000 else 200
+    rng = np.random.RandomState(seed)
+    indices, distances = nearest_neighbors(x, k, seed=seed)
+    distances = np.sqrt(distances)
+    rho = distances[:, :1]
+    distances = distances - rho
+
+    def membership(distances, sigma):
+        return np.exp(-distances / sigma).sum(axis=1)
+
+    sigma = _binary_search(distances, np.log2(k), membership)
+    weights = np.exp(-distances / sigma[:, None]).ravel()
+    heads = np.repeat(np.arange(n), k)
+    tails = indices.ravel()
+    # Edges of both directions approximate fuzzy union of the graph.
+    heads, tails = np.concatenate([heads, tails]), np.concatenate(
+        [tails, heads])
+    weights = np.concatenate([weights, weights])
+    keep = weights >= weights.max() / n_epochs
+    heads, tails, weights = heads[keep], tails[keep], weights[keep]
+    epochs_per_sample = weights.max() / weights
+    next_sample = epochs_per_sample.copy()
+
+    # Curve parameters of umap with min_dist=0.1 and spread=1.
+    a, b = 1.577, 0.8951
+    n_negative = 5
+    y = _init_layout(x, dimension, seed, 10 / 4)
+
+    def accumulate(indices, values):
+        return np.stack([
+            np.bincount(indices, weights=values[:, j], minlength=n)
+            for j in range(dimension)
+        ], axis=1)
+
+    for epoch in range(n_epochs):
+        alpha = 1 - epoch / n_epochs
+        sampled = next_sample <= epoch + 1
+        next_sample[sampled] += epochs_per_sample[sampled]
+        head, tail = heads[sampled], tails[sampled]
+
+        diff = y[head] - y[tail]
+        d2 = (diff * diff).sum(axis=1)
+        positive = d2 > 0
+        coefficient = np.zeros_like(d2)
+        coefficient[positive] = -2 * a * b * d2[positive]**(b - 1) / (
+            1 + a * d2[positive]**b)
+        attraction = (coefficient[:, None] * diff).clip(-4, 4) * alpha
+
+        negative_head = np.repeat(head, n_negative)
+        negative_tail = rng.randint(0, n, len(negative_head))
+        diff = y[negative_head] - y[negative_tail]
+        d2 = (diff * diff).sum(axis=1)
+        coefficient = np.where(
+            d2 > 0, 2 * b / ((0.001 + d2) * (1 + a * d2**b)), 0)
+        repulsion = (coefficient[:, None] * diff).clip(-4, 4) * alpha
+
+        y += accumulate(head, attraction) - accumulate(tail, attraction) + \
+            accumulate(negative_head, repulsion)
+        if callback is not None and (epoch + 1) % PROGRESS_INTERVAL == 0:
+            callback(y, (epoch + 1) / n_epochs)
+    return y
+
+
+REDUCTION_METHODS = {'pca': pca, 'tsne': tsne, 'umap': umap}
+
+
+def check_reduction(reduction, dimension):
+    """Raise ValueError if `reduction` or `dimension` is not supported."""
+    if reduction not in REDUCTION_METHODS:
+        raise ValueError('Unknown reduction `{}`, should be one of {}.'.format(
+            reduction, ', '.join(REDUCTION_METHODS)))
+    if not 1 <= dimension <= MAX_DIMENSION:
+        raise ValueError(
+            'Dimension of reduction should be between 1 and {}.'.format(
+                MAX_DIMENSION))
+
+
+def reduce(x, reduction, dimension=2, callback=None):
+    check_reduction(reduction, dimension)
+    return REDUCTION_METHODS[reduction](
+        x, dimension, callback=callback).astype(np.float32)
+
+
+def _save_partial(path, embedding, progress):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as fp:
+        np.savez(fp, embedding=embedding.astype(np.float32), progress=progress)
+    os.replace(temp_path, path)
+
+
+def _load_partial(path):
+    try:
+        with np.load(path) as data:
+            return data['embedding'], float(data['progress'])
+    except Exception:
+        return None, 0.0
+
+
+def _run_reduction(input_path, partial_path, reduction, dimension):
+    """Run reduction in worker process.
+    """
+    x = np.load(input_path, mmap_mode='r')
+
+    def callback(embedding, progress):
+        # Input file is removed if task is superseded or engine is closed.
+        if not os.path.exists(input_path):
+            raise RuntimeError('Reduction is cancelled.')
+        _save_partial(partial_path, embedding, progress)
+
+    return reduce(x, reduction, dimension, callback=callback)
+
+
+def _remove_files(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class ReductionEngine(object):
+    """Run dimensionality reduction of embeddings in background processes.
+
+    Results of finished tasks are cached in memory by key, tasks of a group
+    with an older version are superseded by the newer one. Worker processes
+    write partial results to files during optimizing, so that clients can
+    show them progressively.
+    """
+
+    def __init__(self, max_workers=1, cache_size=DEFAULT_CACHE_SIZE,
+                 max_pending=MAX_PENDING_TASKS):
+        self._max_workers = max_workers
+        self._cache_size = cache_size
+        self._max_pending = max_pending
+        self._executor = None
+        self._work_dir = None
+        # Maps key to (future, input_path, partial_path), future is None
+        # while input is being saved.
+        self._tasks = {}
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cancel_superseded(self, group, version):
+        """Cancel tasks and drop results of `group` of other versions."""
+        for key in list(self._tasks):
+            if key[0] == group and key[1] != version:
+                future, input_path, partial_path = self._tasks.pop(key)
+                if future is not None:
+                    future.cancel()
+                    _remove_files(input_path, partial_path)
+        for key in list(self._results):
+            if key[0] == group and key[1] != version:
+                del self._results[key]
+
+    def _start(self, key):
+        """Reserve task of `key` if it can be started.
+        """
+        pending = sum(1 for future, _, _ in self._tasks.values()
+                      if future is None or not future.done())
+        if pending >= self._max_pending:
+            raise RuntimeError(
+                'Too many reductions are running, try again later.')
+        self._cancel_superseded(*key[:2])
+        if self._executor is None:
+            self._work_dir = tempfile.mkdtemp(prefix='vdlreduction')
+            # Spawned workers never inherit locks and threads of server.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(self.close)
+        name = md5(repr(key))
+        task = (None, os.path.join(self._work_dir, name + '.npy'),
+                os.path.join(self._work_dir, name + '.partial.npz'))
+        self._tasks[key] = task
+        return task, self._executor
+
+    def _submit(self, key, task, executor, get_vectors, reduction,
+                dimension):
+        """Save input and submit task out of lock."""
+        _, input_path, partial_path = task
+        try:
+            np.save(input_path, np.asarray(get_vectors()))
+            future = executor.submit(_run_reduction, input_path,
+                                     partial_path, reduction, dimension)
+        except Exception:
+            with self._lock:
+                if self._tasks.get(key) is task:
+                    del self._tasks[key]
+            _remove_files(input_path)
+            raise
+        with self._lock:
+            if self._tasks.get(key) is task:
+                self._tasks[key] = (future, input_path, partial_path)
+                return
+        # Superseded or closed while submitting.
+        future.cancel()
+        _remove_files(input_path, partial_path)
+
+    def get(self, group, version, get_vectors, reduction, dimension=2):
+        """Get result of reduction, start a task if not started.
+
+        Args:
+            group: Hashable key of the embeddings, e.g. (run, tag).
+            version: Hashable version of the embeddings, tasks of `group`
+                with other versions are cancelled when a task is started.
+            get_vectors: A function returns matrix to reduce, which is only
+                called when task is started.
+            reduction (string): Method of reduction, one of
+                `REDUCTION_METHODS`.
+            dimension (int): Output dimension.
+
+        Returns:
+            (embedding, progress), embedding is numpy.ndarray or None if
+            no partial result yet, progress is 1.0 when finished.
+        """
+        check_reduction(reduction, dimension)
+        key = (group, version, reduction, dimension)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key], 1.0
+            task = self._tasks.get(key)
+            if task is None:
+                task, executor = self._start(key)
+            elif task[0] is not None and task[0].done():
+                future, input_path, partial_path = self._tasks.pop(key)
+                _remove_files(input_path, partial_path)
+                try:
+                    embedding = future.result()
+                except Exception as e:
+                    logger.error('Failed to reduce embeddings {}: {}'.format(
+                        key, e))
+                    raise
+                self._results[key] = embedding
+                while len(self._results) > self._cache_size:
+                    self._results.popitem(last=False)
+                return embedding, 1.0
+            else:
+                executor = None
+        if executor is not None:
+            self._submit(key, task, executor, get_vectors, reduction,
+                         dimension)
+            return None, 0.0
+        return _load_partial(task[2])
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._work_dir is not None:
+                shutil.rmtree(self._work_dir, ignore_errors=True)
+                self._work_dir = None
+            self._tasks.clear()
+
+
+default_reduction_engine = ReductionEngine()
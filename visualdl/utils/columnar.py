@@ -0,0 +1,92 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import json
+import struct
+
+import numpy as np
+
+# Format of columnar binary: (little-endian)
+# byte      magic[4]
+# uint32    length of header
+# byte      header, utf-8 json of {"columns": [...], "meta": {...}}
+# byte      padding to a multiple of 8
+# byte      data of columns
+#
+# Each column in header is {"name", "dtype", "offset", "length"}, where
+# `dtype` is numpy dtype string such as `<f8`, `offset` is byte offset of
+# column data from start of data and `length` is number of elements.
+# Data of every column starts at a multiple of 8, so that it can be viewed
+# as typed array by frontend without copying.
+COLUMNAR_MAGIC = b'VDLC'
+_HEADER = struct.Struct('<4sI')
+_ALIGNMENT = 8
+
+
+def _align(size):
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def encode(columns, meta=None):
+    """Encode 1-D arrays as columnar binary.
+
+    Args:
+        columns: A list of (name, array) tuples.
+        meta: A json serializable dict of extra information.
+
+    Returns:
+        Encoded bytes.
+    """
+    descs = []
+    chunks = []
+    offset = 0
+    for name, array in columns:
+        array = np.ascontiguousarray(array)
+        data = array.astype(array.dtype.newbyteorder('<'),
+                            copy=False).tobytes()
+        descs.append({
+            'name': name,
+            'dtype': array.dtype.newbyteorder('<').str,
+            'offset': offset,
+            'length': len(array)
+        })
+        padding = _align(len(data)) - len(data)
+        chunks.extend([data, b'\0' * padding])
+        offset += len(data) + padding
+    header = json.dumps({'columns': descs, 'meta': meta or {}}).encode()
+    padding = _align(_HEADER.size + len(header)) - _HEADER.size - len(header)
+    return b''.join([_HEADER.pack(COLUMNAR_MAGIC, len(header)), header,
+                     b'\0' * padding] + chunks)
+
+
+def decode(buffer):
+    """Decode columnar binary encoded by `encode`.
+
+    Returns:
+        A tuple of a dict maps name to numpy array and meta dict.
+    """
+    magic, length = _HEADER.unpack_from(buffer)
+    if magic != COLUMNAR_MAGIC:
+        raise ValueError('Invalid columnar binary.')
+    header = json.loads(
+        bytes(buffer[_HEADER.size:_HEADER.size + length]).decode())
+    start = _align(_HEADER.size + length)
+    columns = {}
+    for desc in header['columns']:
+        columns[desc['name']] = np.frombuffer(
+            buffer,
+            dtype=desc['dtype'],
+            count=desc['length'],
+            offset=start + desc['offset'])
+    return columns, header['meta']
@@ -14,6 +14,22 @@
 # =======================================================================
 
 import array
+import functools
+
+import numpy as np
+
+try:
+    import google_crc32c
+    if getattr(google_crc32c, 'implementation', 'c') != 'c':
+        raise ImportError('google_crc32c is not built with C extension.')
+    _crc32c_extension = google_crc32c.value
+except ImportError:
+    try:
+        import crc32c as _crc32c_module
+        _crc32c_extension = _crc32c_module.crc32c
+    except ImportError:
+        _crc32c_extension = None
+CRC32C_EXTENSION_ENABLED = _crc32c_extension is not None
 
 
 def masked_crc32c(data):
@@ -107,11 +123,85 @@ def crc_finalize(crc):
     return crc & _MASK
 
 
+def _crc32c_python(data):
+    return crc_finalize(crc_update(CRC_INIT, data))
+
+
+# Data shorter than this is computed byte by byte, since numpy has overhead
+# for each call.
+_NUMPY_MIN_SIZE = 4096
+_CRC_TABLE_NP = np.array(CRC_TABLE, dtype=np.uint32)
+
+
+@functools.lru_cache(maxsize=32)
+def _shift_tables(length):
+    """Tables to compute CRC state after feeding `length` zero bytes.
+
+    CRC without pre and post conditioning is linear, so the shifted state is
+    the xor of table lookups of each byte of the state.
+
+    Returns:
+        A (4, 256) numpy array of uint32.
+    """
+    # Shift each of 32 single bit states by `length` zero bytes.
+    basis = np.left_shift(np.uint32(1), np.arange(32, dtype=np.uint32))
+    for _ in range(length):
+        basis = _CRC_TABLE_NP[basis & 0xff] ^ (basis >> 8)
+    tables = np.zeros((4, 256), dtype=np.uint32)
+    values = np.arange(256)
+    for byte_index in range(4):
+        for bit in range(8):
+            tables[byte_index][(values >> bit) & 1 == 1] ^= basis[
+                byte_index * 8 + bit]
+    return tables
+
+
+def _crc32c_numpy(data):
+    """Compute CRC-32C of chunks of data in parallel with numpy.
+
+    Data is split into chunks with same length, state of all chunks are
+    updated together byte by byte, then chunk states are combined by
+    shifting, and the tail is computed byte by byte.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    size = len(buf)
+    # Chunk length is a power of 2 near sqrt(size), to balance the
+    # vectorized loop and the combining loop, and reuse shift tables.
+    length = 1 << max(6, (size.bit_length() + 1) // 2)
+    num_chunks = size // length
+    columns = np.ascontiguousarray(
+        buf[:num_chunks * length].reshape(num_chunks, length).T)
+
+    states = np.zeros(num_chunks, dtype=np.uint32)
+    states[0] = _MASK
+    for column in columns:
+        states = _CRC_TABLE_NP[(states ^ column) & 0xff] ^ (states >> 8)
+
+    t0, t1, t2, t3 = (table.tolist() for table in _shift_tables(length))
+    crc = 0
+    for state in states.tolist():
+        crc = (t0[crc & 0xff] ^ t1[(crc >> 8) & 0xff] ^ t2[(crc >> 16) & 0xff]
+               ^ t3[crc >> 24] ^ state)
+
+    for b in buf[num_chunks * length:].tolist():
+        crc = CRC_TABLE[(crc ^ b) & 0xff] ^ (crc >> 8)
+    return crc_finalize(crc ^ _MASK)
+
+
 def crc32c(data):
     """Compute CRC-32C checksum of the data.
+
+    Use `google_crc32c` or `crc32c` package if installed, otherwise compute
+    with numpy for large data and byte by byte for small data.
+
     Args:
       data: byte array, string or iterable over bytes.
     Returns:
       32-bit CRC-32C checksum of data as long.
     """
-    return crc_finalize(crc_update(CRC_INIT, data))
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        if _crc32c_extension is not None:
+            return _crc32c_extension(bytes(data)) & _MASK
+        if len(data) >= _NUMPY_MIN_SIZE:
+            return _crc32c_numpy(data)
+    return _crc32c_python(data)
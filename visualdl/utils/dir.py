@@ -25,6 +25,8 @@ CONF_HOME = os.path.join(VDL_HOME, 'conf')
 CONFIG_PATH = os.path.join(CONF_HOME, 'config.json')
 FASTDEPLOYSERVER_PATH = os.path.join(VDL_HOME, 'fastdeployserver')
 X2PADDLE_CACHE_PATH = os.path.join(VDL_HOME, 'x2paddle')
+SNAPSHOT_CACHE_PATH = os.path.join(VDL_HOME, 'snapshot')
+GRAPH_CACHE_PATH = os.path.join(VDL_HOME, 'graph')
 
 
 def init_vdl_config():
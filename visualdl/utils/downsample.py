@@ -0,0 +1,93 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import numpy as np
+
+
+def min_max(x, y, n_out):
+    """Downsample a curve by keeping the min and max point of each bucket.
+
+    Range of `x` is split into `n_out // 2` buckets with same width, so that
+    each bucket is about one pixel when `n_out` is twice of chart width.
+
+    Args:
+        x (numpy.ndarray): Sorted x of points.
+        y (numpy.ndarray): y of points.
+        n_out (int): Maximum number of points to keep.
+
+    Returns:
+        Sorted indices of points to keep.
+    """
+    size = len(x)
+    n_buckets = n_out // 2
+    if size <= n_out or n_buckets < 1:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    span = x[-1] - x[0]
+    if span > 0:
+        buckets = ((x - x[0]) * (n_buckets / span)).astype(np.int64)
+        np.minimum(buckets, n_buckets - 1, out=buckets)
+    else:
+        buckets = np.zeros(size, dtype=np.int64)
+    # Sort by bucket then y, the first and last of each bucket are min and max.
+    order = np.lexsort((y, buckets))
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.diff(sorted_buckets, prepend=-1))
+    ends = np.append(starts[1:], size) - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def lttb(x, y, n_out):
+    """Downsample a curve by Largest-Triangle-Three-Buckets algorithm.
+
+    The first and last points are always kept, other points are split into
+    `n_out - 2` buckets, and the point forming the largest triangle with the
+    point kept in previous bucket and the average of next bucket is kept.
+
+    Args:
+        x (numpy.ndarray): Sorted x of points.
+        y (numpy.ndarray): y of points.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        Sorted indices of points to keep.
+    """
+    size = len(x)
+    if size <= n_out or n_out < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = size - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        ax, ay = x[selected], y[selected]
+        areas = np.abs((ax - avg_x) * (y[start:end] - ay) -
+                       (ax - x[start:end]) * (avg_y - ay))
+        selected = start + int(np.nanargmax(areas)) if np.isfinite(
+            areas).any() else start
+        indices[i + 1] = selected
+    return indices
+
+
+DOWNSAMPLE_METHODS = {'lttb': lttb, 'min_max': min_max}
@@ -0,0 +1,181 @@
+# Copyright (c) 2023 VisualDL Authors. All Rights Reserve.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =======================================================================
+import hashlib
+import struct
+
+import numpy as np
+
+from visualdl.io import bfile
+
+# Sidecar index of a vdl log file `vdlrecords.xxx.log` is stored in
+# `vdlrecords.xxx.log.vdlindex`, which is a sequence of fixed size entries:
+# (little-endian)
+# uint64    byte offset of the record in log file
+# int64     step of value
+# uint64    hash of tag of value
+INDEX_SUFFIX = '.vdlindex'
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('step', '<i8'), ('tag', '<u8')])
+_ENTRY = struct.Struct('<QqQ')
+
+
+def get_index_path(filepath):
+    return filepath + INDEX_SUFFIX
+
+
+def is_index_file(path):
+    return path.endswith(INDEX_SUFFIX)
+
+
+def hash_tag(tag):
+    """Hash a tag into uint64 to keep index entries fixed size.
+
+    Args:
+        tag (string): Tag of value, as written by `LogWriter`.
+    """
+    digest = hashlib.blake2b(tag.encode('utf-8'), digest_size=8).digest()
+    return struct.unpack('<Q', digest)[0]
+
+
+class RecordIndexWriter(object):
+    """Write index entries of records to sidecar file of a vdl log file.
+
+    Entries are cached in memory and written when `flush` is called, so that
+    the index never points to records not flushed to log file.
+    """
+
+    def __init__(self, filepath):
+        self._index_path = get_index_path(filepath)
+        self._writer = bfile.BFile(self._index_path, 'wb')
+        self._entries = []
+        self._tag_hashes = {}
+
+    def add(self, offset, index_keys):
+        """Add index entries of one record.
+
+        Args:
+            offset (int): Byte offset of the record in log file.
+            index_keys (list): A list of (tag, step) of values in the record.
+        """
+        for tag, step in index_keys:
+            tag_hash = self._tag_hashes.get(tag)
+            if tag_hash is None:
+                tag_hash = self._tag_hashes[tag] = hash_tag(tag)
+            self._entries.append(_ENTRY.pack(offset, step, tag_hash))
+
+    def add_entries(self, entries):
+        """Add index entries built by scanning log file.
+
+        Args:
+            entries (numpy.ndarray): Index entries with dtype `INDEX_DTYPE`.
+        """
+        if len(entries):
+            self._entries.append(
+                np.ascontiguousarray(entries, dtype=INDEX_DTYPE).tobytes())
+
+    def flush(self):
+        if self._entries:
+            self._writer.write(b''.join(self._entries))
+            self._entries = []
+        self._writer.flush()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+class RecordIndex(object):
+    """Index of a vdl log file to find records by tag and step.
+
+    Index can be loaded from sidecar file, which may still be appended by
+    writer, or built from entries by scanning log file.
+    """
+
+    def __init__(self, entries=None):
+        self._entries = entries if entries is not None else np.empty(
+            0, dtype=INDEX_DTYPE)
+        self._index_file = None
+        self._pending = b''
+
+    @classmethod
+    def load(cls, filepath):
+        """Load index from sidecar file of log file `filepath`.
+
+        Returns:
+            Instance of RecordIndex, or None if sidecar file not exists.
+        """
+        index_path = get_index_path(filepath)
+        if not bfile.exists(index_path):
+            return None
+        index = cls()
+        index._index_file = bfile.BFile(index_path, 'rb')
+        index.update()
+        return index
+
+    def update(self):
+        """Load new entries appended to sidecar file since last update.
+        """
+        if self._index_file is None:
+            return
+        data = self._pending + (self._index_file.read() or b'')
+        # The last entry may be incomplete if it is still writing.
+        size = len(data) - len(data) % INDEX_DTYPE.itemsize
+        self._pending = data[size:]
+        if size:
+            entries = np.frombuffer(data[:size], dtype=INDEX_DTYPE)
+            self._entries = np.concatenate([self._entries, entries])
+
+    def extend(self, entries):
+        """Add entries of records appended to log file, for index built by
+        scanning log file.
+
+        Args:
+            entries (numpy.ndarray): Index entries with dtype `INDEX_DTYPE`.
+        """
+        if len(entries):
+            self._entries = np.concatenate([self._entries, entries])
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def entries(self):
+        return self._entries
+
+    def _select(self, tag, start_step=None, end_step=None):
+        entries = self._entries
+        mask = entries['tag'] == hash_tag(tag)
+        if start_step is not None:
+            mask &= entries['step'] >= start_step
+        if end_step is not None:
+            mask &= entries['step'] <= end_step
+        return entries[mask]
+
+    def get_offsets(self, tag, start_step=None, end_step=None):
+        """Get byte offsets of records contain `tag` in step range.
+
+        Args:
+            tag (string): Tag of value, as written by `LogWriter`.
+            start_step (int): Minimum step included, no limit if None.
+            end_step (int): Maximum step included, no limit if None.
+
+        Returns:
+            Sorted unique offsets as numpy.ndarray.
+        """
+        return np.unique(self._select(tag, start_step, end_step)['offset'])
+
+    def get_steps(self, tag):
+        """Get all steps of `tag` in the order they were written.
+        """
+        return self._select(tag)['step']
@@ -15,7 +15,10 @@
 
 from visualdl.io import bfile
 from visualdl.utils.crc32 import masked_crc32c
+from visualdl.utils.record_index import get_index_path
+from visualdl.utils.record_index import RecordIndexWriter
 from visualdl.proto import record_pb2
+import collections
 import struct
 import time
 import queue
@@ -26,22 +29,49 @@ QUEUE_TIMEOUT = os.getenv("VDL_QUEUE_TIMEOUT")
 if isinstance(QUEUE_TIMEOUT, str):
     QUEUE_TIMEOUT = int(QUEUE_TIMEOUT)
 
+# Policies when queue of pending records is full:
+# block: wait for free space, drop the new record if `VDL_QUEUE_TIMEOUT`
+#     is set and timeout.
+# drop_oldest: drop the oldest pending records.
+# coalesce: replace pending record with same tags by the new one, drop the
+#     oldest pending records if there is no such record.
+QUEUE_POLICIES = ('block', 'drop_oldest', 'coalesce')
+
 
 class RecordWriter(object):
     """Package data with crc32 or not.
     """
 
-    def __init__(self, writer):
+    def __init__(self, writer, offset=0, index_writer=None, crc=False):
+        """
+        Args:
+            writer: File to write records.
+            offset (int): Size of existing data in file.
+            index_writer (RecordIndexWriter): Writer of sidecar index, no
+                index will be written if it is None.
+            crc (boolean): Package data with crc32 if it is True.
+        """
         self._writer = writer
+        self._offset = offset
+        self._index_writer = index_writer
+        self._crc = crc
 
-    def write(self, data):
+    def write(self, data, index_keys=None):
         """Package and write data to disk.
 
         Args:
             data (string or bytes): Data to write to disk.
+            index_keys (list): A list of (tag, step) to index the record.
         """
-        header = struct.pack('<Q', len(data))
-        self._writer.write(header + data)
+        if self._crc:
+            size = self.write_crc(data)
+        else:
+            header = struct.pack('<Q', len(data))
+            self._writer.write(header + data)
+            size = len(header) + len(data)
+        if self._index_writer is not None and index_keys:
+            self._index_writer.add(self._offset, index_keys)
+        self._offset += size
 
     def write_crc(self, data):
         """Package data with crc32 and write to disk.
@@ -54,17 +84,26 @@ class RecordWriter(object):
 
         Args:
             data (string or bytes): Data to write to disk.
+
+        Returns:
+            Size of packaged data.
         """
         header = struct.pack('<Q', len(data))
         header_crc = struct.pack('<I', masked_crc32c(header))
         footer_crc = struct.pack('<I', masked_crc32c(data))
         self._writer.write(header + header_crc + data + footer_crc)
+        return len(header) + len(data) + 8
 
     def flush(self):
         self._writer.flush()
+        # Flush index after data, so index never points to unwritten record.
+        if self._index_writer is not None:
+            self._index_writer.flush()
 
     def close(self):
         self._writer.close()
+        if self._index_writer is not None:
+            self._index_writer.close()
 
     @property
     def closed(self):
@@ -84,7 +123,11 @@ class RecordFileWriter(object):
                  max_queue_size=10,
                  flush_secs=120,
                  filename_suffix='',
-                 filename=''):
+                 filename='',
+                 write_index=False,
+                 write_crc=False,
+                 max_queue_bytes=0,
+                 queue_policy='block'):
         self._logdir = logdir
         if not bfile.exists(logdir):
             bfile.makedirs(logdir)
@@ -108,10 +151,45 @@ class RecordFileWriter(object):
                 logdir,
                 "vdlrecords.%010d.log%s" % (time.time(), filename_suffix))
 
+        if bfile.exists(self._file_name):
+            from visualdl.reader.record_reader import is_crc_record_file
+            file_crc = is_crc_record_file(self._file_name)
+            if file_crc is not None and file_crc != write_crc:
+                # Records in one file must be packaged in the same way.
+                print('Records in `{}` are packaged {} crc, new records '
+                      'will be the same.'.format(
+                          self._file_name, 'with' if file_crc else 'without'))
+                write_crc = file_crc
+
+        offset = 0
+        index_writer = None
+        self._write_index = write_index
+        if write_index:
+            file_stat = bfile.stat(self._file_name) if bfile.exists(
+                self._file_name) else (0, 0)
+            if file_stat is None:
+                print('Index is disabled since size of `{}` is unknown.'.
+                      format(self._file_name))
+                self._write_index = False
+            else:
+                offset = file_stat[0]
+                if offset and not bfile.exists(
+                        get_index_path(self._file_name)):
+                    # Index existing records before adding new ones.
+                    from visualdl.reader.record_reader import \
+                        build_record_index
+                    build_record_index(self._file_name)
+                index_writer = RecordIndexWriter(self._file_name)
+
         self._general_file_writer = bfile.BFile(self._file_name, "wb")
+        self._coalesce = 'coalesce' == queue_policy
         self._async_writer = _AsyncWriter(
-            RecordWriter(self._general_file_writer), max_queue_size,
-            flush_secs)
+            RecordWriter(self._general_file_writer, offset, index_writer,
+                         write_crc),
+            flush_secs=flush_secs,
+            max_queue_size=max_queue_size,
+            max_queue_bytes=max_queue_bytes,
+            queue_policy=queue_policy)
         # TODO(shenyuhan) Maybe file_version in future.
         # _record = record_pb2.Record()
         # self.add_record(_record)
@@ -128,7 +206,23 @@ class RecordFileWriter(object):
             raise TypeError("Expected an record_pb2.Record proto, "
                             " but got %s" % type(record))
         a = record.SerializeToString()
-        self._async_writer.write(a)
+        index_keys = None
+        if self._write_index:
+            index_keys = [(value.tag, value.id) for value in record.values]
+        coalesce_key = None
+        if self._coalesce:
+            coalesce_key = tuple(
+                (value.tag, value.tag_value.tag,
+                 value.WhichOneof("one_value")) for value in record.values)
+        self._async_writer.write(a, index_keys, coalesce_key)
+
+    def get_stats(self):
+        """Get counters of records and bytes in writing queue.
+
+        Returns:
+            A dict of counters, see `_RecordQueue.get_stats`.
+        """
+        return self._async_writer.get_stats()
 
     def flush(self):
         self._async_writer.flush()
@@ -137,30 +231,234 @@ class RecordFileWriter(object):
         self._async_writer.close()
 
 
+class _RecordQueue(object):
+    """Queue of pending records bounded by number of records and bytes.
+
+    When queue is full, new record is handled according to `policy`, see
+    `QUEUE_POLICIES`. Counters of enqueued, dropped and written records are
+    kept for monitoring.
+    """
+
+    def __init__(self, max_size=0, max_bytes=0, policy='block'):
+        """
+        Args:
+            max_size (int): Max number of pending records, no limit if 0.
+            max_bytes (int): Max bytes of pending records, no limit if 0.
+            policy (string): Policy when queue is full.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError('Queue policy must be one of {}, but got {}.'.
+                             format(QUEUE_POLICIES, policy))
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._policy = policy
+        # Each entry is [item, size, coalesce_key], item is None if it is
+        # replaced by a newer entry.
+        self._entries = collections.deque()
+        self._latest_entries = {}
+        self._size = 0
+        self._bytes = 0
+        self._unfinished_tasks = 0
+        self._closed = False
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self._all_tasks_done = threading.Condition(self._mutex)
+        self._stats = collections.Counter()
+
+    def _is_full(self, nbytes):
+        if not self._size:
+            # A record larger than `max_bytes` can be put into empty queue.
+            return False
+        return (self._max_size and self._size >= self._max_size) or (
+            self._max_bytes and self._bytes + nbytes > self._max_bytes)
+
+    def _pop_entry(self):
+        entry = self._entries.popleft()
+        item, nbytes, key = entry
+        if key is not None and self._latest_entries.get(key) is entry:
+            del self._latest_entries[key]
+        self._size -= 1
+        self._bytes -= nbytes
+        return item, nbytes
+
+    def _drop(self, nbytes):
+        self._stats['dropped_records'] += 1
+        self._stats['dropped_bytes'] += nbytes
+        self._task_done()
+
+    def put(self, item, nbytes, coalesce_key=None, timeout=None):
+        """Put an item into queue.
+
+        Args:
+            item: Item to put.
+            nbytes (int): Size of item in bytes.
+            coalesce_key: Key of item for `coalesce` policy.
+            timeout (float): Timeout to wait for `block` policy.
+
+        Returns:
+            True if item is put into queue, False if it is dropped.
+
+        Raises:
+            IOError: If queue is closed, including while waiting.
+        """
+        with self._not_full:
+            if self._closed:
+                raise IOError("Writer is closed.")
+            if self._is_full(nbytes):
+                if 'block' == self._policy:
+                    if not self._not_full.wait_for(
+                            lambda: self._closed or not self._is_full(nbytes),
+                            timeout):
+                        self._stats['dropped_records'] += 1
+                        self._stats['dropped_bytes'] += nbytes
+                        return False
+                    if self._closed:
+                        raise IOError("Writer is closed.")
+                elif 'coalesce' == self._policy and \
+                        coalesce_key in self._latest_entries:
+                    entry = self._latest_entries[coalesce_key]
+                    self._stats['dropped_records'] += 1
+                    self._stats['dropped_bytes'] += entry[1]
+                    self._stats['coalesced_records'] += 1
+                    self._stats['enqueued_records'] += 1
+                    self._stats['enqueued_bytes'] += nbytes
+                    self._bytes += nbytes - entry[1]
+                    entry[0], entry[1] = item, nbytes
+                    return True
+                else:
+                    while self._is_full(nbytes):
+                        _, dropped_bytes = self._pop_entry()
+                        self._drop(dropped_bytes)
+            self._append(item, nbytes, coalesce_key)
+            self._stats['enqueued_records'] += 1
+            self._stats['enqueued_bytes'] += nbytes
+            return True
+
+    def _append(self, item, nbytes, coalesce_key=None):
+        entry = [item, nbytes, coalesce_key]
+        self._entries.append(entry)
+        if coalesce_key is not None:
+            self._latest_entries[coalesce_key] = entry
+        self._size += 1
+        self._bytes += nbytes
+        self._unfinished_tasks += 1
+        self._not_empty.notify()
+
+    def close(self, item):
+        """Close queue, `item` is put as the last item regardless of bounds.
+
+        Items can not be put any more, so that `item` is never dropped and
+        no item is left behind it. Waiting `put` raises IOError.
+        """
+        with self._mutex:
+            if self._closed:
+                return
+            self._closed = True
+            self._append(item, 0)
+            self._not_full.notify_all()
+
+    def get(self, block=True, timeout=None):
+        """Remove and return the oldest item from queue.
+
+        Raises:
+            queue.Empty: If no item available.
+        """
+        with self._not_empty:
+            if block:
+                if not self._not_empty.wait_for(lambda: self._size, timeout):
+                    raise queue.Empty
+            elif not self._size:
+                raise queue.Empty
+            item, _ = self._pop_entry()
+            self._not_full.notify_all()
+            return item
+
+    def _task_done(self):
+        self._unfinished_tasks -= 1
+        if self._unfinished_tasks <= 0:
+            self._all_tasks_done.notify_all()
+
+    def task_done(self, nbytes=0):
+        """Indicate that an item got by `get` is handled.
+
+        Args:
+            nbytes (int): Size of item written, 0 if item is not written.
+        """
+        with self._mutex:
+            if nbytes:
+                self._stats['written_records'] += 1
+                self._stats['written_bytes'] += nbytes
+            self._task_done()
+
+    def join(self):
+        with self._all_tasks_done:
+            self._all_tasks_done.wait_for(lambda: self._unfinished_tasks <= 0)
+
+    def record_flushed(self):
+        with self._mutex:
+            self._stats['flushed_bytes'] = self._stats['written_bytes']
+
+    def get_stats(self):
+        """Get counters of queue.
+
+        Returns:
+            A dict with `enqueued_records`, `enqueued_bytes`,
+            `dropped_records`, `dropped_bytes`, `coalesced_records`,
+            `written_records`, `written_bytes`, `flushed_bytes`,
+            `queue_records` and `queue_bytes`.
+        """
+        with self._mutex:
+            stats = {
+                name: self._stats[name]
+                for name in ('enqueued_records', 'enqueued_bytes',
+                             'dropped_records', 'dropped_bytes',
+                             'coalesced_records', 'written_records',
+                             'written_bytes', 'flushed_bytes')
+            }
+            stats['queue_records'] = self._size
+            stats['queue_bytes'] = self._bytes
+            return stats
+
+
 class _AsyncWriter(object):
-    def __init__(self, record_writer, flush_secs=120, max_queue_size=20):
+    def __init__(self,
+                 record_writer,
+                 flush_secs=120,
+                 max_queue_size=20,
+                 max_queue_bytes=0,
+                 queue_policy='block'):
         """Start a sub-thread to handle data writing.
 
         Args:
             record_writer (visualdl.record_writer.RecordWriter):
+            flush_secs (int): The duration to flush data to disk.
+            max_queue_size (int): Max number of pending records.
+            max_queue_bytes (int): Max bytes of pending records.
+            queue_policy (string): Policy when queue is full.
         """
 
         self._record_writer = record_writer
         self._closed = False
-        self._bytes_queue = queue.Queue(max_queue_size)
+        self._bytes_queue = _RecordQueue(max_queue_size, max_queue_bytes,
+                                         queue_policy)
         self._worker = _AsyncWriterThread(self._bytes_queue,
                                           self._record_writer, flush_secs)
         self._lock = threading.Lock()
         self._worker.start()
 
-    def write(self, bytestring):
+    def write(self, bytestring, index_keys=None, coalesce_key=None):
         with self._lock:
             if self._closed:
                 raise IOError("Writer is closed.")
-            try:
-                self._bytes_queue.put(bytestring, timeout=QUEUE_TIMEOUT)
-            except queue.Full:
-                print('This data was not written to the log due to timeout.')
+        if not self._bytes_queue.put((bytestring, index_keys),
+                                     len(bytestring),
+                                     coalesce_key,
+                                     timeout=QUEUE_TIMEOUT):
+            print('This data was not written to the log due to timeout.')
+
+    def get_stats(self):
+        return self._bytes_queue.get_stats()
 
     def flush(self):
         with self._lock:
@@ -169,6 +467,7 @@ class _AsyncWriter(object):
             # Waiting all data to flush of writer.
             self._bytes_queue.join()
             self._record_writer.flush()
+            self._bytes_queue.record_flushed()
 
     def close(self):
         if not self._closed:
@@ -177,6 +476,7 @@ class _AsyncWriter(object):
                     self._closed = True
                     self._worker.stop()
                     self._record_writer.flush()
+                    self._bytes_queue.record_flushed()
                     self._record_writer.close()
 
 
@@ -192,7 +492,7 @@ class _AsyncWriterThread(threading.Thread):
         self._shutdown_signal = object()
 
     def stop(self):
-        self._queue.put(self._shutdown_signal)
+        self._queue.close(self._shutdown_signal)
         self.join()
 
     def run(self):
@@ -201,16 +501,18 @@ class _AsyncWriterThread(threading.Thread):
             now = time.time()
             queue_wait_duration = self._next_flush_time - now
             data = None
+            written_bytes = 0
             try:
                 if queue_wait_duration > 0:
                     data = self._queue.get(True, queue_wait_duration)
                 else:
                     data = self._queue.get(False)
 
-                if data == self._shutdown_signal:
+                if data is self._shutdown_signal:
                     return
 
-                self._record_writer.write(data)
+                self._record_writer.write(*data)
+                written_bytes = len(data[0])
                 self._has_pending_data = True
             except queue.Empty:
                 pass
@@ -224,11 +526,12 @@ class _AsyncWriterThread(threading.Thread):
                 pass
             finally:
                 if data:
-                    self._queue.task_done()
+                    self._queue.task_done(written_bytes)
 
             now = time.time()
             if now > self._next_flush_time:
                 if self._has_pending_data:
                     self._record_writer.flush()
+                    self._queue.record_flushed()
                     self._has_pending_data = False
                 self._next_flush_time = now + self._flush_secs
@@ -13,11 +13,13 @@
 # limitations under the License.
 # =======================================================================
 import os
+import threading
 import time
 
 import numpy as np
 
 from visualdl.component.base_component import audio
+from visualdl.component.base_component import bytes_embedding
 from visualdl.component.base_component import embedding
 from visualdl.component.base_component import histogram
 from visualdl.component.base_component import hparam
@@ -30,6 +32,7 @@ from visualdl.component.base_component import scalars
 from visualdl.component.base_component import text
 from visualdl.component.graph import translate_graph
 from visualdl.io import bfile
+from visualdl.proto.record_pb2 import Record
 from visualdl.server.log import logger
 from visualdl.utils.figure_util import figure_to_image
 from visualdl.utils.img_util import merge_images
@@ -86,6 +89,12 @@ class LogWriter(object):
                  write_to_disk=True,
                  display_name='',
                  file_name='',
+                 write_index=False,
+                 write_crc=False,
+                 batch_size=0,
+                 batch_ms=1000,
+                 max_queue_bytes=0,
+                 queue_policy='block',
                  **kwargs):
         """Create a instance of class `LogWriter` and create a vdl log file with
         given args.
@@ -100,6 +109,26 @@ class LogWriter(object):
                 to disk.
             filename_suffix (string): Suffix added to vdl log file.
             write_to_disk (boolean): Write to disk if it is True.
+            write_index (boolean): Write a sidecar index `*.vdlindex` along
+                with log file, which maps tag and step to offset of record,
+                so that records can be read by step range without scanning
+                the whole log file.
+            write_crc (boolean): Package each record with crc32c of its
+                length and data, so that corrupted records can be detected
+                when reading.
+            batch_size (int): If it is greater than 1, values added by
+                `add_scalar` and `add_scalars` are packed into one record
+                until `batch_size` values are pending, or `batch_ms`
+                milliseconds passed since the first pending value, even if
+                no more value is added. Pending values are also written by
+                `flush` and `close`.
+            batch_ms (int): Max milliseconds to pack values into one record.
+            max_queue_bytes (int): Max bytes of pending records in queue, no
+                limit if it is 0.
+            queue_policy (string): What to do when queue is full, `block`
+                waits for free space, `drop_oldest` drops the oldest pending
+                records, `coalesce` replaces pending record of same tags by
+                the new one. Use `get_stats` to get number of dropped records.
         """
         if not logdir:
             from datetime import datetime
@@ -114,6 +143,16 @@ class LogWriter(object):
         self._write_to_disk = write_to_disk
         self.kwargs = kwargs
         self._file_name = file_name
+        self._write_index = write_index
+        self._write_crc = write_crc
+        self._batch_size = batch_size
+        self._batch_ms = batch_ms
+        self._batch_record = None
+        self._batch_start_time = 0
+        self._batch_timer = None
+        self._batch_lock = threading.Lock()
+        self._max_queue_bytes = max_queue_bytes
+        self._queue_policy = queue_policy
 
         self._file_writer = None
         self._all_writers = {}
@@ -137,7 +176,11 @@ class LogWriter(object):
                 max_queue_size=self._max_queue,
                 flush_secs=self._flush_secs,
                 filename_suffix=self._filename_suffix,
-                filename=self._file_name)
+                filename=self._file_name,
+                write_index=self._write_index,
+                write_crc=self._write_crc,
+                max_queue_bytes=self._max_queue_bytes,
+                queue_policy=self._queue_policy)
             self._all_writers.update({self._logdir: self._file_writer})
         return self._file_writer
 
@@ -185,6 +228,12 @@ class LogWriter(object):
         if '%' in tag:
             raise RuntimeError("% can't appear in tag!")
         walltime = round(time.time() * 1000) if walltime is None else walltime
+        if self._batch_size > 1:
+            self._add_batch_values([
+                Record.Value(
+                    id=step, tag=tag, timestamp=walltime, value=float(value))
+            ])
+            return
         self._get_file_writer().add_record(
             scalar(tag=tag, value=value, step=step, walltime=walltime))
 
@@ -209,9 +258,52 @@ class LogWriter(object):
         if not isinstance(tag_scalar_dict, dict):
             raise RuntimeError("tag_value must be a dict!")
         walltime = round(time.time() * 1000) if walltime is None else walltime
+        if self._batch_size > 1:
+            self._add_batch_values([
+                record.values[0] for record in scalars(
+                    main_tag, tag_scalar_dict, step, walltime)
+            ])
+            return
         for record in scalars(main_tag, tag_scalar_dict, step, walltime):
             self._get_file_writer().add_record(record)
 
+    def _add_batch_values(self, values):
+        """Pack values into pending record, and write it if batch is full.
+
+        Args:
+            values (list): A list of `Record.Value`.
+        """
+        with self._batch_lock:
+            now = time.time()
+            if self._batch_record is None:
+                self._batch_record = Record()
+                self._batch_start_time = now
+                # Write pending values by timer if logging pauses.
+                self._batch_timer = threading.Timer(
+                    self._batch_ms / 1000,
+                    self._flush_expired_batch,
+                    args=(self._batch_record, ))
+                self._batch_timer.daemon = True
+                self._batch_timer.start()
+            self._batch_record.values.extend(values)
+            if len(self._batch_record.values) >= self._batch_size or (
+                    now - self._batch_start_time) * 1000 >= self._batch_ms:
+                self._flush_batch()
+
+    def _flush_expired_batch(self, record):
+        with self._batch_lock:
+            # Batch may be written already, or writer is closed.
+            if self._batch_record is record and self._file_writer is not None:
+                self._flush_batch()
+
+    def _flush_batch(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        if self._batch_record is not None:
+            record, self._batch_record = self._batch_record, None
+            self._get_file_writer().add_record(record)
+
     def add_image(self, tag, img, step, walltime=None, dataformats="HWC"):
         """Add an image to vdl record file.
 
@@ -334,7 +426,9 @@ class LogWriter(object):
                        walltime=None,
                        labels=None,
                        hot_vectors=None,
-                       labels_meta=None):
+                       labels_meta=None,
+                       packed=False,
+                       dtype='float32'):
         """Add embeddings to vdl record file.
 
         Args:
@@ -350,6 +444,10 @@ class LogWriter(object):
                 replace it.
             labels_meta (numpy.array or list): Obsolete parameter, use
                 `metadata_header` to replace it.
+            packed (bool): Whether to store `mat` as one raw buffer, which is
+                much faster to write and read for large embeddings.
+            dtype (string): Type to store `mat` when `packed` is True,
+                `float32` or `float16`.
         Example 1:
             mat = [
             [1.3561076367500755, 1.3116267195134017, 1.6785401875616097],
@@ -403,8 +501,6 @@ class LogWriter(object):
             logger.warning(
                 'Parameter `labels_meta` in function `add_embeddings` will be'
                 ' deprecated in future, use `metadata_header` instead.')
-        if isinstance(mat, np.ndarray):
-            mat = mat.tolist()
         if isinstance(metadata, np.ndarray):
             metadata = metadata.tolist()
 
@@ -413,6 +509,19 @@ class LogWriter(object):
 
         step = 0
         walltime = round(time.time() * 1000) if walltime is None else walltime
+        if packed:
+            self._get_file_writer().add_record(
+                bytes_embedding(
+                    tag=tag,
+                    labels=metadata,
+                    labels_meta=metadata_header,
+                    hot_vectors=mat,
+                    step=step,
+                    walltime=walltime,
+                    dtype=dtype))
+            return
+        if isinstance(mat, np.ndarray):
+            mat = mat.tolist()
         self._get_file_writer().add_record(
             embedding(
                 tag=tag,
@@ -673,9 +782,29 @@ class LogWriter(object):
         writer.write(result)
         writer.close()
 
+    def get_stats(self):
+        """Get counters of records and bytes in writing queue.
+
+        Returns:
+            A dict of counters, include `enqueued_records`, `enqueued_bytes`,
+            `dropped_records`, `dropped_bytes`, `coalesced_records`,
+            `written_records`, `written_bytes`, `flushed_bytes`,
+            `queue_records` and `queue_bytes`.
+
+        Example:
+            writer = LogWriter(logdir='./log', queue_policy='drop_oldest')
+            print(writer.get_stats()['dropped_records'])
+        """
+        if self._file_writer is None or not hasattr(self._file_writer,
+                                                    'get_stats'):
+            return {}
+        return self._file_writer.get_stats()
+
     def flush(self):
         """Flush all data in cache to disk.
         """
+        with self._batch_lock:
+            self._flush_batch()
         if self._all_writers is {}:
             return
         for writer in self._all_writers.values():
@@ -684,6 +813,9 @@ class LogWriter(object):
     def close(self):
         """Close all writers after flush data to disk.
         """
+        with self._batch_lock:
+            if self._file_writer is not None:
+                self._flush_batch()
         if self._all_writers is {}:
             return
         for writer in self._all_writers.values():